@@ -0,0 +1,68 @@
+# scripts/benchmarks/bench_batch_scoring.py
+"""
+Benchmark: per-row /predict vs vectorized /predict/batch throughput.
+Requires trained artifacts in models/ (run `make train` first).
+"""
+
+import sys
+import os
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.api import app as api  # noqa: E402
+from src.api.schemas import (  # noqa: E402
+    MAX_BATCH_SIZE,
+    TrialPredictionsRequest,
+)
+from scripts.benchmarks.common import synthetic_trials, time_call, report  # noqa: E402
+
+N_TRIALS = 1000
+
+
+def bench_http(client, trials):
+    print("\n--- HTTP (TestClient) ---")
+
+    # measure scoring, not the prediction cache
+    def per_row():
+        api.serving.prediction_cache.clear()
+        for t in trials:
+            client.post("/predict", json=t)
+
+    def batched():
+        api.serving.prediction_cache.clear()
+        for i in range(0, len(trials), MAX_BATCH_SIZE):
+            client.post(
+                "/predict/batch", json={"trials": trials[i : i + MAX_BATCH_SIZE]}
+            )
+
+    report("POST /predict (one call per trial)", len(trials), time_call(per_row, 1))
+    report("POST /predict/batch", len(trials), time_call(batched))
+
+
+def bench_in_process(trials):
+    print("\n--- In-process (transform + predict_proba) ---")
+    requests = [TrialPredictionsRequest(**t) for t in trials]
+    model = api.serving.models["logistic_baseline"]
+
+    def per_row():
+        for r in requests:
+            model.predict_proba(api.transform_batch([r]))
+
+    def batched():
+        model.predict_proba(api.transform_batch(requests))
+
+    report("one row per call + predict_proba", len(requests), time_call(per_row, 1))
+    report("one batch + predict_proba", len(requests), time_call(batched))
+
+
+if __name__ == "__main__":
+    trials = synthetic_trials(N_TRIALS)
+    with TestClient(api.app) as client:
+        if not api.serving.ready:
+            print("CRITICAL: No model loaded. Run `make train` first.")
+            sys.exit(1)
+        bench_in_process(trials)
+        bench_http(client, trials)
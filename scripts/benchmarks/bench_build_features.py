@@ -0,0 +1,63 @@
+# scripts/benchmarks/bench_build_features.py
+"""
+Benchmark: the vectorized phase flags and sponsor grouping in
+src/features/build_features.py against the original row-wise .apply
+versions (tests/rowwise_features.py), on synthetic frames of 10k, 100k
+and 1M rows.
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import io
+
+# Add project root (and tests/, for the row-wise reference) to python path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import rowwise_features as reference  # noqa: E402
+from src.features.build_features import (  # noqa: E402
+    build_sponsor_features,
+    clean_phase_column,
+)
+from scripts.benchmarks.common import PHASES, SPONSORS, report, time_call  # noqa: E402
+
+
+def synthetic_frame(n, seed=42):
+    rng = np.random.default_rng(seed)
+    phase = rng.choice(np.array(PHASES + ["PHASE1, PHASE2"], dtype=object), n)
+    phase[rng.random(n) < 0.05] = None
+    return pd.DataFrame({"phase": phase, "sponsor": rng.choice(SPONSORS, n)})
+
+
+def run(label, fn, df):
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = time_call(lambda: fn(df.copy()), repeat=1 if len(df) > 10**5 else 3)
+    report(label, len(df), seconds)
+    return seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    for n in [int(s) for s in args.sizes.split(",")]:
+        df = synthetic_frame(n)
+        print(f"\n--- {n:,} rows ---")
+        for name, vectorized, rowwise in [
+            ("clean_phase_column", clean_phase_column, reference.clean_phase_column),
+            (
+                "build_sponsor_features",
+                build_sponsor_features,
+                reference.build_sponsor_features,
+            ),
+        ]:
+            before = run(f"{name} (row-wise)", rowwise, df)
+            after = run(f"{name} (vectorized)", vectorized, df)
+            print(f"{'':<40} speedup x{before / after:.1f}")
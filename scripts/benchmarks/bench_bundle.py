@@ -0,0 +1,148 @@
+# scripts/benchmarks/bench_bundle.py
+"""
+Benchmark: API cold start from the joblib files vs the serving bundle.
+A model is prepared and trained on a synthetic interim set (sparse
+features, large TF-IDF vocabulary); each load then runs in a fresh
+interpreter, which reports import time, load time (to a validated
+ServingState), RSS after loading and how much of it the load added.
+"""
+
+import sys
+import os
+import argparse
+import json
+import subprocess
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Add project root to python path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, ROOT)
+
+from src.pipelines.data_preparation import run_preparation_pipeline  # noqa: E402
+from src.pipelines.model_training import run_training_pipeline  # noqa: E402
+from scripts.benchmarks.common import SPONSORS  # noqa: E402
+
+N_ROWS = 50000
+MAX_FEATURES = 5000
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from src.api.metrics import process_rss_bytes
+from src.inference.serving import load_serving_state
+imported = time.perf_counter()
+imported_rss = process_rss_bytes()
+config, api_params = json.loads(sys.argv[1]), json.loads(sys.argv[2])
+state = load_serving_state(config, api_params)
+state.validate()
+loaded = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "load": loaded - imported,
+    "rss_mb": process_rss_bytes() / 2**20,
+    "load_rss_mb": (process_rss_bytes() - imported_rss) / 2**20,
+}))
+"""
+
+
+def interim_frame(n, n_terms, seed=42):
+    """Synthetic interim rows whose conditions draw from n_terms words."""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"term{i}" for i in range(n_terms)])
+    return pd.DataFrame(
+        {
+            "nct_id": [f"NCT{i:08d}" for i in range(n)],
+            "phase": rng.choice(["PHASE1", "PHASE2", "PHASE3", None], n),
+            "status": rng.choice(["COMPLETED", "TERMINATED"], n),
+            "enrollment": rng.integers(1, 5000, n).astype(float),
+            "conditions": [" ".join(w) for w in rng.choice(words, (n, 3))],
+            "sponsor": rng.choice(SPONSORS, n),
+        }
+    )
+
+
+def cold_start(config, api_params):
+    """Timings (s) and RSS (MB) of one load in a new interpreter."""
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(config), json.dumps(api_params)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=N_ROWS)
+    parser.add_argument("--max-features", type=int, default=MAX_FEATURES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MLFLOW_TRACKING_URI"] = f"sqlite:///{tmp}/mlflow.db"
+        # preparation saves the featurizer to its configured (relative) path
+        os.chdir(tmp)
+        config = {
+            "data": {"interim": os.path.join(tmp, "interim.csv")},
+            "models": {"logistic_baseline": os.path.join(tmp, "model.pkl")},
+            "artifacts": {
+                "featurizer": os.path.join(tmp, "models", "featurizer.joblib"),
+                "feature_names": os.path.join(tmp, "feature_names.joblib"),
+            },
+            "serving": {"bundle": os.path.join(tmp, "bundle")},
+        }
+        interim_frame(args.rows, 2 * args.max_features).to_csv(
+            config["data"]["interim"], index=False
+        )
+        run_preparation_pipeline(
+            config["data"]["interim"],
+            os.path.join(tmp, "processed.parquet"),
+            sparse_path=os.path.join(tmp, "sparse.npz"),
+            max_features=args.max_features,
+        )
+        run_training_pipeline(
+            os.path.join(tmp, "processed.parquet"),
+            config["models"]["logistic_baseline"],
+            sparse_path=os.path.join(tmp, "sparse.npz"),
+            feature_names_path=config["artifacts"]["feature_names"],
+            featurizer_path=config["artifacts"]["featurizer"],
+            bundle_path=config["serving"]["bundle"],
+        )
+        os.chdir(ROOT)
+
+        joblib_bytes = sum(
+            os.path.getsize(p)
+            for p in [config["models"]["logistic_baseline"]]
+            + list(config["artifacts"].values())
+        )
+        bundle_bytes = sum(
+            os.path.getsize(os.path.join(config["serving"]["bundle"], name))
+            for name in os.listdir(config["serving"]["bundle"])
+        )
+
+        print(f"\n--- Cold start, {args.max_features:,} TF-IDF terms ---")
+        print(
+            f"{'':<10} {'files':>10} {'import':>9} {'load':>9} "
+            f"{'RSS':>10} {'by load':>9}"
+        )
+        for label, use_bundle, size in [
+            ("joblib", False, joblib_bytes),
+            ("bundle", True, bundle_bytes),
+        ]:
+            api_params = {
+                "loading": {"bundle": use_bundle},
+                "condition_cache": {"enabled": False},
+            }
+            runs = [cold_start(config, api_params) for _ in range(args.repeat)]
+            print(
+                f"{label:<10} {size / 1024:>8.0f}KB "
+                f"{min(r['import'] for r in runs) * 1000:>7.0f}ms "
+                f"{min(r['load'] for r in runs) * 1000:>7.1f}ms "
+                f"{np.median([r['rss_mb'] for r in runs]):>8.1f}MB "
+                f"{np.median([r['load_rss_mb'] for r in runs]):>7.1f}MB"
+            )
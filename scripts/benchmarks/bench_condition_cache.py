@@ -0,0 +1,76 @@
+# scripts/benchmarks/bench_condition_cache.py
+"""
+Benchmark: tfidf.transform vs the memoized ConditionVectorCache on a
+Zipf-distributed condition workload (a hot head plus a long tail).
+Uses the saved featurizer's TF-IDF (run `make prepare` first).
+"""
+
+import sys
+import os
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+
+from src.utils.config_loader import load_config  # noqa: E402
+from src.inference.cache import ConditionVectorCache  # noqa: E402
+from scripts.benchmarks.common import CONDITIONS, time_call, report  # noqa: E402
+
+N_DISTINCT = 5000
+N_REQUESTS = 20000
+ZIPF_EXPONENT = 1.2
+MODIFIERS = ["Recurrent", "Metastatic", "Advanced", "Stage IV", "Refractory", "Adult"]
+
+
+def zipf_workload(seed=42):
+    """Draws N_REQUESTS conditions from N_DISTINCT strings with Zipf popularity."""
+    rng = np.random.default_rng(seed)
+    distinct = list(CONDITIONS)
+    while len(distinct) < N_DISTINCT:
+        base = CONDITIONS[rng.integers(len(CONDITIONS))]
+        extra = MODIFIERS[rng.integers(len(MODIFIERS))]
+        distinct.append(f"{extra} {base}, {len(distinct)}")
+    ranks = rng.zipf(ZIPF_EXPONENT, size=N_REQUESTS * 2)
+    ranks = ranks[ranks <= N_DISTINCT][:N_REQUESTS] - 1
+    return [distinct[r] for r in ranks]
+
+
+if __name__ == "__main__":
+    config = load_config("paths.yaml")
+    featurizer_path = config["artifacts"]["featurizer"]
+    if not os.path.exists(featurizer_path):
+        print(f"CRITICAL: {featurizer_path} not found. Run `make prepare` first.")
+        sys.exit(1)
+    tfidf = joblib.load(featurizer_path).tfidf_
+    workload = zipf_workload()
+    print(
+        f"Workload: {len(workload)} requests, {len(set(workload))} distinct conditions"
+    )
+
+    print("\n--- One condition per call (online /predict traffic) ---")
+    baseline = time_call(lambda: [tfidf.transform([c]) for c in workload], 1)
+    report("tfidf.transform", len(workload), baseline)
+
+    cache = ConditionVectorCache(tfidf)
+    cached = time_call(lambda: [cache.transform([c]) for c in workload], 1)
+    report("ConditionVectorCache (cold start)", len(workload), cached)
+    warm = time_call(lambda: [cache.transform([c]) for c in workload])
+    report("ConditionVectorCache (warm)", len(workload), warm)
+
+    print("\n--- One call per 1000-condition batch ---")
+    batches = [workload[i : i + 1000] for i in range(0, len(workload), 1000)]
+    report(
+        "tfidf.transform",
+        len(workload),
+        time_call(lambda: [tfidf.transform(b) for b in batches]),
+    )
+    report(
+        "ConditionVectorCache (warm)",
+        len(workload),
+        time_call(lambda: [cache.transform(b) for b in batches]),
+    )
+
+    print(f"\nSpeedup (single, warm): {baseline / warm:.1f}x")
+    print(f"Cache stats: {cache.stats()}")
@@ -0,0 +1,91 @@
+# scripts/benchmarks/bench_feature_layout.py
+"""
+Benchmark: single-row featurization latency (p50/p99) of the fitted
+featurizer's generic DataFrame transform vs the precompiled FeatureLayout.
+Requires trained artifacts in models/ (run `make train` first).
+"""
+
+import sys
+import os
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import pandas as pd  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.api import app as api  # noqa: E402
+from src.api.schemas import TrialPredictionsRequest  # noqa: E402
+from scripts.benchmarks.common import (  # noqa: E402
+    synthetic_trials,
+    latency_percentiles,
+)
+
+N_REQUESTS = 2000
+
+
+def request_frame(request):
+    """A one-row DataFrame of the featurizer's input columns."""
+    return pd.DataFrame(
+        {
+            "phase": [request.phase],
+            "conditions": [request.condition],
+            "sponsor": [request.sponsor],
+            "enrollment": [request.enrollment],
+        }
+    )
+
+
+def print_row(label, p50, p99):
+    print(f"{label:<40} p50={p50:>9.1f} us   p99={p99:>9.1f} us")
+
+
+if __name__ == "__main__":
+    requests = [TrialPredictionsRequest(**t) for t in synthetic_trials(N_REQUESTS)]
+
+    with TestClient(api.app):
+        if not api.serving.ready:
+            print("CRITICAL: No model loaded. Run `make train` first.")
+            sys.exit(1)
+        layout = api.serving.feature_layout
+        model = api.serving.models["logistic_baseline"]
+
+        featurizer = layout.featurizer
+
+        def via_frame(r):
+            return pd.DataFrame(
+                featurizer.transform(request_frame(r)),
+                columns=featurizer.get_feature_names_out(),
+            )[layout.feature_names]
+
+        print("\n--- Featurization only ---")
+        print_row(
+            "featurizer.transform (DataFrame)",
+            *latency_percentiles(via_frame, requests),
+        )
+        print_row(
+            "FeatureLayout.transform_requests",
+            *latency_percentiles(lambda r: layout.transform_requests([r]), requests),
+        )
+
+        print("\n--- Featurization + predict_proba ---")
+        print_row(
+            "featurizer.transform (DataFrame)",
+            *latency_percentiles(lambda r: model.predict_proba(via_frame(r)), requests),
+        )
+        print_row(
+            "FeatureLayout",
+            *latency_percentiles(
+                lambda r: model.predict_proba(api.transform_batch([r])), requests
+            ),
+        )
+        if api.serving.scorer is not None:
+            print_row(
+                "FeatureLayout + fused engine",
+                *latency_percentiles(
+                    lambda r: api.serving.scorer.predict_proba(
+                        layout.transform_requests([r])
+                    ),
+                    requests,
+                ),
+            )
@@ -0,0 +1,67 @@
+# scripts/benchmarks/bench_featurizer.py
+"""
+Benchmark: ClinicalTrialFeaturizer transform throughput (rows/s) at batch
+sizes from a single API request up to offline-scoring chunks, dense and
+sparse output. The "vectors given" rows pass precomputed TF-IDF vectors,
+as the API does on condition-cache hits, to show the featurizer's own cost.
+The featurizer is fit on synthetic interim rows, so no artifacts are needed.
+"""
+
+import sys
+import os
+import argparse
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import pandas as pd  # noqa: E402
+
+from src.features.featurizer import ClinicalTrialFeaturizer  # noqa: E402
+from scripts.benchmarks.common import report, synthetic_trials, time_call  # noqa: E402
+
+N_FIT = 20000
+
+
+def interim_frame(n, seed=42):
+    trials = pd.DataFrame(synthetic_trials(n, seed=seed))
+    return trials.rename(columns={"condition": "conditions"})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1,10,100,1000,10000,100000")
+    parser.add_argument("--max-features", type=int, default=100)
+    args = parser.parse_args()
+
+    featurizer = ClinicalTrialFeaturizer(max_features=args.max_features).fit(
+        interim_frame(N_FIT)
+    )
+    print(f"Fitted on {N_FIT:,} rows: {len(featurizer.feature_names_out_)} columns")
+
+    for n in [int(s) for s in args.sizes.split(",")]:
+        df = interim_frame(n, seed=7)
+        columns = (
+            df["phase"].tolist(),
+            df["conditions"].tolist(),
+            df["sponsor"].tolist(),
+            df["enrollment"].to_numpy(),
+        )
+        vectors = featurizer.vectorize_conditions(columns[1])
+        # small batches are repeated up to ~2k rows so timings are not noise
+        repeat = max(1, 2000 // n)
+        print(f"\n--- batch of {n:,} ---")
+        for sparse_output in [False, True]:
+            kind = "sparse" if sparse_output else "dense"
+            for label, given in [("", None), (", vectors given", vectors)]:
+                seconds = time_call(
+                    lambda: [
+                        featurizer.transform_columns(
+                            *columns,
+                            condition_vectors=given,
+                            sparse_output=sparse_output,
+                        )
+                        for _ in range(repeat)
+                    ],
+                    repeat=1 if n * repeat > 10000 else 3,
+                )
+                report(f"transform ({kind}{label})", n * repeat, seconds)
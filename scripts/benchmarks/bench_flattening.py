@@ -0,0 +1,108 @@
+# scripts/benchmarks/bench_flattening.py
+"""
+Benchmark: reference flatten_study (+ DataFrame of row dicts) vs the
+compiled columnar flattener, in memory and end to end from an NDJSON store
+(JSON decoding included), serially and across a process pool.
+Reports studies/sec at 10k, 100k and 1M synthetic studies by default.
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import io
+import tempfile
+from itertools import islice
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import pandas as pd  # noqa: E402
+
+from src.utils.columnar import flatten_frame, iter_flat_frames  # noqa: E402
+from src.utils.flattening import flatten_study  # noqa: E402
+from src.utils.raw_io import iter_raw_studies, write_store  # noqa: E402
+from tests.stub_ctgov import make_study  # noqa: E402
+from scripts.benchmarks.common import CONDITIONS, SPONSORS, time_call  # noqa: E402
+
+CHUNK_SIZE = 10000
+IN_MEMORY_MAX = 100000  # larger sizes are only run end to end from disk
+
+
+def synthetic_studies(n):
+    for i in range(n):
+        yield make_study(
+            f"NCT{i:08d}",
+            condition=CONDITIONS[i % len(CONDITIONS)],
+            sponsor=SPONSORS[i % len(SPONSORS)],
+            phase=["PHASE1", "PHASE2", "PHASE3"][i % 3],
+            enrollment=i % 5000,
+        )
+
+
+def reference_frames(path):
+    studies = iter_raw_studies(path)
+    while True:
+        records = [flatten_study(s) for s in islice(studies, CHUNK_SIZE)]
+        if not records:
+            return
+        yield pd.DataFrame(records)
+
+
+def drain(frames):
+    return sum(len(frame) for frame in frames)
+
+
+def rate_line(label, n, seconds):
+    print(f"{label:<44} {seconds:>9.2f} s  {n / seconds:>12,.0f} studies/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    print(f"(process pool: {args.workers} workers on {os.cpu_count()} cores)")
+
+    for n in [int(size) for size in args.sizes.split(",")]:
+        print(f"\n--- {n:,} studies ---")
+        repeat = 3 if n <= IN_MEMORY_MAX else 1
+        if n <= IN_MEMORY_MAX:
+            studies = list(synthetic_studies(n))
+            rate_line(
+                "in memory: flatten_study + DataFrame",
+                n,
+                time_call(
+                    lambda: pd.DataFrame([flatten_study(s) for s in studies]),
+                    repeat,
+                ),
+            )
+            rate_line(
+                "in memory: columnar",
+                n,
+                time_call(lambda: flatten_frame(studies), repeat),
+            )
+            del studies
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "raw.ndjson")
+            with contextlib.redirect_stdout(io.StringIO()):
+                write_store(path, synthetic_studies(n))
+            rate_line(
+                "ndjson: parse + flatten_study, chunked",
+                n,
+                time_call(lambda: drain(reference_frames(path)), repeat),
+            )
+            rate_line(
+                "ndjson: parse + columnar, 1 process",
+                n,
+                time_call(lambda: drain(iter_flat_frames(path, CHUNK_SIZE, 1)), repeat),
+            )
+            rate_line(
+                f"ndjson: parse + columnar, {args.workers} workers",
+                n,
+                time_call(
+                    lambda: drain(iter_flat_frames(path, CHUNK_SIZE, args.workers)),
+                    repeat,
+                ),
+            )
@@ -0,0 +1,55 @@
+# scripts/benchmarks/bench_incremental_training.py
+"""
+Benchmark: in-memory training (run_training_pipeline) vs chunked
+partial_fit training (run_incremental_training_pipeline) on a synthetic
+processed dataset. Reports time, peak traced memory and test ROC-AUC;
+the chunked runs' peak should follow the chunk size, not the row count.
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.pipelines.incremental_training import (  # noqa: E402
+    run_incremental_training_pipeline,
+)
+from src.pipelines.model_training import run_training_pipeline  # noqa: E402
+from src.utils.tables import processed_schema, write_table  # noqa: E402
+from scripts.benchmarks.bench_sparse_features import measure  # noqa: E402
+from scripts.benchmarks.bench_storage import processed_frame  # noqa: E402
+
+N_ROWS = 200000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=N_ROWS)
+    parser.add_argument("--chunk-sizes", default="10000,50000")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MLFLOW_TRACKING_URI"] = f"sqlite:///{tmp}/mlflow.db"
+        path = os.path.join(tmp, "processed.parquet")
+        df = processed_frame(args.rows)
+        write_table(df, path, schema=processed_schema(df.columns))
+        print(f"\n--- Training on {args.rows:,} rows x {df.shape[1] - 1} features ---")
+        del df
+
+        print(f"{'':<22} {'time':>10} {'peak':>12} {'ROC-AUC':>9}")
+        model_path = os.path.join(tmp, "model.pkl")
+        _, seconds, peak = measure(lambda: run_training_pipeline(path, model_path))
+        print(f"{'in memory':<22} {seconds:>9.1f}s {peak:>10.1f}MB {'':>9}")
+        for chunk_size in [int(s) for s in args.chunk_sizes.split(",")]:
+            metrics, seconds, peak = measure(
+                lambda: run_incremental_training_pipeline(
+                    path, model_path, chunk_size=chunk_size
+                )
+            )
+            print(
+                f"{f'chunks of {chunk_size:,}':<22} {seconds:>9.1f}s "
+                f"{peak:>10.1f}MB {metrics['roc_auc']:>9.4f}"
+            )
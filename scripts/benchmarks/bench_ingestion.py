@@ -0,0 +1,113 @@
+# scripts/benchmarks/bench_ingestion.py
+"""
+Benchmark: serial vs concurrent multi-condition ingestion, and one broad
+condition walked serially vs as parallel date windows, against the local
+stub of the ClinicalTrials.gov v2 API (tests/stub_ctgov.py), with a fixed
+per-request latency standing in for the network.
+"""
+
+import sys
+import os
+import contextlib
+import io
+import random
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.utils.ingestion import (  # noqa: E402
+    fetch_conditions,
+    fetch_partitioned,
+    fetch_trials,
+)
+from tests.stub_ctgov import StubCTGov, make_study  # noqa: E402
+from scripts.benchmarks.common import CONDITIONS, time_call, report  # noqa: E402
+
+STUDIES_PER_CONDITION = 500
+PAGE_SIZE = 100
+LATENCY_SECONDS = 0.05
+BROAD_STUDIES = 10000
+
+
+def corpus():
+    return {
+        condition: [
+            make_study(f"NCT{c:02d}{i:06d}", condition=condition)
+            for i in range(STUDIES_PER_CONDITION)
+        ]
+        for c, condition in enumerate(CONDITIONS)
+    }
+
+
+def broad_corpus(seed=42):
+    """One condition with BROAD_STUDIES studies spread over 30 years."""
+    rng = random.Random(seed)
+    return {
+        "cancer": [
+            make_study(
+                f"NCT{i:08d}",
+                start_date=f"{rng.randint(1995, 2024)}-{rng.randint(1, 12):02d}"
+                f"-{rng.randint(1, 28):02d}",
+            )
+            for i in range(BROAD_STUDIES)
+        ]
+    }
+
+
+def bench_partitioned():
+    with StubCTGov(broad_corpus(), latency=LATENCY_SECONDS) as stub:
+        print(f"\n--- One condition, {BROAD_STUDIES} studies ---")
+        runs = [
+            (
+                "serial pageToken walk",
+                lambda: fetch_trials(stub.url, "cancer", PAGE_SIZE, max_pages=1000),
+            )
+        ] + [
+            (
+                f"fetch_partitioned, max_concurrency={c}",
+                lambda c=c: fetch_partitioned(
+                    stub.url,
+                    "cancer",
+                    PAGE_SIZE,
+                    start="1995-01-01",
+                    end="2024-12-31",
+                    max_window_studies=1000,
+                    max_concurrency=c,
+                ),
+            )
+            for c in (4, 8, 16)
+        ]
+        for label, fn in runs:
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = time_call(fn, repeat=1)
+            report(label, BROAD_STUDIES, seconds)
+
+
+if __name__ == "__main__":
+    studies = corpus()
+    n = len(studies) * STUDIES_PER_CONDITION
+    with StubCTGov(studies, latency=LATENCY_SECONDS) as stub:
+
+        def serial():
+            for condition in studies:
+                fetch_trials(stub.url, condition, PAGE_SIZE, max_pages=100)
+
+        def concurrent(max_concurrency):
+            return lambda: fetch_conditions(
+                stub.url, list(studies), PAGE_SIZE, 100, max_concurrency
+            )
+
+        print(
+            f"\n--- {len(studies)} conditions x {STUDIES_PER_CONDITION} studies, "
+            f"{LATENCY_SECONDS * 1000:.0f} ms per page ---"
+        )
+        runs = [("serial fetch_trials (new connection/page)", serial)] + [
+            (f"fetch_conditions, max_concurrency={c}", concurrent(c))
+            for c in (1, 4, 8, 16)
+        ]
+        for label, fn in runs:
+            with contextlib.redirect_stdout(io.StringIO()):
+                seconds = time_call(fn, repeat=1)
+            report(label, n, seconds)
+
+    bench_partitioned()
@@ -0,0 +1,65 @@
+# scripts/benchmarks/bench_metrics.py
+"""
+Benchmark: overhead of the /metrics instrumentation on the hot path,
+as a share of /predict latency. Requires trained artifacts in models/.
+"""
+
+import sys
+import os
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.api import app as api  # noqa: E402
+from src.api.metrics import Counter, Histogram, StageTimer  # noqa: E402
+from scripts.benchmarks.common import (  # noqa: E402
+    synthetic_trials,
+    latency_percentiles,
+    time_call,
+)
+
+N_OPS = 100_000
+N_REQUESTS = 1000
+# per /predict miss: 1 request histogram + 5 stages, 2-3 counter increments
+OBSERVES_PER_REQUEST = 6
+INCS_PER_REQUEST = 3
+
+
+if __name__ == "__main__":
+    hist = Histogram("bench_seconds", "bench", labels=("endpoint", "stage"))
+    counter = Counter("bench_total", "bench", labels=("endpoint", "status"))
+    timer = StageTimer(hist, "/predict")
+
+    observe = time_call(
+        lambda: [hist.observe(0.001, "/predict", "score") for _ in range(N_OPS)]
+    )
+    inc = time_call(lambda: [counter.inc("/predict", "200") for _ in range(N_OPS)])
+    mark = time_call(lambda: [timer.mark("score") for _ in range(N_OPS)])
+    per_observe_us = observe / N_OPS * 1e6
+    per_inc_us = inc / N_OPS * 1e6
+    per_request_us = (
+        OBSERVES_PER_REQUEST * mark / N_OPS * 1e6 + INCS_PER_REQUEST * per_inc_us
+    )
+
+    print("--- Primitive cost ---")
+    print(f"Histogram.observe      {per_observe_us:8.3f} us")
+    print(f"StageTimer.mark        {mark / N_OPS * 1e6:8.3f} us")
+    print(f"Counter.inc            {per_inc_us:8.3f} us")
+    print(f"Per /predict request   {per_request_us:8.3f} us (estimated)")
+
+    trials = synthetic_trials(N_REQUESTS)
+    with TestClient(api.app) as client:
+        if not api.serving.ready:
+            print("CRITICAL: No model loaded. Run `make train` first.")
+            sys.exit(1)
+
+        def uncached(t):
+            api.serving.prediction_cache.clear()
+            client.post("/predict", json=t)
+
+        p50, p99 = latency_percentiles(uncached, trials)
+        print("\n--- /predict (cache cleared per call) ---")
+        print(f"p50={p50:.1f} us  p99={p99:.1f} us")
+        print(f"Instrumentation share of p50: {per_request_us / p50:.2%}")
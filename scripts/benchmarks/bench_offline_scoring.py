@@ -0,0 +1,61 @@
+# scripts/benchmarks/bench_offline_scoring.py
+"""
+Benchmark: offline scoring throughput (rows/s) as the process pool grows.
+Requires trained artifacts in models/ (run `make train` first).
+"""
+
+import sys
+import os
+import tempfile
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import pandas as pd  # noqa: E402
+
+from src.utils.config_loader import load_config  # noqa: E402
+from src.pipelines.batch_scoring import run_scoring_pipeline  # noqa: E402
+from scripts.benchmarks.common import synthetic_trials, report  # noqa: E402
+
+N_TRIALS = 200000
+CHUNK_SIZE = 5000
+
+
+def worker_counts():
+    """1, 2, 4, ... up to the number of cores."""
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+if __name__ == "__main__":
+    paths = load_config("paths.yaml")
+    api_params = load_config("params.yaml")["api"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "interim.csv")
+        trials = pd.DataFrame(synthetic_trials(N_TRIALS)).rename(
+            columns={"condition": "conditions"}
+        )
+        trials.to_csv(input_path, index=False)
+
+        print(f"\n--- Offline scoring, {CHUNK_SIZE} rows per chunk ---")
+        results = []
+        for workers in worker_counts():
+            stats = run_scoring_pipeline(
+                input_path,
+                os.path.join(tmp, f"scored_{workers}.csv"),
+                paths,
+                api_params,
+                chunk_size=CHUNK_SIZE,
+                workers=workers,
+            )
+            results.append(stats)
+
+        print()
+        for stats in results:
+            report(f"{stats['workers']} worker(s)", stats["rows"], stats["seconds"])
@@ -0,0 +1,94 @@
+# scripts/benchmarks/bench_projection.py
+"""
+Benchmark: full vs field-projected ingestion, replaying the recorded
+full-document fixtures (tests/fixtures/ctgov_full_studies.json.gz) through
+the local API stub. Reports bytes/study on the wire (JSON and as gzip-sent),
+on disk, and the time to parse the stored raw file back. The fixtures are
+cycled, so gzip ratios here are better than on real, more varied pages.
+"""
+
+import sys
+import os
+import contextlib
+import copy
+import gzip
+import io
+import json
+import tempfile
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.utils.flattening import STUDY_FIELDS  # noqa: E402
+from src.utils.ingestion import fetch_trials, save_trials  # noqa: E402
+from src.utils.raw_io import RawStudyWriter, iter_raw_studies  # noqa: E402
+from tests.stub_ctgov import StubCTGov  # noqa: E402
+from scripts.benchmarks.common import time_call  # noqa: E402
+
+FIXTURE = os.path.join("tests", "fixtures", "ctgov_full_studies.json.gz")
+N_STUDIES = 5000
+PAGE_SIZE = 100
+
+
+def replayed_corpus():
+    """N_STUDIES copies of the fixture documents, each with its own nctId."""
+    with gzip.open(FIXTURE, "rt") as f:
+        fixtures = json.load(f)["studies"]
+    corpus = []
+    for i in range(N_STUDIES):
+        study = copy.deepcopy(fixtures[i % len(fixtures)])
+        study["protocolSection"]["identificationModule"]["nctId"] = f"NCT{i:08d}"
+        corpus.append(study)
+    return corpus
+
+
+def measure(stub, label, fields, raw_path, write):
+    before, before_json = stub.bytes_sent, stub.bytes_json
+    with contextlib.redirect_stdout(io.StringIO()):
+        studies = fetch_trials(stub.url, "cancer", PAGE_SIZE, 1000, fields=fields)
+        write(studies, raw_path)
+    wire = stub.bytes_sent - before
+    wire_json = stub.bytes_json - before_json
+    parse = time_call(lambda: sum(1 for _ in iter_raw_studies(raw_path)))
+    print(
+        f"{label:<34} {wire_json / N_STUDIES:>10,.0f} B  "
+        f"{wire / N_STUDIES:>10,.0f} B  "
+        f"{os.path.getsize(raw_path) / N_STUDIES:>10,.0f} B  "
+        f"{parse / N_STUDIES * 1e6:>10.1f} us"
+    )
+
+
+def write_ndjson(studies, path):
+    with RawStudyWriter(path) as writer:
+        writer.write_page(studies)
+
+
+if __name__ == "__main__":
+    corpus = replayed_corpus()
+    with StubCTGov({"cancer": corpus}) as stub, tempfile.TemporaryDirectory() as tmp:
+        print(f"\n--- {N_STUDIES} studies ---")
+        print(
+            f"{'':<34} {'json/study':>12} {'gzip/study':>12} "
+            f"{'disk/study':>12} {'parse/study':>13}"
+        )
+        measure(
+            stub,
+            "full documents, indented .json",
+            None,
+            os.path.join(tmp, "full.json"),
+            lambda s, p: save_trials(s, p),
+        )
+        measure(
+            stub,
+            "projected, indented .json",
+            STUDY_FIELDS,
+            os.path.join(tmp, "projected.json"),
+            lambda s, p: save_trials(s, p),
+        )
+        measure(
+            stub,
+            "projected, .ndjson.gz",
+            STUDY_FIELDS,
+            os.path.join(tmp, "projected.ndjson.gz"),
+            write_ndjson,
+        )
@@ -0,0 +1,73 @@
+# scripts/benchmarks/bench_search.py
+"""
+Benchmark: hyperparameter search wall-clock time (and speedup over one
+worker) as the process pool grows. Runs on synthetic interim rows and
+logs to a throwaway MLflow store, so models/ and mlruns/ are untouched.
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import io
+import tempfile
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.pipelines.model_search import (  # noqa: E402
+    candidate_grid,
+    run_search_pipeline,
+)
+from scripts.benchmarks.common import synthetic_trials  # noqa: E402
+from scripts.benchmarks.bench_offline_scoring import worker_counts  # noqa: E402
+
+N_TRIALS = 20000
+GRID = {
+    "top_sponsors": [20, 50],
+    "max_features": [100, 300],
+    "C": [0.1, 1.0, 10.0],
+    "penalty": ["l2", "l1"],
+    "solver": ["lbfgs", "liblinear"],
+}
+
+
+def interim_frame(n, seed=42):
+    """Synthetic interim rows with a COMPLETED/TERMINATED status."""
+    rng = np.random.default_rng(seed)
+    trials = pd.DataFrame(synthetic_trials(n, seed=seed)).rename(
+        columns={"condition": "conditions"}
+    )
+    trials["status"] = rng.choice(["COMPLETED", "TERMINATED"], n, p=[0.8, 0.2])
+    return trials
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=N_TRIALS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MLFLOW_TRACKING_URI"] = f"sqlite:///{tmp}/mlflow.db"
+        input_path = os.path.join(tmp, "interim.csv")
+        interim_frame(args.rows).to_csv(input_path, index=False)
+
+        n_candidates = len(candidate_grid(GRID))
+        print(f"\n--- Search: {n_candidates} candidates, {args.rows:,} rows ---")
+        print(f"{'workers':<10} {'seconds':>10} {'speedup':>10}")
+        baseline = None
+        for workers in worker_counts():
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_search_pipeline(
+                    input_path,
+                    os.path.join(tmp, f"model_{workers}.pkl"),
+                    os.path.join(tmp, f"featurizer_{workers}.joblib"),
+                    grid=GRID,
+                    workers=workers,
+                )
+            seconds = result["seconds"]
+            baseline = baseline or seconds
+            print(f"{workers:<10} {seconds:>9.1f}s {baseline / seconds:>9.2f}x")
@@ -0,0 +1,128 @@
+# scripts/benchmarks/bench_sparse_features.py
+"""
+Benchmark: dense vs sparse condition/sponsor features at 100, 1k and 10k
+TF-IDF terms. Reports peak traced memory and time for building the
+features, and for fitting the training pipeline on them. Dense runs above
+--dense-max-features are skipped (the dense matrix size is printed instead).
+"""
+
+import sys
+import os
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from scipy import sparse  # noqa: E402
+
+from src.features.build_features import (  # noqa: E402
+    build_conditions_feature,
+    build_conditions_matrix,
+    build_sponsor_features,
+    build_sponsor_matrix,
+)
+from src.pipelines.model_training import build_model_pipeline  # noqa: E402
+from scripts.benchmarks.common import SPONSORS  # noqa: E402
+
+N_ROWS = 20000
+
+
+def prepared_frame(n, seed=42):
+    """Rows shaped like preparation's input after cleaning, with varied conditions."""
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"term{i}" for i in range(4000)])
+    # Zipf-like term popularity, 2-4 words per condition string
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+    conditions = [
+        " ".join(rng.choice(vocabulary, rng.integers(2, 5), p=weights))
+        for _ in range(n)
+    ]
+    return pd.DataFrame(
+        {
+            "is_phase2": rng.integers(0, 2, n),
+            "enrollment_log": np.log1p(rng.integers(0, 5000, n)),
+            "sponsor": rng.choice(SPONSORS, n),
+            "conditions": conditions,
+            "target_outcome": rng.integers(0, 2, n),
+        }
+    )
+
+
+def measure(fn):
+    """(result, seconds, peak traced MB) for fn()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def dense_features(df, max_features):
+    df = build_sponsor_features(df.copy(), top_n=20)
+    df = build_conditions_feature(df, max_features=max_features)
+    y = df.pop("target_outcome")
+    return df.astype(float), y
+
+
+def sparse_features(df, max_features):
+    rest, sponsors, sponsor_names = build_sponsor_matrix(df.copy(), top_n=20)
+    rest, conditions, condition_names = build_conditions_matrix(
+        rest, max_features=max_features
+    )
+    y = rest.pop("target_outcome")
+    X = sparse.hstack(
+        [sparse.csr_matrix(rest.astype(float).to_numpy()), sponsors, conditions],
+        format="csr",
+    )
+    return (X, list(rest.columns) + sponsor_names + condition_names), y
+
+
+def line(label, build_s, build_mb, fit_s, fit_mb, n_features):
+    print(
+        f"{label:<8} {n_features:>9,} {build_s:>9.2f}s {build_mb:>10.1f}MB "
+        f"{fit_s:>9.2f}s {fit_mb:>10.1f}MB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--rows", type=int, default=N_ROWS)
+    parser.add_argument("--dense-max-features", type=int, default=1000)
+    args = parser.parse_args()
+
+    df = prepared_frame(args.rows)
+    for max_features in [int(s) for s in args.sizes.split(",")]:
+        print(f"\n--- max_features={max_features:,}, {args.rows:,} rows ---")
+        print(
+            f"{'':<8} {'columns':>9} {'build':>10} {'build peak':>12} "
+            f"{'fit':>10} {'fit peak':>12}"
+        )
+        if max_features <= args.dense_max_features:
+            (X, y), build_s, build_mb = measure(
+                lambda: dense_features(df, max_features)
+            )
+            model = build_model_pipeline(list(X.columns))
+            _, fit_s, fit_mb = measure(lambda: model.fit(X, y))
+            line("dense", build_s, build_mb, fit_s, fit_mb, X.shape[1])
+            del X
+        else:
+            size = args.rows * (max_features + 25) * 8 / 1e6
+            print(f"dense    skipped (the float64 matrix alone is ~{size:,.0f}MB)")
+
+        ((X, names), y), build_s, build_mb = measure(
+            lambda: sparse_features(df, max_features)
+        )
+        model = build_model_pipeline(names, sparse_input=True)
+        _, fit_s, fit_mb = measure(lambda: model.fit(X, y))
+        line("sparse", build_s, build_mb, fit_s, fit_mb, X.shape[1])
@@ -0,0 +1,105 @@
+# scripts/benchmarks/bench_storage.py
+"""
+Benchmark: interim and processed datasets stored as CSV vs Parquet vs
+Arrow IPC (feather), through src/utils/tables.py. Reports file size,
+write time, full load time and a pruned load (the columns one consumer
+reads) on synthetic data shaped like the real stages.
+"""
+
+import sys
+import os
+import tempfile
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.utils.tables import (  # noqa: E402
+    INTERIM_SCHEMA,
+    processed_schema,
+    read_table,
+    write_table,
+)
+from scripts.benchmarks.common import (  # noqa: E402
+    CONDITIONS,
+    SPONSORS,
+    time_call,
+)
+
+N_ROWS = 200000
+N_TFIDF = 100
+
+
+def interim_frame(n, seed=42):
+    rng = np.random.default_rng(seed)
+    enrollment = rng.integers(0, 5000, n).astype(float)
+    enrollment[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame(
+        {
+            "nct_id": [f"NCT{i:08d}" for i in range(n)],
+            "phase": rng.choice(["PHASE1", "PHASE2", "PHASE3", "PHASE1, PHASE2"], n),
+            "status": rng.choice(["COMPLETED", "TERMINATED", "RECRUITING"], n),
+            "enrollment": enrollment,
+            "conditions": rng.choice(CONDITIONS, n),
+            "sponsor": rng.choice(SPONSORS, n),
+        }
+    )
+
+
+def processed_frame(n, seed=42):
+    """Phase flags, log enrollment, sponsor dummies and mostly-zero TF-IDF."""
+    rng = np.random.default_rng(seed)
+    columns = {
+        f"is_{p}": rng.integers(0, 2, n)
+        for p in ["phase1", "phase2", "phase3", "phase4", "phase_not_specified"]
+    }
+    columns["enrollment_log"] = np.log1p(rng.integers(0, 5000, n))
+    columns["target_outcome"] = rng.integers(0, 2, n)
+    sponsor = rng.integers(0, 21, n)
+    for i in range(21):
+        columns[f"sponsor_{i}"] = sponsor == i
+    tfidf = np.zeros((n, N_TFIDF))
+    for _ in range(3):  # a few non-zero weights per row
+        tfidf[np.arange(n), rng.integers(0, N_TFIDF, n)] = rng.random(n)
+    for j in range(N_TFIDF):
+        columns[f"cond_term{j}"] = tfidf[:, j]
+    return pd.DataFrame(columns)
+
+
+def run(label, df, schema, pruned_columns, tmp):
+    print(f"\n--- {label}: {len(df):,} rows x {df.shape[1]} columns ---")
+    print(
+        f"{'':<22} {'size':>10} {'write':>10} {'load':>10} "
+        f"{'load ' + str(len(pruned_columns)) + ' cols':>12}"
+    )
+    for name in ["data.csv", "data.parquet", "data.feather"]:
+        path = os.path.join(tmp, name)
+        write = time_call(lambda: write_table(df, path, schema=schema), repeat=1)
+        load = time_call(lambda: read_table(path))
+        pruned = time_call(lambda: read_table(path, columns=pruned_columns))
+        print(
+            f"{name:<22} {os.path.getsize(path) / 1e6:>8.1f}MB "
+            f"{write:>9.2f}s {load:>9.3f}s {pruned:>11.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        interim = interim_frame(N_ROWS)
+        run(
+            "interim",
+            interim,
+            INTERIM_SCHEMA,
+            ["phase", "status", "enrollment", "conditions", "sponsor"],
+            tmp,
+        )
+        processed = processed_frame(N_ROWS)
+        run(
+            "processed",
+            processed,
+            processed_schema(processed.columns),
+            ["enrollment_log", "target_outcome"],
+            tmp,
+        )
@@ -0,0 +1,81 @@
+# scripts/benchmarks/common.py
+"""
+Shared helpers for the benchmark entrypoints: synthetic workloads
+and simple wall-clock reporting.
+"""
+
+import random
+import time
+
+PHASES = [
+    "Phase 1",
+    "Phase 2",
+    "Phase 3",
+    "Phase 4",
+    "Phase 1/Phase 2",
+    "Not Specified",
+]
+CONDITIONS = [
+    "Breast Cancer",
+    "Non-small cell lung cancer",
+    "Prostate Cancer",
+    "Leukemia",
+    "Lymphoma",
+    "Melanoma",
+    "Colorectal Cancer",
+    "Pancreatic Cancer",
+    "Ovarian Cancer",
+    "Glioblastoma",
+    "Multiple Myeloma",
+    "Type 2 Diabetes",
+    "Heart Failure",
+    "Alzheimer Disease",
+    "Major Depressive Disorder",
+]
+SPONSORS = ["Pfizer", "Novartis", "AstraZeneca", "Roche", "Amgen", "Sanofi"] + [
+    f"Sponsor {i}" for i in range(50)
+]
+
+
+def synthetic_trials(n, seed=42):
+    """Generates n request payloads shaped like TrialPredictionsRequest."""
+    rng = random.Random(seed)
+    return [
+        {
+            "nct_id": f"NCT{i:08d}",
+            "phase": rng.choice(PHASES),
+            "condition": rng.choice(CONDITIONS),
+            "sponsor": rng.choice(SPONSORS),
+            "enrollment": rng.randint(0, 5000),
+        }
+        for i in range(n)
+    ]
+
+
+def time_call(fn, repeat=3):
+    """Returns the best wall-clock time (seconds) over `repeat` runs of fn()."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, n, seconds):
+    """Prints a throughput line for n items processed in `seconds`."""
+    rate = n / seconds if seconds else float("inf")
+    print(f"{label:<40} {n:>9} rows  {seconds * 1000:>10.1f} ms  {rate:>12,.0f} rows/s")
+
+
+def latency_percentiles(fn, inputs):
+    """Times fn(x) for each input; returns (p50, p99) in microseconds."""
+    samples = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    p50 = samples[len(samples) // 2]
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return p50, p99
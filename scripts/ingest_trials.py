@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from src.utils.config_loader import load_config  # noqa: E402
 from src.pipelines.data_ingestion import run_ingestion_pipeline  # noqa: E402
+from src.utils.flattening import STUDY_FIELDS  # noqa: E402
 
 if __name__ == "__main__":
     paths_cfg = load_config("paths.yaml")
@@ -22,4 +23,19 @@ if __name__ == "__main__":
         condition=params_cfg["ingestion"]["condition"],
         page_size=params_cfg["ingestion"]["page_size"],
         max_pages=params_cfg["ingestion"]["max_pages"],
+        conditions=params_cfg["ingestion"].get("conditions"),
+        max_concurrency=params_cfg["ingestion"].get("max_concurrency", 4),
+        partition=params_cfg["ingestion"].get("partition"),
+        checkpoint_dir=(
+            paths_cfg["data"]["ingest_checkpoint"]
+            if params_cfg["ingestion"].get("checkpoint", True)
+            else None
+        ),
+        state_path=paths_cfg["data"]["ingest_state"],
+        delta=params_cfg["ingestion"].get("delta", False),
+        fields=(
+            STUDY_FIELDS
+            if params_cfg["ingestion"].get("project_fields", True)
+            else None
+        ),
     )
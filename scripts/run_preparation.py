@@ -3,6 +3,7 @@
 """
 Entrypoint to clean and featurize clinical trial data.
 """
+
 import sys
 import os
 
@@ -14,8 +15,17 @@ from src.pipelines.data_preparation import run_preparation_pipeline  # noqa: E40
 
 if __name__ == "__main__":
     config = load_config("paths.yaml")
+    features = load_config("params.yaml").get("features", {})
 
     input_file = config["data"]["interim"]
     output_file = config["data"]["processed"]
 
-    run_preparation_pipeline(input_file, output_file)
+    run_preparation_pipeline(
+        input_file,
+        output_file,
+        sparse_path=(
+            config["data"]["processed_sparse"] if features.get("sparse") else None
+        ),
+        max_features=features.get("max_features", 100),
+        top_sponsors=features.get("top_sponsors", 20),
+    )
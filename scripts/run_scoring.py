@@ -0,0 +1,43 @@
+# scripts/run_scoring.py
+"""
+Entry point to score a dataset offline with the trained model.
+Usage: python -m scripts.run_scoring [--input PATH] [--output PATH]
+       [--workers N] [--chunk-size N]
+"""
+
+import argparse
+import sys
+import os
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.config_loader import load_config  # noqa: E402
+from src.pipelines.batch_scoring import run_scoring_pipeline  # noqa: E402
+
+if __name__ == "__main__":
+    config = load_config("paths.yaml")
+    params = load_config("params.yaml")
+    scoring = params.get("scoring", {})
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--input",
+        default=config["data"]["interim"],
+        help="interim dataset (CSV/Parquet) or raw ClinicalTrials.gov JSON",
+    )
+    parser.add_argument("--output", default=config["data"]["predictions"])
+    parser.add_argument("--workers", type=int, default=scoring.get("workers"))
+    parser.add_argument(
+        "--chunk-size", type=int, default=scoring.get("chunk_size", 5000)
+    )
+    args = parser.parse_args()
+
+    run_scoring_pipeline(
+        args.input,
+        args.output,
+        paths_config=config,
+        api_params=params["api"],
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+    )
@@ -0,0 +1,35 @@
+# scripts/run_search.py
+
+"""
+Entrypoint for the parallel hyperparameter search (search.grid in
+config/params.yaml). Starts from the interim dataset and writes the best
+model, its featurizer and the winning parameters to the paths.yaml search
+paths, leaving the make train outputs untouched.
+"""
+
+import sys
+import os
+
+# Add project root to python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.config_loader import load_config  # noqa: E402
+from src.pipelines.model_search import run_search_pipeline  # noqa: E402
+
+if __name__ == "__main__":
+    config = load_config("paths.yaml")
+    params = load_config("params.yaml")
+    search = params.get("search", {})
+    outputs = config["search"]
+
+    run_search_pipeline(
+        config["data"]["interim"],
+        outputs["model"],
+        outputs["featurizer"],
+        feature_names_path=outputs["feature_names"],
+        bundle_path=outputs.get("bundle"),
+        results_path=outputs.get("results"),
+        grid=search.get("grid"),
+        workers=search.get("workers"),
+        sparse_output=params.get("features", {}).get("sparse", False),
+    )
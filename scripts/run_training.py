@@ -8,10 +8,34 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from src.utils.config_loader import load_config  # noqa: E402
 from src.pipelines.model_training import run_training_pipeline  # noqa: E402
+from src.pipelines.incremental_training import (  # noqa: E402
+    run_incremental_training_pipeline,
+)
 
 if __name__ == "__main__":
     config = load_config("paths.yaml")
+    params = load_config("params.yaml")
+    features = params.get("features", {})
+    training = params.get("training", {})
     input_file = config["data"]["processed"]
     model_file = config["models"]["logistic_baseline"]  # output model path
 
-    run_training_pipeline(input_file, model_file)
+    kwargs = dict(
+        sparse_path=(
+            config["data"]["processed_sparse"] if features.get("sparse") else None
+        ),
+        feature_names_path=config["artifacts"]["feature_names"],
+        featurizer_path=config["artifacts"]["featurizer"],
+        bundle_path=config.get("serving", {}).get("bundle"),
+    )
+    if training.get("streaming"):
+        run_incremental_training_pipeline(
+            input_file,
+            model_file,
+            chunk_size=training.get("chunk_size", 100000),
+            epochs=training.get("epochs", 5),
+            alpha=training.get("alpha", 0.0001),
+            **kwargs,
+        )
+    else:
+        run_training_pipeline(input_file, model_file, **kwargs)
@@ -14,8 +14,15 @@ from src.pipelines.data_transformation import run_transformation_pipeline  # noq
 
 if __name__ == "__main__":
     config = load_config("paths.yaml")
+    params = load_config("params.yaml").get("transformation", {})
 
     input_file = config["data"]["raw"]
     output_file = config["data"]["interim"]
 
-    run_transformation_pipeline(input_file, output_file)
+    run_transformation_pipeline(
+        input_file,
+        output_file,
+        streaming=params.get("streaming", False),
+        chunk_size=params.get("chunk_size", 10000),
+        workers=params.get("workers", 1),
+    )
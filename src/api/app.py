@@ -1,71 +1,130 @@
 # src/api/app.py
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from contextlib import asynccontextmanager
-from fastapi.responses import RedirectResponse
-import numpy as np
-import joblib
+from fastapi.responses import PlainTextResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import hmac
 import pandas as pd
 import os
 import sys
+import threading
+import time
 
 # Add project root to python path so we can import src.utils
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from src.utils.config_loader import load_config  # noqa: E402
+from src.inference.bundle import MANIFEST  # noqa: E402
+from src.inference.serving import (  # noqa: E402
+    ServingState,
+    ModelDirWatcher,
+    load_serving_state,
+)
+from src.api.metrics import (  # noqa: E402
+    MetricsMiddleware,
+    PREDICTIONS,
+    STAGE_LATENCY,
+    NULL_TIMER,
+    STREAM_MALFORMED_LINES,
+    StageTimer,
+    render_metrics,
+)
+from src.api.streaming import (  # noqa: E402
+    NDJSONStreamingResponse,
+    iter_ndjson_lines,
+    ndjson,
+    parse_trial_line,
+)
 from src.api.schemas import (  # noqa: E402
     TrialPredictionsRequest,
     TrialPredictionsResponse,
+    TrialBatchPredictionsRequest,
+    TrialBatchPredictionsResponse,
 )
 
-# keep model in global scope for it to stay in memory
-models = {}
-artifacts = {}
 config = load_config("paths.yaml")
+api_params = load_config("params.yaml").get("api", {})
+
+# keep models in global scope for them to stay in memory. Everything loaded
+# from models/ lives on one ServingState that hot reload swaps atomically;
+# handlers read `serving` once, so in-flight requests finish on their version.
+serving = ServingState()
+# serializes reloads (admin endpoint and file watcher)
+reload_lock = threading.Lock()
+
+
+def reload_models():
+    """
+    Loads models/artifacts into a new ServingState off to the side, validates
+    them together with a smoke prediction, then swaps the global reference.
+    Returns (status, new_state). Raises ValueError if validation fails;
+    the current state keeps serving in that case.
+    """
+    global serving
+
+    with reload_lock:
+        started = time.perf_counter()
+        candidate = load_serving_state(config, api_params)
+        if candidate.version is not None and candidate.version == serving.version:
+            print(f"Reload: version {candidate.version} unchanged.")
+            return "unchanged", serving
+
+        candidate.validate()
+        previous, serving = serving, candidate
+        print(
+            f"Reload: now serving version {candidate.version} "
+            f"(was {previous.version}) after "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms."
+        )
+        return "reloaded", candidate
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Dynamic Life-cycle logic:
-        Loads ALL models defined in config['models'] automatically.
+        Loads ALL models defined in config['models'] automatically,
+        and optionally watches them for changes.
     """
+    global serving
     print("--- API STARTUP ---")
-    # iterate over all model paths in cofig
-    for model_name, model_path in config["models"].items():
-        if not os.path.exists(model_path):
-            print(f"Warning: Model path '{model_path}'" "does not exist. Skipping...")
-            continue
-
-        # load models
-        print(f"Loading model '{model_name}' from '{model_path}'...")
-        try:
-            models[model_name] = joblib.load(model_path)
-            print(f"Model '{model_name}' loaded successfully.")
-        except Exception as e:
-            print(f"Error loading model '{model_name}': {e}")
-
-        # load artifacts (vectorizer & sponsor list)
-        for artifact_name, artifact_path in config["artifacts"].items():
-            if not os.path.exists(artifact_path):
-                print(
-                    f"Warning: Artifact path '{artifact_path}'"
-                    "does not exist. Skipping..."
-                )
-                continue
-            print(f"Loading artifact '{artifact_name}'" "from '{artifact_path}'...")
-            try:
-                artifacts[artifact_name] = joblib.load(artifact_path)
-                print(f"Artifact '{artifact_name}' loaded successfully.")
-            except Exception as e:
-                print(f"Error loading artifact '{artifact_name}': {e}")
-
-    if not models:
+    # load every model and artifact exactly once, concurrently
+    started = time.perf_counter()
+    serving = load_serving_state(config, api_params)
+    print(f"Loading finished in {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+    if not serving.models:
         print("CRITICAL: No models loaded. API will not function correctly.")
+    else:
+        # the same checks as /admin/reload: refuse to serve a mismatched set
+        try:
+            serving.validate()
+        except ValueError as e:
+            print(f"CRITICAL: Loaded model and artifacts failed validation: {e}")
+            raise RuntimeError(f"Startup validation failed: {e}") from e
+
+    watcher = None
+    reload_params = api_params.get("reload", {})
+    if reload_params.get("watch", False):
+        watched = list(config["models"].values()) + list(config["artifacts"].values())
+        bundle_path = config.get("serving", {}).get("bundle")
+        if bundle_path:
+            # re-exported last by training, so its manifest changes with it
+            watched.append(os.path.join(bundle_path, MANIFEST))
+        watcher = ModelDirWatcher(
+            watched,
+            on_change=reload_models,
+            poll_seconds=reload_params.get("poll_seconds", 5.0),
+        )
+        watcher.start()
+        print(f"Watching model files every {watcher.poll_seconds}s for changes.")
     yield
 
-    models.clear()
-    artifacts.clear()
+    if watcher is not None:
+        watcher.stop()
+    serving = ServingState()
     print("--- API SHUTDOWN ---")
 
 
@@ -73,89 +132,142 @@ async def lifespan(app: FastAPI):
 app = FastAPI(
     title="Clinical Trial Outcome Predictor", version="1.0", lifespan=lifespan
 )
+# when off, neither the middleware nor the per-stage/outcome recording runs
+metrics_enabled = api_params.get("metrics", {}).get("enabled", True)
+if metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 
-# Helper: Transition Layer
-def transform_input(request: TrialPredictionsRequest) -> pd.DataFrame:
+def transform_batch(requests: list[TrialPredictionsRequest]) -> pd.DataFrame:
     """
-    Converts a single API request into the dataframe
-    format expected by the model.
+    Converts a list of API requests into one feature dataframe with the
+    fitted featurizer, in the model's column order (single vectorized
+    transform for the batch; a single request is a batch of one).
     """
-    data = {}
-
-    # enrollment (log transform)
-    val = request.enrollment if request.enrollment > 0 else 0
-    data["enrollment_log"] = np.log1p(val)
+    layout = serving.feature_layout
+    return layout.to_frame(layout.transform_requests(requests))
 
-    # phase (one-hot)
-    phases = ["phase1", "phase2", "phase3", "phase4"]
-    req_phase = request.phase.lower()
 
-    for p in phases:
-        data[f"is_{p}"] = 1 if p in req_phase else 0
+def _label(prob: float) -> str:
+    """Maps a success probability to the API's outcome label."""
+    return "Success" if prob > 0.5 else "Failure"
 
-    # check for not specified
-    data["is_phase_not_specified"] = 1 if "not specified" in req_phase else 0
 
-    # sponsor (one-hot)
-    top_sponsors = artifacts.get("top_sponsors", [])
-    sponsor_group = (
-        request.sponsor if request.sponsor in top_sponsors else "OTHER_SPONSOR"
+def _stage_timer(http_request: Request, endpoint: str) -> StageTimer:
+    """
+    Starts stage timing for a scoring request. The first stage covers body
+    parsing and pydantic validation (since MetricsMiddleware saw the request).
+    """
+    if not metrics_enabled:
+        return NULL_TIMER
+    timer = StageTimer(
+        STAGE_LATENCY,
+        endpoint,
+        start=getattr(http_request.state, "metrics_start", None),
     )
+    timer.mark("parse_validate")
+    return timer
 
-    # init all sponsor cols to 0
-    data["sponsor_OTHER_SPONSOR"] = 0
-    for s in top_sponsors:
-        data[f"sponsor_{s}"] = 0
 
-    # set matching one to 1
-    if f"sponsor_{sponsor_group}" in data:
-        data[f"sponsor_{sponsor_group}"] = 1
+def score_requests(state, requests, timer):
+    """
+    Featurizes and scores requests with one TF-IDF and one scoring call,
+    recording each stage. Raises HTTPException(400) on bad input.
+    """
+    layout = state.feature_layout
+    try:
+        vectors = layout.vectorize_conditions([r.condition for r in requests])
+        timer.mark("tfidf")
+        features = layout.transform_requests(requests, condition_vectors=vectors)
+        timer.mark("transform")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Transformation Error: {str(e)}")
 
-    # conditions (tf-idf using saved vectorizer)
-    tfidf = artifacts.get("tfidf_vectorizer")
-    if tfidf:
-        #  transform returns matrix, convert to array
-        vectors = tfidf.transform(
-            [request.condition if request.condition else ""]
-        ).toarray()[0]
-        feature_names = tfidf.get_feature_names_out()
+    probs = state.score(features)
+    timer.mark("score")
+    return probs
 
-        # map to cond_word columns
-        for i, name in enumerate(feature_names):
-            data[f"cond_{name}"] = vectors[i]
 
-    # convert dict to single-row dataframe
-    return pd.DataFrame([data])
+def _count_outcomes(probs):
+    if not metrics_enabled:
+        return
+    successes = sum(1 for p in probs if p > 0.5)
+    if successes:
+        PREDICTIONS.inc("logistic_baseline", "Success", amount=successes)
+    if len(probs) - successes:
+        PREDICTIONS.inc("logistic_baseline", "Failure", amount=len(probs) - successes)
 
 
 @app.get("/health")
 def check_health():
     """Basic health check to verify API is running."""
+    state = serving
     return {
-        "status": "healthy" if models else "degraded",
-        "models": list(models.keys()),
-        "artifacts": list(artifacts.keys()),
+        "status": "healthy" if state.models else "degraded",
+        "version": state.version,
+        "models": list(state.models.keys()),
+        "artifacts": list(state.artifacts.keys()),
+        "prediction_cache": state.prediction_cache.stats(),
+        "condition_cache": (
+            state.condition_cache.stats() if state.condition_cache else None
+        ),
     }
 
 
-@app.post("/predict", response_model=TrialPredictionsResponse)
-def predict(request: TrialPredictionsRequest):
-    if "logistic_baseline" not in models:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text-format metrics (latency by stage, counts, RSS)."""
+    return PlainTextResponse(
+        render_metrics(serving), media_type="text/plain; version=0.0.4"
+    )
+
 
-    # transform user input -> model features
+@app.post("/admin/reload")
+def admin_reload(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Hot-reloads models/ without a restart. Requests in flight finish on
+    the version they started with. Disabled unless the API_ADMIN_TOKEN
+    environment variable is set; callers must send it as X-Admin-Token.
+    """
+    expected = os.environ.get("API_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(
+            status_code=403, detail="Admin endpoints disabled (API_ADMIN_TOKEN unset)"
+        )
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode(), expected.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+    previous = serving.version
     try:
-        input_df = transform_input(request)
+        status, state = reload_models()
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Transformation Error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Reload failed: {str(e)} (still serving version {previous})",
+        )
+    return {"status": status, "version": state.version, "previous_version": previous}
 
-    # predict
-    model = models["logistic_baseline"]
 
-    # get prob of class 1 (success)
-    prob = model.predict_proba(input_df)[0][1]
-    pred_class = "Success" if prob > 0.5 else "Failure"
+@app.post("/predict", response_model=TrialPredictionsResponse)
+def predict(request: TrialPredictionsRequest, http_request: Request):
+    timer = _stage_timer(http_request, "/predict")
+    state = serving
+    if not state.ready:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    key = state.feature_layout.cache_key(request)
+    prob = state.prediction_cache.get(key)
+    timer.mark("cache_lookup")
+
+    if prob is None:
+        # transform user input -> model features, get prob of class 1 (success)
+        prob = float(score_requests(state, [request], timer)[0])
+        state.prediction_cache.put(key, prob)
+
+    pred_class = _label(prob)
+    _count_outcomes([prob])
 
     return {
         "prediction": pred_class,
@@ -164,6 +276,118 @@ def predict(request: TrialPredictionsRequest):
     }
 
 
+@app.post("/predict/batch", response_model=TrialBatchPredictionsResponse)
+def predict_batch(batch: TrialBatchPredictionsRequest, http_request: Request):
+    """
+    Scores a list of trials with one feature matrix
+    and a single scoring call.
+    """
+    timer = _stage_timer(http_request, "/predict/batch")
+    state = serving
+    if not state.ready:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    keys = [state.feature_layout.cache_key(trial) for trial in batch.trials]
+    probs = [state.prediction_cache.get(key) for key in keys]
+    timer.mark("cache_lookup")
+
+    # score only the cache misses, still in one call
+    misses = [i for i, prob in enumerate(probs) if prob is None]
+    if misses:
+        scored = score_requests(state, [batch.trials[i] for i in misses], timer)
+        for i, prob in zip(misses, scored):
+            probs[i] = float(prob)
+            state.prediction_cache.put(keys[i], probs[i])
+    _count_outcomes(probs)
+
+    return {
+        "results": [
+            {
+                "nct_id": trial.nct_id,
+                "prediction": _label(prob),
+                "probability": round(prob, 4),
+            }
+            for trial, prob in zip(batch.trials, probs)
+        ],
+        "model_used": "logistic_baseline",
+    }
+
+
+def _score_stream_chunk(state, chunk):
+    """
+    Scores one internal chunk of parsed stream lines, preserving input
+    order. chunk is a list of (line_number, request_or_None, error_or_None).
+    """
+    valid = [(line, req) for line, req, err in chunk if req is not None]
+    probs = {}
+    failure = None
+    if valid:
+        timer = (
+            StageTimer(STAGE_LATENCY, "/predict/stream")
+            if metrics_enabled
+            else NULL_TIMER
+        )
+        try:
+            scored = score_requests(state, [req for _, req in valid], timer)
+            probs = {line: float(p) for (line, _), p in zip(valid, scored)}
+            _count_outcomes(list(probs.values()))
+        except HTTPException as e:
+            failure = e.detail
+
+    out = []
+    for line, req, err in chunk:
+        if req is None or failure is not None:
+            out.append(ndjson({"line": line, "error": err or failure}))
+        else:
+            prob = probs[line]
+            out.append(
+                ndjson(
+                    {
+                        "line": line,
+                        "nct_id": req.nct_id,
+                        "prediction": _label(prob),
+                        "probability": round(prob, 4),
+                    }
+                )
+            )
+    return b"".join(out)
+
+
+@app.post("/predict/stream")
+async def predict_stream(http_request: Request):
+    """
+    Bulk scoring over an NDJSON body (one TrialPredictionsRequest per line).
+    The body is consumed incrementally and scored in fixed-size internal
+    chunks; NDJSON results stream back in input order as they are produced,
+    so server memory stays constant regardless of upload size. Malformed
+    lines yield {"line": n, "error": ...} without aborting the stream.
+    Bulk traffic bypasses the prediction cache.
+    """
+    state = serving
+    if not state.ready:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    stream_params = api_params.get("stream", {})
+    chunk_size = stream_params.get("chunk_size", 512)
+    max_line_bytes = stream_params.get("max_line_bytes", 65536)
+
+    async def results():
+        chunk = []
+        lines = iter_ndjson_lines(http_request.stream(), max_line_bytes)
+        async for line_no, raw in lines:
+            request, error = parse_trial_line(raw)
+            if error is not None and metrics_enabled:
+                STREAM_MALFORMED_LINES.inc()
+            chunk.append((line_no, request, error))
+            if len(chunk) >= chunk_size:
+                yield await run_in_threadpool(_score_stream_chunk, state, chunk)
+                chunk = []
+        if chunk:
+            yield await run_in_threadpool(_score_stream_chunk, state, chunk)
+
+    return NDJSONStreamingResponse(results())
+
+
 @app.get("/", include_in_schema=False)
 def root():
     """
@@ -0,0 +1,275 @@
+# src/api/metrics.py
+"""
+Low-overhead in-process metrics rendered in the Prometheus text format.
+
+Each observation is a bisect over fixed buckets plus a few integer
+increments under a lock, i.e. a few microseconds at most, so the
+instrumentation stays negligible next to a /predict call.
+"""
+
+import os
+import resource
+import threading
+import time
+from bisect import bisect_left
+
+# seconds; spans cache hits (~10us) through slow batch requests
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, count in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for values, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_str = _format_labels(self.labels + ("le",), values + (le,))
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{label_str} {series[-1]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class StageTimer:
+    """Times consecutive stages of one request into a stage histogram."""
+
+    __slots__ = ("histogram", "endpoint", "_last")
+
+    def __init__(self, histogram, endpoint, start=None):
+        self.histogram = histogram
+        self.endpoint = endpoint
+        self._last = start if start is not None else time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.histogram.observe(now - self._last, self.endpoint, stage)
+        self._last = now
+
+
+class NullStageTimer:
+    """Stand-in used when metrics are disabled; marking is a no-op."""
+
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+
+NULL_TIMER = NullStageTimer()
+
+
+def process_rss_bytes():
+    """Current resident set size (Linux /proc), else the peak from getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _gauge(name, help_text, samples):
+    """Renders a gauge from [(labels_dict, value)]."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(
+            f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}"
+        )
+    return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "api_request_latency_seconds",
+    "End-to-end request latency.",
+    labels=("endpoint",),
+)
+STAGE_LATENCY = Histogram(
+    "api_stage_latency_seconds",
+    "Latency of each stage of a scoring request.",
+    labels=("endpoint", "stage"),
+)
+REQUESTS = Counter(
+    "api_requests_total",
+    "HTTP requests by endpoint and status code.",
+    labels=("endpoint", "status"),
+)
+ERRORS = Counter(
+    "api_errors_total",
+    "HTTP 4xx/5xx responses by endpoint and status code.",
+    labels=("endpoint", "status"),
+)
+PREDICTIONS = Counter(
+    "api_predictions_total",
+    "Scored trials by model and predicted outcome.",
+    labels=("model", "outcome"),
+)
+
+STREAM_MALFORMED_LINES = Counter(
+    "api_stream_malformed_lines_total",
+    "NDJSON lines rejected by /predict/stream.",
+)
+
+
+def render_metrics(state):
+    """Prometheus text for all metrics plus process and model-load gauges."""
+    lines = []
+    for metric in (
+        REQUEST_LATENCY,
+        STAGE_LATENCY,
+        REQUESTS,
+        ERRORS,
+        PREDICTIONS,
+        STREAM_MALFORMED_LINES,
+    ):
+        lines.extend(metric.render())
+
+    lines.extend(
+        _gauge(
+            "process_resident_memory_bytes",
+            "Resident memory of the API process.",
+            [({}, process_rss_bytes())],
+        )
+    )
+    load_samples = []
+    size_samples = []
+    for kind, entries in sorted(state.load_stats.items()):
+        for name, info in sorted(entries.items()):
+            labels = {"kind": kind, "name": name}
+            load_samples.append((labels, round(info["seconds"], 6)))
+            size_samples.append((labels, info["bytes"]))
+    lines.extend(
+        _gauge("model_load_seconds", "Load time of each model file.", load_samples)
+    )
+    lines.extend(_gauge("model_load_bytes", "Size of each model file.", size_samples))
+    if state.version:
+        lines.extend(
+            _gauge(
+                "serving_version_info",
+                "Content hash of the serving models.",
+                [({"version": state.version}, 1)],
+            )
+        )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request latency and status per route.
+    Stores the arrival time in scope state so handlers can time the
+    body parsing/validation stage.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        scope.setdefault("state", {})["metrics_start"] = start
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            status = status_holder[0]
+            REQUEST_LATENCY.observe(time.perf_counter() - start, endpoint)
+            REQUESTS.inc(endpoint, str(status))
+            if status >= 400:
+                ERRORS.inc(endpoint, str(status))
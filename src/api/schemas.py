@@ -1,7 +1,12 @@
 # src/api/schemas.py
 
+from typing import List
+
 from pydantic import BaseModel, Field, ConfigDict
 
+# upper bound on trials accepted by a single /predict/batch call
+MAX_BATCH_SIZE = 1000
+
 
 class TrialPredictionsRequest(BaseModel):
     nct_id: str = Field(..., description="Trial ID")
@@ -27,3 +32,23 @@ class TrialPredictionsResponse(BaseModel):
     prediction: str
     probability: float
     model_used: str
+
+
+class TrialBatchPredictionsRequest(BaseModel):
+    trials: List[TrialPredictionsRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description=f"Trials to score (at most {MAX_BATCH_SIZE} per call)",
+    )
+
+
+class TrialBatchPrediction(BaseModel):
+    nct_id: str
+    prediction: str
+    probability: float
+
+
+class TrialBatchPredictionsResponse(BaseModel):
+    results: List[TrialBatchPrediction]
+    model_used: str
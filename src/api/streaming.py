@@ -0,0 +1,99 @@
+# src/api/streaming.py
+"""
+Incremental NDJSON handling for the bulk /predict/stream endpoint.
+"""
+
+import json
+
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+
+from src.api.schemas import TrialPredictionsRequest
+
+
+class LineTooLong(Exception):
+    """Raised in place of a line that exceeded the configured byte limit."""
+
+
+async def iter_ndjson_lines(chunks, max_line_bytes=65536):
+    """
+    Splits an async stream of byte chunks into numbered NDJSON lines,
+    holding at most one partial line (<= max_line_bytes) in memory.
+    Yields (line_number, raw_bytes); an over-long line is yielded as
+    (line_number, LineTooLong) and its remainder is skipped.
+    Blank lines are numbered but not yielded.
+    """
+    pending = []  # pieces of the current, unterminated line
+    pending_bytes = 0
+    line_no = 0
+    skipping = False
+
+    async for chunk in chunks:
+        # one split per chunk keeps the work linear in the upload size
+        parts = chunk.split(b"\n")
+        for part in parts[:-1]:
+            line_no += 1
+            if skipping:
+                skipping = False
+                continue
+            if pending_bytes + len(part) > max_line_bytes:
+                yield line_no, _too_long(max_line_bytes)
+            else:
+                raw = b"".join(pending + [part]) if pending else part
+                if raw.strip():
+                    yield line_no, raw
+            pending, pending_bytes = [], 0
+
+        tail = parts[-1]
+        if skipping or not tail:
+            continue
+        pending.append(tail)
+        pending_bytes += len(tail)
+        if pending_bytes > max_line_bytes:
+            # report now, then drop bytes until the line ends
+            yield line_no + 1, _too_long(max_line_bytes)
+            pending, pending_bytes = [], 0
+            skipping = True
+
+    if pending:
+        raw = b"".join(pending)
+        if raw.strip():
+            yield line_no + 1, raw
+
+
+def _too_long(max_line_bytes):
+    return LineTooLong(f"Line exceeds {max_line_bytes} bytes")
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that only sends. The stock response also listens for
+    client disconnects on receive(), which competes with the endpoint reading
+    the request body from the same channel and stalls full-duplex streaming.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def parse_trial_line(raw):
+    """Returns (TrialPredictionsRequest, None) or (None, error message)."""
+    if isinstance(raw, LineTooLong):
+        return None, str(raw)
+    try:
+        return TrialPredictionsRequest.model_validate_json(raw), None
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'line'}: {err['msg']}"
+            for err in e.errors()
+        )
+        return None, problems
+
+
+def ndjson(obj):
+    """Serializes one result line."""
+    return (json.dumps(obj) + "\n").encode("utf-8")
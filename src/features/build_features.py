@@ -2,26 +2,30 @@
 
 import pandas as pd
 import numpy as np
-import os
-import joblib
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
 
+from src.utils.artifacts import save_artifact
+
 
 def clean_phase_column(df):
     """Standardize the 'phase' column to consistent categories."""
     # Fill NaNs with unique category to preserve data
     df["phase"] = df["phase"].fillna("NOT_SPECIFIED")
 
+    # Flags are worked out once per distinct phase string (a registry has
+    # a few dozen) and spread to the rows through the factorized codes
+    codes, uniques = pd.factorize(df["phase"])
+    normalized = [str(u).upper().replace(" ", "") for u in uniques]
+
     # Create binary column for each major phase
     major_phases = ["PHASE1", "PHASE2", "PHASE3", "PHASE4"]
     for phase in major_phases:
-        df[f"is_{phase.lower()}"] = df["phase"].apply(
-            lambda x: 1 if phase in str(x).upper().replace(" ", "") else 0
-        )
+        flags = np.array([phase in u for u in normalized], dtype=np.int64)
+        df[f"is_{phase.lower()}"] = flags[codes]
 
-    df["is_phase_not_specified"] = df["phase"].apply(
-        lambda x: 1 if x == "NOT_SPECIFIED" else 0
-    )
+    flags = np.array([u == "NOT_SPECIFIED" for u in uniques], dtype=np.int64)
+    df["is_phase_not_specified"] = flags[codes]
 
     # Drop original messy phase column
     df = df.drop(columns=["phase"])
@@ -68,24 +72,26 @@ def encode_target_status(df):
     return df
 
 
-def build_sponsor_features(df, top_n=20, save_path=None):
-    """
-    One-hot encodes the top N most frequent sponsors and groups the rest.
-    If save_path is provided, saves the list of top sponsors for API to use"""
-
+def _sponsor_groups(df, top_n, save_path):
+    """Top-N sponsor names (saved for the API) and each row's sponsor group."""
     # Identify top_n sponsors based on counts
     top_sponsors = df["sponsor"].value_counts().head(top_n).index.tolist()
 
     # save artifact
     if save_path:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        joblib.dump(top_sponsors, save_path)
+        save_artifact(top_sponsors, save_path)
         print(f"   -> Saved top sponsors list to {save_path}")
 
     # Create new column identifying the top sponsors or other sponsor
-    df["sponsor_group"] = df["sponsor"].apply(
-        lambda x: x if x in top_sponsors else "OTHER_SPONSOR"
-    )
+    # (hashed membership, instead of scanning the list per row)
+    return df["sponsor"].where(df["sponsor"].isin(top_sponsors), "OTHER_SPONSOR")
+
+
+def build_sponsor_features(df, top_n=20, save_path=None):
+    """
+    One-hot encodes the top N most frequent sponsors and groups the rest.
+    If save_path is provided, saves the list of top sponsors for API to use"""
+    df["sponsor_group"] = _sponsor_groups(df, top_n, save_path)
 
     # One-hot encode sponsor groups, create column for each group
     df_dummies = pd.get_dummies(df["sponsor_group"], prefix="sponsor", drop_first=False)
@@ -98,40 +104,78 @@ def build_sponsor_features(df, top_n=20, save_path=None):
     return df
 
 
-def build_conditions_feature(df, max_features=100, save_path=None):
+def build_sponsor_matrix(df, top_n=20, save_path=None):
     """
-    Applies TF-IDF Vectorization to the conditions column.
-    If save_path is provided, saves the fitted Vectorizer
-    for the API to use.
+    Sparse build_sponsor_features: returns (df without 'sponsor', CSR
+    one-hot matrix, column names), columns in get_dummies' order.
     """
-    print(
-        f"   -> Vectorizing 'conditions' using TF-IDF\
-            (top {max_features} features)..."
+    codes, groups = pd.factorize(_sponsor_groups(df, top_n, save_path), sort=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(codes)), (np.arange(len(codes)), codes)),
+        shape=(len(codes), len(groups)),
     )
+    names = [f"sponsor_{g}" for g in groups]
+    return df.drop(columns=["sponsor"]), matrix, names
 
-    # Init vectorizer
-    tfidf = TfidfVectorizer(
+
+def make_conditions_vectorizer(max_features=100):
+    """The (unfitted) TF-IDF vectorizer used for the conditions text."""
+    return TfidfVectorizer(
         stop_words="english",
         lowercase=True,
         max_features=max_features,
         ngram_range=(1, 2),  # consider 1-word and 2-word phrases
     )
 
+
+def _fit_conditions_tfidf(conditions, max_features, save_path):
+    """Fits the conditions TF-IDF; returns (vectorizer, CSR matrix, names)."""
+    print(f"   -> Vectorizing 'conditions' using TF-IDF\
+            (top {max_features} features)...")
+
+    # Init vectorizer
+    tfidf = make_conditions_vectorizer(max_features)
+
     # Fit and transform the 'conditions' text
-    matrix = tfidf.fit_transform(df["conditions"].fillna("")).toarray()
+    matrix = tfidf.fit_transform(conditions.fillna(""))
 
     # save artifact
     if save_path:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        joblib.dump(tfidf, save_path)
+        save_artifact(tfidf, save_path)
         print(f"   -> Saved TF-IDF vectorizer to {save_path}")
 
     feature_names = [f"cond_{name}" for name in tfidf.get_feature_names_out()]
+    return tfidf, matrix, feature_names
+
+
+def build_conditions_feature(df, max_features=100, save_path=None):
+    """
+    Applies TF-IDF Vectorization to the conditions column.
+    If save_path is provided, saves the fitted Vectorizer
+    for the API to use.
+    """
+    _, matrix, feature_names = _fit_conditions_tfidf(
+        df["conditions"], max_features, save_path
+    )
 
-    df_conditions = pd.DataFrame(matrix, columns=feature_names, index=df.index)
+    df_conditions = pd.DataFrame(
+        matrix.toarray(), columns=feature_names, index=df.index
+    )
 
     df = pd.concat([df, df_conditions], axis=1)
 
     # Drop original conditions column
     df = df.drop(columns=["conditions"])
     return df
+
+
+def build_conditions_matrix(df, max_features=100, save_path=None):
+    """
+    Sparse build_conditions_feature: returns (df without 'conditions',
+    CSR TF-IDF matrix, column names). Memory grows with the non-zero
+    weights rather than rows x max_features.
+    """
+    _, matrix, feature_names = _fit_conditions_tfidf(
+        df["conditions"], max_features, save_path
+    )
+    return df.drop(columns=["conditions"]), matrix.tocsr(), feature_names
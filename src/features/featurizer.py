@@ -0,0 +1,243 @@
+# src/features/featurizer.py
+"""
+ClinicalTrialFeaturizer: the single fitted feature transform shared by
+data preparation (fit on the labelled interim rows, then transform) and
+the API / offline scoring (transform of one request or a batch). It is
+saved as one joblib artifact (artifacts.featurizer).
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from src.features.build_features import make_conditions_vectorizer
+
+INPUT_COLUMNS = ["phase", "conditions", "sponsor", "enrollment"]
+
+PHASE_TOKENS = ["PHASE1", "PHASE2", "PHASE3", "PHASE4"]
+NOT_SPECIFIED = "NOT_SPECIFIED"
+OTHER_SPONSOR = "OTHER_SPONSOR"
+
+# always the first output columns, in this order (the rest are the
+# sponsor one-hots and the TF-IDF terms)
+PHASE_FEATURES = [f"is_{p.lower()}" for p in PHASE_TOKENS] + ["is_phase_not_specified"]
+DENSE_FEATURES = PHASE_FEATURES + ["enrollment_log"]
+
+# batches up to this size are featurized without factorizing first
+SMALL_BATCH = 16
+
+
+def normalize_phase(value):
+    """
+    The form phases are matched in: uppercase with whitespace removed, so
+    'Phase 2' and 'PHASE2' agree. Missing, blank and 'Not Specified' all
+    become NOT_SPECIFIED.
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return NOT_SPECIFIED
+    value = "".join(str(value).upper().split())
+    if value in ("", NOT_SPECIFIED, "NOTSPECIFIED"):
+        return NOT_SPECIFIED
+    return value
+
+
+def _distinct(values):
+    """
+    (codes, uniques) for per-distinct-value lookups; missing values get code
+    -1. Batches of a few rows (API requests) skip the hashing pass, which
+    would cost more than it saves.
+    """
+    if len(values) <= SMALL_BATCH:
+        return np.arange(len(values)), list(values)
+    return pd.factorize(np.asarray(values, dtype=object))
+
+
+def phase_flags(phases):
+    """
+    (n, len(PHASE_FEATURES)) int8 flags. Each distinct phase string is
+    normalized once; rows pick their flags up through the factorized codes.
+    """
+    codes, uniques = _distinct(phases)
+    normalized = [normalize_phase(u) for u in uniques] + [NOT_SPECIFIED]
+    table = np.array(
+        [
+            [token in u for token in PHASE_TOKENS] + [u == NOT_SPECIFIED]
+            for u in normalized
+        ],
+        dtype=np.int8,
+    ).reshape(len(normalized), len(PHASE_FEATURES))
+    # missing values get code -1, i.e. the trailing NOT_SPECIFIED row
+    return table[codes]
+
+
+def condition_strings(conditions):
+    """Condition texts with missing values as ''."""
+    return [c if isinstance(c, str) else "" for c in conditions]
+
+
+class ClinicalTrialFeaturizer(BaseEstimator, TransformerMixin):
+    """
+    Learns the enrollment median, the top sponsors and the conditions TF-IDF
+    vocabulary from interim rows (columns INPUT_COLUMNS), and turns rows into
+    the model's feature matrix:
+
+        is_phase1..4, is_phase_not_specified, enrollment_log,
+        sponsor_<group> (sorted, OTHER_SPONSOR included), cond_<term>
+
+    transform is vectorized over the batch, so a single request and a
+    million-row chunk go through the same code. With sparse_output=True it
+    returns a CSR matrix instead of a dense float64 array.
+    """
+
+    def __init__(self, max_features=100, top_sponsors=20, sparse_output=False):
+        self.max_features = max_features
+        self.top_sponsors = top_sponsors
+        self.sparse_output = sparse_output
+
+    def fit(self, X, y=None):
+        enrollment = pd.to_numeric(X["enrollment"], errors="coerce")
+        median = enrollment.median()
+        self.enrollment_median_ = float(median) if pd.notna(median) else 0.0
+        self.top_sponsors_ = (
+            X["sponsor"].value_counts().head(self.top_sponsors).index.tolist()
+        )
+        self.tfidf_ = make_conditions_vectorizer(self.max_features).fit(
+            condition_strings(X["conditions"])
+        )
+        return self._compile()
+
+    @classmethod
+    def from_artifacts(cls, top_sponsors, tfidf=None, enrollment_median=0.0):
+        """
+        A fitted featurizer rebuilt from the separate top_sponsors and
+        tfidf_vectorizer artifacts that older preparation runs saved. Those
+        did not record the enrollment median, so missing enrollment maps to
+        enrollment_median (0, as the API used to).
+        """
+        featurizer = cls(top_sponsors=len(top_sponsors))
+        featurizer.enrollment_median_ = float(enrollment_median)
+        featurizer.top_sponsors_ = list(top_sponsors)
+        featurizer.tfidf_ = tfidf
+        return featurizer._compile()
+
+    def _compile(self):
+        """Derives the sponsor lookup and the output column names."""
+        self.sponsor_groups_ = sorted(set(self.top_sponsors_) | {OTHER_SPONSOR})
+        self._sponsor_codes = {g: i for i, g in enumerate(self.sponsor_groups_)}
+        self._other_sponsor = self._sponsor_codes[OTHER_SPONSOR]
+        terms = []
+        if self.tfidf_ is not None:
+            terms = [f"cond_{t}" for t in self.tfidf_.get_feature_names_out()]
+        self.feature_names_out_ = (
+            DENSE_FEATURES + [f"sponsor_{g}" for g in self.sponsor_groups_] + terms
+        )
+        return self
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_out_, dtype=object)
+
+    def impute_enrollment(self, enrollments):
+        """Enrollment as float64: missing -> the training median, negatives -> 0."""
+        try:
+            values = np.asarray(enrollments, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = pd.to_numeric(pd.Series(enrollments), errors="coerce").to_numpy(
+                dtype=np.float64
+            )
+        values = np.where(np.isnan(values), self.enrollment_median_, values)
+        return np.maximum(values, 0.0)
+
+    def sponsor_columns(self, sponsors):
+        """
+        Index into sponsor_groups_ per row (unknown or missing -> OTHER), looked
+        up once per distinct sponsor like phase_flags.
+        """
+        codes, uniques = _distinct(sponsors)
+        other = self._other_sponsor
+        table = [self._sponsor_codes.get(u, other) for u in uniques] + [other]
+        return np.asarray(table, dtype=np.intp)[codes]
+
+    def vectorize_conditions(self, conditions):
+        """TF-IDF CSR matrix for condition strings."""
+        return self.tfidf_.transform(condition_strings(conditions))
+
+    def transform(self, X):
+        """Feature matrix for a DataFrame (or dict of columns) of INPUT_COLUMNS."""
+        return self.transform_columns(
+            X["phase"], X["conditions"], X["sponsor"], X["enrollment"]
+        )
+
+    def transform_columns(
+        self,
+        phases,
+        conditions,
+        sponsors,
+        enrollments,
+        condition_vectors=None,
+        sparse_output=None,
+    ):
+        """
+        transform() from raw column sequences. condition_vectors may carry a
+        precomputed vectorize_conditions() (e.g. from a cache);
+        sparse_output overrides the fitted setting.
+        """
+        if sparse_output is None:
+            sparse_output = self.sparse_output
+        n = len(phases)
+        n_sponsors = len(self.sponsor_groups_)
+        dense = np.empty((n, len(DENSE_FEATURES)), dtype=np.float64)
+        dense[:, : len(PHASE_FEATURES)] = phase_flags(phases)
+        dense[:, -1] = np.log1p(self.impute_enrollment(enrollments))
+        sponsor_cols = self.sponsor_columns(sponsors)
+
+        tf = None
+        if self.tfidf_ is not None:
+            tf = condition_vectors
+            if tf is None:
+                tf = self.vectorize_conditions(conditions)
+
+        if sparse_output:
+            return self._csr(dense, sponsor_cols, tf)
+
+        X = np.zeros((n, len(self.feature_names_out_)), dtype=np.float64)
+        X[:, : len(DENSE_FEATURES)] = dense
+        offset = len(DENSE_FEATURES)
+        X[np.arange(n), offset + sponsor_cols] = 1.0
+        if tf is not None:
+            # scatter the sparse TF-IDF rows without densifying them
+            rows = np.repeat(np.arange(n), np.diff(tf.indptr))
+            X[rows, offset + n_sponsors + tf.indices] = tf.data
+        return X
+
+    def _csr(self, dense, sponsor_cols, tf):
+        """
+        The output as CSR, assembled straight into data/indices/indptr (each
+        row: the dense columns, its sponsor, its TF-IDF terms) rather than
+        through sparse.hstack, which dominates small batches.
+        """
+        n, n_dense = dense.shape
+        per_row = n_dense + 1
+        tf_counts = np.diff(tf.indptr) if tf is not None else np.zeros(n, np.intp)
+        indptr = np.zeros(n + 1, dtype=np.intp)
+        np.cumsum(per_row + tf_counts, out=indptr[1:])
+        data = np.empty(indptr[-1], dtype=np.float64)
+        indices = np.empty(indptr[-1], dtype=np.intp)
+
+        starts = indptr[:-1, None] + np.arange(per_row)
+        data[starts[:, :n_dense]] = dense
+        indices[starts[:, :n_dense]] = np.arange(n_dense)
+        data[starts[:, n_dense]] = 1.0
+        indices[starts[:, n_dense]] = n_dense + sponsor_cols
+        if tf is not None:
+            # each term lands after its row's fixed entries, in tf's order
+            shift = np.repeat(indptr[:-1] + per_row - tf.indptr[:-1], tf_counts)
+            positions = shift + np.arange(tf.nnz)
+            data[positions] = tf.data
+            indices[positions] = n_dense + len(self.sponsor_groups_) + tf.indices
+
+        X = sparse.csr_matrix(
+            (data, indices, indptr), shape=(n, len(self.feature_names_out_))
+        )
+        X.eliminate_zeros()  # unset phase flags, zero enrollment
+        return X
@@ -0,0 +1,195 @@
+# src/inference/bundle.py
+"""
+Serving bundle: a trained pipeline and its featurizer exported as plain
+arrays, so the API can load and score without unpickling sklearn objects
+(or depending on the sklearn version that trained them). A bundle is a
+directory with one .npy file per array, memory-mapped on load, and a
+manifest.json holding the format version, the scalar settings and the
+array index:
+
+    weights, feature_names      fused scorer (see LinearScorer)
+    coef, scaler_mean, scaler_scale   the unfused classifier / scaler
+    top_sponsors, vocabulary, idf     the featurizer
+"""
+
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from sklearn import __version__ as sklearn_version
+from sklearn.compose import ColumnTransformer
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import StandardScaler
+
+from src.features.featurizer import ClinicalTrialFeaturizer
+from src.inference.linear_scorer import LinearScorer
+
+BUNDLE_FORMAT = "clinical-trial-serving-bundle"
+BUNDLE_VERSION = 1
+MANIFEST = "manifest.json"
+
+
+def _scaler_stats(model):
+    """(column names, mean, scale) of the pipeline's enrollment scaler, if any."""
+    preprocessor = getattr(model, "named_steps", {}).get("preprocessor")
+    if not isinstance(preprocessor, ColumnTransformer):
+        return [], np.empty(0), np.empty(0)
+    for _, transformer, columns in preprocessor.transformers_:
+        if isinstance(transformer, StandardScaler):
+            mean = transformer.mean_ if transformer.with_mean else None
+            scale = transformer.scale_ if transformer.with_std else None
+            n = len(columns)
+            return (
+                [str(c) for c in columns],
+                np.zeros(n) if mean is None else mean,
+                np.ones(n) if scale is None else scale,
+            )
+    return [], np.empty(0), np.empty(0)
+
+
+def _tfidf_params(tfidf):
+    """JSON-safe constructor parameters of a fitted TfidfVectorizer."""
+    params = tfidf.get_params()
+    params["dtype"] = np.dtype(params["dtype"]).name
+    custom = [k for k, v in params.items() if callable(v)]
+    if custom:
+        raise ValueError(f"Cannot export a vectorizer with custom {custom}.")
+    return params
+
+
+def export_serving_bundle(model, featurizer, path, feature_names=None):
+    """
+    Writes the bundle for a fitted pipeline and the featurizer it was
+    trained on to the directory `path`, replacing any previous bundle.
+    feature_names gives the input column order of a model fit on a matrix.
+    Raises ValueError when the pipeline is not linear or the featurizer
+    cannot produce every model column.
+    """
+    scorer = LinearScorer.from_pipeline(model, feature_names=feature_names)
+    names = scorer.feature_names
+    if names is None:
+        raise ValueError("The model's input column order is unknown.")
+    unfilled = set(names) - set(featurizer.get_feature_names_out())
+    if unfilled:
+        raise ValueError(f"Featurizer cannot produce {sorted(unfilled)[:3]}.")
+
+    scaled, mean, scale = _scaler_stats(model)
+    classifier = model.steps[-1][1] if hasattr(model, "steps") else model
+    arrays = {
+        "weights": scorer.weights,
+        "feature_names": np.array(names, dtype=str),
+        "coef": np.asarray(classifier.coef_[0], dtype=np.float64),
+        "scaler_mean": np.asarray(mean, dtype=np.float64),
+        "scaler_scale": np.asarray(scale, dtype=np.float64),
+        "top_sponsors": np.array(featurizer.top_sponsors_, dtype=str),
+    }
+    tfidf = featurizer.tfidf_
+    if tfidf is not None:
+        arrays["vocabulary"] = np.array(tfidf.get_feature_names_out(), dtype=str)
+        arrays["idf"] = np.asarray(tfidf.idf_, dtype=np.float64)
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sklearn_version": sklearn_version,
+        "model": {
+            "classifier": type(classifier).__name__,
+            "bias": scorer.bias,
+            "intercept": float(np.ravel(classifier.intercept_)[0]),
+            "scaled_columns": scaled,
+            # a model fit on a matrix was served sparse rows
+            "sparse_input": getattr(model, "feature_names_in_", None) is None,
+        },
+        "featurizer": {
+            "enrollment_median": featurizer.enrollment_median_,
+            "max_features": featurizer.max_features,
+            "top_sponsors": featurizer.top_sponsors,
+            "sparse_output": featurizer.sparse_output,
+            "tfidf": _tfidf_params(tfidf) if tfidf is not None else None,
+        },
+        "arrays": {},
+    }
+
+    # build next to the target, then swap it in
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array, allow_pickle=False)
+        manifest["arrays"][name] = {
+            "file": f"{name}.npy",
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+        }
+    with open(os.path.join(tmp_path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{path}.old-{os.getpid()}"
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return manifest
+
+
+def bundle_files(path):
+    """The manifest and array files of the bundle at path, in a fixed order."""
+    with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return [os.path.join(path, MANIFEST)] + [
+        os.path.join(path, spec["file"]) for spec in manifest["arrays"].values()
+    ]
+
+
+def load_serving_bundle(path, mmap_mode="r"):
+    """
+    Reads a bundle back as (LinearScorer, ClinicalTrialFeaturizer, manifest)
+    from plain arrays; nothing is unpickled. Arrays are memory-mapped unless
+    mmap_mode is None. Raises ValueError for an unknown format or version.
+    """
+    with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a serving bundle.")
+    if manifest.get("version") != BUNDLE_VERSION:
+        raise ValueError(
+            f"Serving bundle version {manifest.get('version')} is not supported "
+            f"(expected {BUNDLE_VERSION}); re-run training to re-export it."
+        )
+    arrays = {
+        name: np.load(
+            os.path.join(path, spec["file"]), mmap_mode=mmap_mode, allow_pickle=False
+        )
+        for name, spec in manifest["arrays"].items()
+    }
+
+    settings = manifest["featurizer"]
+    tfidf = None
+    if settings["tfidf"] is not None:
+        params = dict(settings["tfidf"])
+        params["dtype"] = np.dtype(params["dtype"]).type
+        params["ngram_range"] = tuple(params["ngram_range"])
+        tfidf = TfidfVectorizer(**params)
+        tfidf.vocabulary_ = {
+            term: i for i, term in enumerate(arrays["vocabulary"].tolist())
+        }
+        tfidf.idf_ = arrays["idf"]
+
+    featurizer = ClinicalTrialFeaturizer.from_artifacts(
+        arrays["top_sponsors"].tolist(),
+        tfidf=tfidf,
+        enrollment_median=settings["enrollment_median"],
+    )
+    featurizer.max_features = settings["max_features"]
+    featurizer.top_sponsors = settings["top_sponsors"]
+    featurizer.sparse_output = settings["sparse_output"]
+
+    scorer = LinearScorer(
+        arrays["weights"],
+        manifest["model"]["bias"],
+        feature_names=arrays["feature_names"].tolist(),
+    )
+    return scorer, featurizer, manifest
@@ -0,0 +1,229 @@
+# src/inference/cache.py
+"""
+In-process caches for the serving path.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a per-entry TTL. Thread-safe, since FastAPI
+    runs sync endpoints in a worker thread pool.
+    A max_size of 0 disables caching.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=3600, clock=time.monotonic):
+        self.max_size = int(max_size)
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Returns the cached value, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores a value, evicting the least recently used entries if full."""
+        if self.max_size <= 0:
+            return
+        expires_at = self._clock() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry (e.g. after a model/artifact load)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters for sizing the cache, as reported on /health."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ConditionVectorCache:
+    """
+    Memoizes TF-IDF condition vectors in front of tfidf.transform.
+
+    Entries are the sparse (index, weight) pairs for one normalized condition
+    string, kept in LRU order under an approximate memory budget. Drop-in for
+    the vectorizer: transform() returns the same CSR matrix tfidf would.
+    """
+
+    # rough per-entry bookkeeping cost (OrderedDict slot, tuple, array headers)
+    ENTRY_OVERHEAD_BYTES = 300
+
+    def __init__(self, tfidf, max_bytes=16 * 1024 * 1024):
+        self.tfidf = tfidf
+        self.max_bytes = int(max_bytes)
+        self.n_terms = len(tfidf.vocabulary_)
+        # folding is only safe when the vectorizer itself ignores case/spacing
+        self.folds_keys = self.vectorizer_ignores_case_and_spacing(tfidf)
+        self._entries = OrderedDict()  # condition -> (indices, weights, nbytes)
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def vectorizer_ignores_case_and_spacing(tfidf):
+        """
+        True for the stock word analyzer with lowercase=True and the default
+        word-boundary token pattern, where case and whitespace runs cannot
+        change the output vector.
+        """
+        default_pattern = TfidfVectorizer().token_pattern
+        return (
+            getattr(tfidf, "lowercase", False) is True
+            and getattr(tfidf, "analyzer", None) == "word"
+            and getattr(tfidf, "preprocessor", None) is None
+            and getattr(tfidf, "tokenizer", None) is None
+            and getattr(tfidf, "token_pattern", None) == default_pattern
+        )
+
+    def normalize(self, condition):
+        """
+        Cache key for a condition. Folds case and whitespace when the
+        vectorizer ignores them anyway, otherwise keeps the exact string.
+        """
+        if not condition:
+            return ""
+        if self.folds_keys:
+            return " ".join(condition.lower().split())
+        return condition
+
+    def _store(self, condition, indices, weights):
+        nbytes = (
+            len(condition) + indices.nbytes + weights.nbytes + self.ENTRY_OVERHEAD_BYTES
+        )
+        if nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(condition, None)
+        if old is not None:
+            self.bytes_used -= old[2]
+        self._entries[condition] = (indices, weights, nbytes)
+        self.bytes_used += nbytes
+        while self.bytes_used > self.max_bytes:
+            _, (_, _, freed) = self._entries.popitem(last=False)
+            self.bytes_used -= freed
+            self.evictions += 1
+
+    def _store_rows(self, conditions, matrix):
+        """Caches row i of matrix under conditions[i]; call with the lock held."""
+        for i, condition in enumerate(conditions):
+            start, end = matrix.indptr[i], matrix.indptr[i + 1]
+            self._store(
+                condition,
+                matrix.indices[start:end].copy(),
+                matrix.data[start:end].copy(),
+            )
+
+    def warm(self, conditions):
+        """
+        Pre-populates the cache, most important conditions first. Returns
+        the number of entries held afterwards.
+        """
+        unique = list(dict.fromkeys(self.normalize(c) for c in conditions))
+        # insert in reverse so the first (hottest) conditions end up most recent
+        unique.reverse()
+        matrix = self.tfidf.transform(unique).tocsr()
+        with self._lock:
+            self._store_rows(unique, matrix)
+            return len(self._entries)
+
+    def transform(self, conditions):
+        """Returns the TF-IDF CSR matrix for a sequence of condition strings."""
+        keys = [self.normalize(c) for c in conditions]
+        rows = [None] * len(keys)
+        missing = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                    self.misses += 1
+                else:
+                    self._entries.move_to_end(key)
+                    rows[i] = entry
+                    self.hits += 1
+
+        if missing:
+            # vectorize outside the lock, so concurrent misses run in parallel;
+            # two threads missing the same key both compute it (same result)
+            fresh = list(missing)
+            matrix = self.tfidf.transform(fresh).tocsr()
+            for j, key in enumerate(fresh):
+                start, end = matrix.indptr[j], matrix.indptr[j + 1]
+                entry = (matrix.indices[start:end], matrix.data[start:end], 0)
+                for i in missing[key]:
+                    rows[i] = entry
+            with self._lock:
+                self._store_rows(fresh, matrix)
+
+        indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum([len(r[0]) for r in rows], out=indptr[1:])
+        if rows:
+            indices = np.concatenate([r[0] for r in rows])
+            data = np.concatenate([r[1] for r in rows])
+        else:
+            indices = np.empty(0, dtype=np.int32)
+            data = np.empty(0, dtype=np.float64)
+        return sparse.csr_matrix(
+            (data, indices, indptr), shape=(len(rows), self.n_terms)
+        )
+
+    def stats(self):
+        """Counters for sizing the cache, as reported on /health."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,161 @@
+# src/inference/feature_layout.py
+"""
+Serving-side feature layout: the fitted ClinicalTrialFeaturizer's output
+columns mapped onto the trained model's column order once at artifact
+load, so scoring fills NumPy rows (or CSR rows) directly instead of
+building a dict and a DataFrame per request.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.features.featurizer import condition_strings, normalize_phase
+from src.inference.cache import ConditionVectorCache
+
+
+class FeatureLayout:
+    """
+    Runs the featurizer's vectorized transform and places its columns at the
+    model's input indices. Column order follows the trained model, so the
+    output can be fed to the pipeline as-is. With sparse=True (models fit on
+    a sparse matrix) transform returns a CSR matrix instead of a dense array.
+    """
+
+    def __init__(self, feature_names, featurizer, condition_cache=None, sparse=False):
+        self.feature_names = list(feature_names)
+        self.featurizer = featurizer
+        self.sparse = sparse
+        self.columns = pd.Index(self.feature_names)
+        self.n_features = len(self.feature_names)
+
+        # model column -> featurizer output column (-1 if it cannot produce it)
+        produced = {
+            name: i for i, name in enumerate(featurizer.get_feature_names_out())
+        }
+        self.source_cols = np.array(
+            [produced.get(name, -1) for name in self.feature_names], dtype=np.intp
+        )
+        self.n_produced = len(produced)
+        # the usual case: the model was trained on the featurizer's own output
+        self.identity = self.n_produced == self.n_features and np.array_equal(
+            self.source_cols, np.arange(self.n_features)
+        )
+
+        self.tfidf = featurizer.tfidf_
+        # optional memoizing front for tfidf.transform (same output)
+        self.condition_cache = condition_cache
+        self.folds_conditions = (
+            self.tfidf is not None
+            and ConditionVectorCache.vectorizer_ignores_case_and_spacing(self.tfidf)
+        )
+
+    @classmethod
+    def from_artifacts(
+        cls, model, featurizer, condition_cache=None, feature_names=None
+    ):
+        """
+        Compiles a layout for a fitted pipeline. Uses the column order the
+        model was trained on; a model fit on a matrix has none, so the saved
+        feature_names artifact gives it (and the layout is sparse). Falls
+        back to the featurizer's own order.
+        """
+        fit_on_matrix = getattr(model, "feature_names_in_", None) is None
+        if not fit_on_matrix:
+            feature_names = model.feature_names_in_
+        if feature_names is None:
+            fit_on_matrix = False
+            feature_names = featurizer.get_feature_names_out()
+        return cls(
+            feature_names,
+            featurizer,
+            condition_cache=condition_cache,
+            sparse=fit_on_matrix,
+        )
+
+    def vectorize_conditions(self, conditions):
+        """TF-IDF CSR matrix for condition strings (through the cache if set)."""
+        if self.condition_cache is None:
+            return self.featurizer.vectorize_conditions(conditions)
+        return self.condition_cache.transform(condition_strings(conditions))
+
+    def transform(
+        self, phases, conditions, sponsors, enrollments, condition_vectors=None
+    ):
+        """
+        The model's feature matrix for raw column sequences, i.e. the
+        featurizer's transform in the model's column order.
+        condition_vectors may carry a precomputed vectorize_conditions().
+        """
+        if self.tfidf is not None and condition_vectors is None:
+            condition_vectors = self.vectorize_conditions(conditions)
+        X = self.featurizer.transform_columns(
+            phases,
+            conditions,
+            sponsors,
+            enrollments,
+            condition_vectors=condition_vectors,
+            sparse_output=self.sparse,
+        )
+        if self.identity:
+            return X
+
+        # reorder; columns the featurizer lacks stay zero
+        filled = self.source_cols >= 0
+        if self.sparse:
+            padded = sparse.hstack(
+                [X, sparse.csr_matrix((X.shape[0], 1))], format="csr"
+            )
+            return padded[:, np.where(filled, self.source_cols, self.n_produced)]
+        out = np.zeros((X.shape[0], self.n_features), dtype=np.float64)
+        out[:, filled] = X[:, self.source_cols[filled]]
+        return out
+
+    def transform_requests(self, requests, condition_vectors=None):
+        """Convenience wrapper for a list of TrialPredictionsRequest objects."""
+        return self.transform(
+            [r.phase for r in requests],
+            [r.condition for r in requests],
+            [r.sponsor for r in requests],
+            [r.enrollment for r in requests],
+            condition_vectors=condition_vectors,
+        )
+
+    def unfilled_features(self):
+        """
+        Model columns the loaded featurizer can never set (e.g. a TF-IDF term
+        missing from its vocabulary). Non-empty means the model and
+        artifacts come from different preparation runs.
+        """
+        return [
+            name for name, col in zip(self.feature_names, self.source_cols) if col < 0
+        ]
+
+    def cache_key(self, request):
+        """
+        Normalizes the feature-relevant fields of a request into a hashable
+        key. Only differences the featurizer ignores are folded together:
+        phase spelling (see normalize_phase), missing or negative enrollment
+        (imputed), and condition case/whitespace when the vectorizer ignores
+        them. Sponsor matching is exact, so sponsor is kept verbatim.
+        """
+        condition = request.condition
+        if self.tfidf is None or self.folds_conditions:
+            condition = " ".join(condition.lower().split())
+        return (
+            normalize_phase(request.phase),
+            condition,
+            request.sponsor,
+            float(self.featurizer.impute_enrollment([request.enrollment])[0]),
+        )
+
+    def to_frame(self, X):
+        """
+        Wraps a layout matrix with the model's column names. The fitted
+        ColumnTransformer selects 'enrollment_log' by name, so sklearn
+        needs this one lightweight wrapper at the model boundary. A sparse
+        layout's model selects by position and takes the matrix as is.
+        """
+        if self.sparse:
+            return X
+        return pd.DataFrame(X, columns=self.columns, copy=False)
@@ -0,0 +1,142 @@
+# src/inference/linear_scorer.py
+"""
+Fused linear scoring engine for the logistic baseline.
+
+The served Pipeline is ColumnTransformer(StandardScaler on enrollment_log,
+passthrough for the rest) + LogisticRegression, i.e. an affine map
+followed by a sigmoid. Folding the scaler into the classifier gives one
+weight vector over the raw model inputs:
+
+    logit = sum_j (w_j / scale_j) * x_j + (b - sum_j w_j * mean_j / scale_j)
+"""
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+
+def _resolve_columns(columns, feature_names_in, n_features_in):
+    """Turns a ColumnTransformer column spec into input column indices."""
+    if isinstance(columns, slice):
+        return np.arange(n_features_in)[columns]
+    columns = np.atleast_1d(np.asarray(columns))
+    if columns.size == 0:
+        return np.empty(0, dtype=np.intp)
+    if columns.dtype == bool:
+        return np.flatnonzero(columns)
+    if columns.dtype.kind in "iu":
+        return columns.astype(np.intp)
+    if feature_names_in is None:
+        raise ValueError("String column selection requires feature_names_in_.")
+    index = {name: i for i, name in enumerate(feature_names_in)}
+    return np.array([index[c] for c in columns], dtype=np.intp)
+
+
+def _fold_column_transformer(preprocessor, coef):
+    """
+    Maps output-space coefficients of a fitted ColumnTransformer back onto
+    its inputs. Returns (input_weights, bias_shift).
+    """
+    feature_names_in = getattr(preprocessor, "feature_names_in_", None)
+    n_in = preprocessor.n_features_in_
+    weights = np.zeros(n_in, dtype=np.float64)
+    bias_shift = 0.0
+    offset = 0
+
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop":
+            continue
+        idx = _resolve_columns(columns, feature_names_in, n_in)
+        if idx.size == 0:
+            continue
+        w = coef[offset : offset + idx.size]
+        offset += idx.size
+
+        # fitted ColumnTransformers store passthrough as an identity function
+        if transformer == "passthrough" or (
+            isinstance(transformer, FunctionTransformer) and transformer.func is None
+        ):
+            weights[idx] += w
+        elif isinstance(transformer, StandardScaler):
+            scale = transformer.scale_ if transformer.with_std else np.ones(idx.size)
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(idx.size)
+            weights[idx] += w / scale
+            bias_shift -= float(np.dot(w, mean / scale))
+        else:
+            raise ValueError(f"Cannot fuse transformer '{name}' ({transformer!r}).")
+
+    if offset != coef.size:
+        raise ValueError("Preprocessor output does not match classifier width.")
+    return weights, bias_shift
+
+
+class LinearScorer:
+    """
+    Scores raw model inputs with one dot product and a sigmoid.
+    Accepts a single row, a dense matrix or a scipy.sparse matrix.
+    """
+
+    def __init__(self, weights, bias, feature_names=None):
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.bias = float(bias)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+
+    @classmethod
+    def from_pipeline(cls, model, feature_names=None):
+        """
+        Extracts the scaler statistics and classifier coefficients from a
+        fitted Pipeline into one fused weight vector. If feature_names is
+        given, weights are reordered to that column order.
+        Raises ValueError for pipelines that are not purely affine.
+        """
+        steps = model.steps if isinstance(model, Pipeline) else [("clf", model)]
+        *preprocessing, (_, classifier) = steps
+
+        coef = getattr(classifier, "coef_", None)
+        if coef is None or coef.shape[0] != 1:
+            raise ValueError("Classifier is not a binary linear model.")
+        weights = np.asarray(coef[0], dtype=np.float64)
+        bias = float(np.ravel(classifier.intercept_)[0])
+
+        # fold preprocessing from the classifier backwards onto raw inputs
+        for name, step in reversed(preprocessing):
+            if step is None or step == "passthrough":
+                continue
+            if isinstance(step, ColumnTransformer):
+                weights, shift = _fold_column_transformer(step, weights)
+            elif isinstance(step, StandardScaler):
+                scale = step.scale_ if step.with_std else np.ones_like(weights)
+                mean = step.mean_ if step.with_mean else np.zeros_like(weights)
+                weights, shift = weights / scale, -float(np.dot(weights, mean / scale))
+            else:
+                raise ValueError(f"Cannot fuse pipeline step '{name}'.")
+            bias += shift
+
+        model_names = getattr(model, "feature_names_in_", None)
+        if feature_names is not None and model_names is not None:
+            index = {name: i for i, name in enumerate(model_names)}
+            missing = [f for f in feature_names if f not in index]
+            if missing:
+                raise ValueError(f"Features unknown to the model: {missing[:5]}")
+            weights = weights[[index[f] for f in feature_names]]
+        elif feature_names is None:
+            feature_names = model_names
+
+        return cls(weights, bias, feature_names=feature_names)
+
+    def decision_function(self, X):
+        """Returns the logit for each row of X."""
+        if sparse.issparse(X):
+            return np.asarray(X @ self.weights).ravel() + self.bias
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        return X @ self.weights + self.bias
+
+    def predict_proba(self, X):
+        """Returns [P(failure), P(success)] per row, like sklearn."""
+        p = expit(self.decision_function(X))
+        return np.column_stack([1.0 - p, p])
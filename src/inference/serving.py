@@ -0,0 +1,330 @@
+# src/inference/serving.py
+"""
+Serving state: the models, artifacts and everything compiled from them
+(feature layout, fused scorer, caches) for one version of models/.
+A state is built and validated off to the side, then swapped in as a
+single reference, so requests already holding the old one finish on it.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+
+from src.utils.artifacts import load_artifacts
+from src.utils.tables import read_table
+from src.features.featurizer import ClinicalTrialFeaturizer
+from src.inference.bundle import MANIFEST, bundle_files, load_serving_bundle
+from src.inference.cache import ConditionVectorCache, PredictionCache
+from src.inference.feature_layout import FeatureLayout
+from src.inference.linear_scorer import LinearScorer
+
+DEFAULT_MODEL = "logistic_baseline"
+
+# canned request scored before a freshly loaded state is accepted
+SMOKE_REQUEST = {
+    "phase": "Phase 2",
+    "condition": "Breast Cancer",
+    "sponsor": "OTHER_SPONSOR",
+    "enrollment": 100.0,
+}
+
+
+# attempts at getting a load whose files did not change underneath it
+LOAD_ATTEMPTS = 3
+
+
+def fingerprint_files(paths):
+    """Short sha256 over the contents of the given files, in order."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()[:12]
+
+
+class ServingState:
+    """One consistent set of models/artifacts plus its derived objects."""
+
+    def __init__(self, models=None, artifacts=None, load_stats=None, version=None):
+        self.models = models or {}
+        self.artifacts = artifacts or {}
+        self.load_stats = load_stats or {}
+        self.version = version
+        self.feature_layout = None
+        self.scorer = None
+        self.condition_cache = None
+        self.prediction_cache = PredictionCache(max_size=0)
+
+    @property
+    def ready(self):
+        return DEFAULT_MODEL in self.models and self.feature_layout is not None
+
+    def compile(self, api_params, interim_path=None):
+        """Builds the caches, feature layout and (optionally) fused scorer."""
+        # a fresh prediction cache per state invalidates old predictions
+        self.prediction_cache = PredictionCache(**api_params.get("cache", {}))
+        if not self.models:
+            return self
+
+        featurizer = self.featurizer()
+        self.condition_cache = build_condition_cache(
+            featurizer.tfidf_, api_params.get("condition_cache", {}), interim_path
+        )
+        model = self.models[DEFAULT_MODEL]
+        if isinstance(model, LinearScorer):
+            # a serving bundle's model is the fused scorer already
+            manifest = self.artifacts.get("bundle_manifest", {})
+            self.feature_layout = FeatureLayout(
+                model.feature_names,
+                featurizer,
+                condition_cache=self.condition_cache,
+                sparse=manifest.get("model", {}).get("sparse_input", False),
+            )
+            self.scorer = model
+            print(
+                f"Compiled feature layout ({self.feature_layout.n_features} "
+                "columns) and fused scorer from the serving bundle."
+            )
+            return self
+
+        self.feature_layout = FeatureLayout.from_artifacts(
+            self.models.get(DEFAULT_MODEL),
+            featurizer,
+            condition_cache=self.condition_cache,
+            feature_names=self.artifacts.get("feature_names"),
+        )
+        print(f"Compiled feature layout ({self.feature_layout.n_features} columns).")
+
+        if api_params.get("scoring_engine", "fused") == "fused":
+            try:
+                self.scorer = LinearScorer.from_pipeline(
+                    self.models[DEFAULT_MODEL],
+                    feature_names=self.feature_layout.feature_names,
+                )
+                print("Using fused linear scoring engine.")
+            except (KeyError, ValueError) as e:
+                print(f"Warning: Cannot fuse model ({e}). Using predict_proba.")
+        return self
+
+    def featurizer(self):
+        """
+        The fitted ClinicalTrialFeaturizer artifact, or for models prepared
+        before it existed, one rebuilt from top_sponsors + tfidf_vectorizer.
+        """
+        featurizer = self.artifacts.get("featurizer")
+        if featurizer is None:
+            featurizer = ClinicalTrialFeaturizer.from_artifacts(
+                self.artifacts.get("top_sponsors", []),
+                tfidf=self.artifacts.get("tfidf_vectorizer"),
+            )
+        return featurizer
+
+    def score(self, X):
+        """
+        Returns P(success) for each row of a feature-layout matrix, via the
+        fused engine when available, else the pipeline's predict_proba.
+        """
+        if self.scorer is not None:
+            return self.scorer.predict_proba(X)[:, 1]
+        model = self.models[DEFAULT_MODEL]
+        return model.predict_proba(self.feature_layout.to_frame(X))[:, 1]
+
+    def validate(self):
+        """
+        Checks the models and artifacts belong together and can score.
+        Raises ValueError describing the first problem found.
+        """
+        if not self.ready:
+            raise ValueError(f"Model '{DEFAULT_MODEL}' not loaded.")
+
+        unfilled = self.feature_layout.unfilled_features()
+        if unfilled:
+            raise ValueError(
+                f"Artifacts cannot produce {len(unfilled)} model features "
+                f"(e.g. {unfilled[:3]}); model and artifacts are out of sync."
+            )
+
+        X = self.feature_layout.transform(
+            [SMOKE_REQUEST["phase"]],
+            [SMOKE_REQUEST["condition"]],
+            [SMOKE_REQUEST["sponsor"]],
+            [SMOKE_REQUEST["enrollment"]],
+        )
+        prob = float(self.score(X)[0])
+        if not (math.isfinite(prob) and 0.0 <= prob <= 1.0):
+            raise ValueError(f"Smoke prediction returned {prob}.")
+        return prob
+
+
+def build_condition_cache(tfidf, cache_params, interim_path=None):
+    """
+    Creates the condition-vector cache for a loaded vectorizer and
+    optionally pre-warms it with the most frequent training conditions.
+    """
+    if tfidf is None or not cache_params.get("enabled", True):
+        return None
+
+    cache = ConditionVectorCache(
+        tfidf, max_bytes=cache_params.get("max_bytes", 16 * 1024 * 1024)
+    )
+    prewarm_top = cache_params.get("prewarm_top", 0)
+    if prewarm_top and interim_path and os.path.exists(interim_path):
+        conditions = read_table(interim_path, columns=["conditions"])["conditions"]
+        hot = conditions.fillna("").value_counts().head(prewarm_top).index
+        print(f"Pre-warmed condition cache with {cache.warm(hot)} conditions.")
+    return cache
+
+
+def load_bundle_state(bundle_path, api_params, interim_path=None):
+    """
+    Loads a serving bundle (plain memory-mapped arrays, nothing unpickled)
+    into a compiled ServingState, versioned like load_serving_state.
+    """
+    mmap_mode = api_params.get("loading", {}).get("mmap_mode", "r")
+    for attempt in range(1, LOAD_ATTEMPTS + 1):
+        files = bundle_files(bundle_path)
+        before = fingerprint_files(files)
+        start = time.perf_counter()
+        scorer, featurizer, manifest = load_serving_bundle(bundle_path, mmap_mode)
+        seconds = time.perf_counter() - start
+        if before == fingerprint_files(bundle_files(bundle_path)):
+            version = before
+            break
+        print(f"Warning: serving bundle changed while loading (attempt {attempt}).")
+    else:
+        print("Warning: serving bundle kept changing; serving without a version.")
+        version = None
+
+    size = sum(os.path.getsize(path) for path in files)
+    print(
+        f"Loaded serving bundle from '{bundle_path}' "
+        f"({size / 1024:.1f} KiB in {seconds * 1000:.1f} ms)"
+    )
+    state = ServingState(
+        models={DEFAULT_MODEL: scorer},
+        artifacts={"featurizer": featurizer, "bundle_manifest": manifest},
+        load_stats={
+            "bundle": {
+                "serving_bundle": {
+                    "path": bundle_path,
+                    "bytes": size,
+                    "seconds": seconds,
+                }
+            }
+        },
+        version=version,
+    )
+    return state.compile(api_params, interim_path=interim_path)
+
+
+def load_serving_state(paths_config, api_params):
+    """
+    Loads the serving bundle when one exists (and loading.bundle is on);
+    otherwise, or if it cannot be read, every configured model and artifact
+    exactly once (concurrently, memory-mapped where possible). Returns the
+    compiled ServingState. The bundle only holds the fused scorer, so
+    scoring_engine "sklearn" always loads the pickled pipeline.
+    """
+    loading = api_params.get("loading", {})
+    bundle_path = paths_config.get("serving", {}).get("bundle")
+    use_bundle = (
+        loading.get("bundle", True)
+        and bundle_path
+        and os.path.exists(os.path.join(bundle_path, MANIFEST))
+    )
+    if use_bundle and api_params.get("scoring_engine", "fused") != "fused":
+        print("Scoring engine is sklearn: skipping the serving bundle.")
+        use_bundle = False
+    if use_bundle:
+        try:
+            return load_bundle_state(
+                bundle_path, api_params, interim_path=paths_config["data"]["interim"]
+            )
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: serving bundle not loaded ({e}); using the joblib files.")
+
+    entries = [
+        ("model", name, path) for name, path in paths_config["models"].items()
+    ] + [("artifact", name, path) for name, path in paths_config["artifacts"].items()]
+
+    # hash before and after loading: the version must name what was loaded,
+    # so a retrain landing mid-load forces another attempt
+    version = None
+    for attempt in range(1, LOAD_ATTEMPTS + 1):
+        files = [path for _, _, path in entries if os.path.exists(path)]
+        before = fingerprint_files(files) if files else None
+        loaded, stats = load_artifacts(
+            entries,
+            mmap_mode=loading.get("mmap_mode", "r"),
+            max_workers=loading.get("max_workers"),
+        )
+        after = fingerprint_files(files) if files else None
+        if before == after:
+            version = before
+            break
+        print(f"Warning: model files changed while loading (attempt {attempt}).")
+    else:
+        # unknown version never matches, so the next reload will load again
+        print("Warning: model files kept changing; serving without a version.")
+
+    state = ServingState(
+        models=loaded.get("model", {}),
+        artifacts=loaded.get("artifact", {}),
+        load_stats=stats,
+        version=version,
+    )
+    return state.compile(api_params, interim_path=paths_config["data"]["interim"])
+
+
+def watched_files_signature(paths):
+    """(path, mtime, size) for each existing file; changes when any is replaced."""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        signature.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+
+class ModelDirWatcher(threading.Thread):
+    """
+    Polls the configured model/artifact files and calls on_change once a
+    change has been stable for one full poll interval (so a retrain that
+    rewrites several files triggers a single reload).
+    """
+
+    def __init__(self, paths, on_change, poll_seconds=5.0):
+        super().__init__(name="model-dir-watcher", daemon=True)
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.poll_seconds = poll_seconds
+        self._stop_event = threading.Event()
+
+    def run(self):
+        current = watched_files_signature(self.paths)
+        pending = None
+        while not self._stop_event.wait(self.poll_seconds):
+            latest = watched_files_signature(self.paths)
+            if latest == current:
+                pending = None
+            elif latest == pending:
+                current = latest
+                pending = None
+                try:
+                    self.on_change()
+                except Exception as e:
+                    print(f"Error during watched reload: {e}")
+            else:
+                pending = latest
+
+    def stop(self):
+        self._stop_event.set()
@@ -1,14 +1,15 @@
 # src/inspections/audit_processed.py
 
-import pandas as pd
 import os
 
+from src.utils.tables import read_table
+
 
 def audit_processed_data(filepath):
     print(f"Auditing processed data at {filepath} ...")
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Missing expected file: {filepath}")
-    df = pd.read_csv(filepath)
+    df = read_table(filepath)
 
     print("\n--- DATA OVERVIEW ---")
     print(f"Rows: {len(df)}, Columns: {len(df.columns)}")
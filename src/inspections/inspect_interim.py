@@ -3,6 +3,8 @@
 import pandas as pd
 import os
 
+from src.utils.tables import read_table
+
 
 def inspect_interim_df(filepath):
     print(f"Inspecting interim data at {filepath} ...")
@@ -10,7 +12,7 @@ def inspect_interim_df(filepath):
         print(f"File not found at {filepath}")
         return
     try:
-        df = pd.read_csv(filepath)
+        df = read_table(filepath)
         # basic dimensions
         print("\n1. Data Overview:")
         print(f"   - Rows: {df.shape[0]}")
@@ -3,6 +3,8 @@
 import json
 import os
 
+from src.utils.raw_io import compression_of, is_ndjson, iter_raw_studies
+
 
 def inspect_raw_json(filename):
     print(f"Inspecting raw data at: {filename}...")
@@ -11,6 +13,10 @@ def inspect_raw_json(filename):
         print(f"File not found at {filename}")
         return
 
+    if is_ndjson(filename):
+        inspect_raw_ndjson(filename)
+        return
+
     try:
         with open(filename, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -50,3 +56,33 @@ def inspect_raw_json(filename):
         print("Error: Failed to decode JSON. The file might be corrupt or incomplete.")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+
+
+def inspect_raw_ndjson(filename):
+    """Same report for an NDJSON store, read one study at a time."""
+    try:
+        first_record = None
+        total = 0
+        for study in iter_raw_studies(filename):
+            if first_record is None:
+                first_record = study
+            total += 1
+
+        compression = compression_of(filename)
+        print(f"\n1. Structure Type: NDJSON ({compression or 'uncompressed'})")
+        print(f"2. Total Records: {total}")
+
+        if first_record is not None:
+            print(f"\n 3. Sample Record Keys: {list(first_record.keys())}")
+            print(
+                "\n 4. Sample Content (First 500 chars): "
+                f"{json.dumps(first_record, indent=2)[:500]}"
+                "\n...[truncated]"
+            )
+        else:
+            print("\n3. Warning: Trials list is empty.")
+
+    except json.JSONDecodeError:
+        print("Error: Failed to decode a line. The file might be corrupt.")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
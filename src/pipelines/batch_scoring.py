@@ -0,0 +1,142 @@
+# src/pipelines/batch_scoring.py
+"""
+Offline bulk scoring: reads the interim CSV (or a raw ClinicalTrials.gov
+JSON dump) in chunks, fans the chunks out over a process pool whose
+workers each load the model once, and appends predictions to a CSV in
+input order.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.inference.serving import load_serving_state
+from src.utils.columnar import iter_flat_frames
+from src.utils.raw_io import is_ndjson
+from src.utils.tables import iter_table_chunks
+
+INPUT_COLUMNS = ["nct_id", "phase", "conditions", "sponsor", "enrollment"]
+OUTPUT_COLUMNS = ["nct_id", "prediction", "probability"]
+
+# the serving state loaded by each worker process (see _init_worker)
+_worker_state = None
+
+
+def iter_input_chunks(input_path, chunk_size):
+    """
+    Yields DataFrames of at most chunk_size rows with INPUT_COLUMNS.
+    Raw stores (.json, .ndjson[.gz|.zst]) are flattened with the columnar
+    flattener; anything else is read as an interim dataset (CSV/Parquet).
+    """
+    if input_path.endswith(".json") or is_ndjson(input_path):
+        for frame in iter_flat_frames(input_path, chunk_size):
+            yield frame[INPUT_COLUMNS]
+    else:
+        yield from iter_table_chunks(input_path, chunk_size, columns=INPUT_COLUMNS)
+
+
+def _init_worker(paths_config, api_params):
+    """Process-pool initializer: loads and compiles the model once per worker."""
+    global _worker_state
+    # no request cache or startup pre-warm: every row is scored exactly once
+    params = dict(api_params)
+    params["cache"] = {"max_size": 0}
+    params["condition_cache"] = dict(
+        api_params.get("condition_cache", {}), prewarm_top=0
+    )
+    _worker_state = load_serving_state(paths_config, params)
+    _worker_state.validate()
+
+
+def score_chunk(chunk, state=None):
+    """
+    Scores one chunk with the serving feature layout. Missing values are
+    handled by the featurizer exactly as in preparation: no phase (None or
+    "") is NOT_SPECIFIED, no enrollment takes the training median.
+    """
+    state = state or _worker_state
+    X = state.feature_layout.transform(
+        chunk["phase"],
+        chunk["conditions"],
+        chunk["sponsor"],
+        pd.to_numeric(chunk["enrollment"], errors="coerce").to_numpy(),
+    )
+    probs = np.asarray(state.score(X), dtype=np.float64)
+    return pd.DataFrame(
+        {
+            "nct_id": chunk["nct_id"].to_numpy(),
+            "prediction": np.where(probs > 0.5, "Success", "Failure"),
+            "probability": probs.round(4),
+        },
+        columns=OUTPUT_COLUMNS,
+    )
+
+
+def _scored_chunks(chunks, paths_config, api_params, workers):
+    """Yields scored chunks in input order, keeping a bounded number in flight."""
+    if workers <= 1:
+        _init_worker(paths_config, api_params)
+        for chunk in chunks:
+            yield score_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(paths_config, api_params),
+    ) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(score_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run_scoring_pipeline(
+    input_path, output_path, paths_config, api_params, chunk_size=5000, workers=None
+):
+    """
+    Scores every trial in input_path and writes OUTPUT_COLUMNS to
+    output_path, chunk by chunk. The output is written to a temporary file
+    and moved into place at the end, so a failed run leaves no partial file.
+    """
+    print(f"Scoring trials from {input_path}...")
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+
+    rows = 0
+    start = time.perf_counter()
+    try:
+        with open(tmp_path, "w", newline="") as out:
+            out.write(",".join(OUTPUT_COLUMNS) + "\n")
+            for scored in _scored_chunks(
+                iter_input_chunks(input_path, chunk_size),
+                paths_config,
+                api_params,
+                workers,
+            ):
+                scored.to_csv(out, header=False, index=False)
+                rows += len(scored)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    seconds = time.perf_counter() - start
+    rate = rows / seconds if seconds else float("inf")
+    print(
+        f"Scored {rows} trials with {workers} worker(s) in {seconds:.2f}s "
+        f"({rate:,.0f} rows/s)."
+    )
+    print(f"Predictions saved to {output_path}")
+    return {"rows": rows, "seconds": seconds, "workers": workers}
@@ -1,18 +1,201 @@
 # src/pipelines/data_ingestion.py
 
-from src.utils.ingestion import fetch_trials, save_trials
+import contextlib
+import os
+from datetime import date
+from itertools import chain
 
+from src.utils.checkpoint import IngestCheckpoint, read_json, write_json
+from src.utils.ingestion import (
+    dedupe_studies,
+    fetch_conditions,
+    fetch_partitioned,
+    fetch_resumable,
+    fetch_trials,
+    save_trials,
+    study_id,
+    updated_since_filter,
+)
+from src.utils.raw_io import (
+    RawStudyWriter,
+    is_ndjson,
+    iter_raw_studies,
+    merge_into_store,
+    write_store,
+)
 
-def run_ingestion_pipeline(api_url, output_path, condition, page_size, max_pages):
+
+def run_ingestion_pipeline(
+    api_url,
+    output_path,
+    condition,
+    page_size,
+    max_pages,
+    conditions=None,
+    max_concurrency=4,
+    partition=None,
+    checkpoint_dir=None,
+    state_path=None,
+    delta=False,
+    fields=None,
+):
+    """
+    Fetches one condition, or a list of conditions concurrently
+    (max_concurrency at a time), and saves the studies. With
+    partition.enabled, each condition is instead fetched whole, split
+    into date windows that are paged in parallel (max_pages is ignored).
+    An .ndjson[.gz|.zst] output_path streams each page to disk as it
+    arrives instead of saving one JSON list at the end.
+    With checkpoint_dir (and no partitioning) the run is resumable and
+    can be a delta; see run_checkpointed_ingestion. A fields list (e.g.
+    flattening.STUDY_FIELDS) requests and stores only those paths.
+    """
+    if checkpoint_dir and not (partition and partition.get("enabled")):
+        return run_checkpointed_ingestion(
+            api_url,
+            output_path,
+            conditions or [condition],
+            page_size,
+            max_pages,
+            max_concurrency=max_concurrency,
+            checkpoint_dir=checkpoint_dir,
+            state_path=state_path,
+            delta=delta,
+            fields=fields,
+        )
 
     print("Starting ingestion pipeline...")
-    print(f"Target condition: {condition}")
+    failures = {}
+    streaming = is_ndjson(output_path)
 
-    trials = fetch_trials(
-        api_url=api_url, condition=condition, page_size=page_size, max_pages=max_pages
-    )
-    if trials:
+    with contextlib.ExitStack() as stack:
+        sink = None
+        if streaming:
+            sink = stack.enter_context(RawStudyWriter(output_path, id_of=study_id))
+            print(f"Streaming studies to {output_path}")
+
+        if partition and partition.get("enabled"):
+            targets = conditions or [condition]
+            print(f"Target conditions (partitioned): {', '.join(targets)}")
+            options = {k: v for k, v in partition.items() if k != "enabled"}
+            trials = []
+            for target in targets:
+                studies, failed = fetch_partitioned(
+                    api_url=api_url,
+                    condition=target,
+                    page_size=page_size,
+                    max_concurrency=max_concurrency,
+                    sink=sink,
+                    fields=fields,
+                    **options,
+                )
+                trials.extend(studies)
+                failures.update({f"{target} {w}": e for w, e in failed.items()})
+            trials = dedupe_studies(trials)
+        elif conditions:
+            print(f"Target conditions: {', '.join(conditions)}")
+            trials, failures = fetch_conditions(
+                api_url=api_url,
+                conditions=conditions,
+                page_size=page_size,
+                max_pages=max_pages,
+                max_concurrency=max_concurrency,
+                sink=sink,
+                fields=fields,
+            )
+        else:
+            print(f"Target condition: {condition}")
+            trials = fetch_trials(
+                api_url=api_url,
+                condition=condition,
+                page_size=page_size,
+                max_pages=max_pages,
+                sink=sink,
+                fields=fields,
+            )
+
+    for failed, error in failures.items():
+        print(f"Warning: '{failed}' failed and was skipped ({error}).")
+
+    if streaming:
+        if sink.count:
+            print(f"Saved {sink.count} studies to {output_path}")
+            print("Ingestion pipeline finished successfully.")
+        else:
+            print("Warning: No trials were fetched. The stream file is empty.")
+    elif trials:
         save_trials(trials, output_path)
         print("Ingestion pipeline finished successfully.")
     else:
         print("Warning: No trials were fetched. Nothing was saved.")
+
+
+def run_checkpointed_ingestion(
+    api_url,
+    output_path,
+    conditions,
+    page_size,
+    max_pages,
+    max_concurrency=4,
+    checkpoint_dir="data/raw/checkpoint",
+    state_path=None,
+    delta=False,
+    fields=None,
+):
+    """
+    Resumable ingest: pages land in per-condition part files under
+    checkpoint_dir and the page token is checkpointed after each one, so
+    an interrupted or failed run picks up where it stopped when re-run.
+    Only once every condition is complete is the raw store rewritten:
+    replaced outright by a full run, or, in delta mode, merged by nctId
+    with the studies whose LastUpdatePostDate is on or after the last
+    successful run (recorded in state_path). Returns True on success.
+    """
+    print("Starting ingestion pipeline (checkpointed)...")
+    print(f"Target conditions: {', '.join(conditions)}")
+
+    since = None
+    if delta:
+        since = (read_json(state_path, {}) if state_path else {}).get("last_success")
+        if since is None or not os.path.exists(output_path):
+            print("No previous successful run to diff against; fetching everything.")
+            since = None
+        else:
+            print(f"Delta mode: studies updated since {since}.")
+
+    checkpoint = IngestCheckpoint.open(
+        checkpoint_dir,
+        conditions,
+        since=since,
+        started=date.today().isoformat(),
+        settings={"fields": fields, "page_size": page_size, "max_pages": max_pages},
+    )
+    failures = fetch_resumable(
+        api_url,
+        checkpoint,
+        page_size,
+        max_pages,
+        max_concurrency=max_concurrency,
+        filter_advanced=updated_since_filter(since) if since else None,
+        fields=fields,
+    )
+    if failures:
+        for failed, error in failures.items():
+            print(f"Warning: '{failed}' failed ({error}).")
+        print(f"Ingest incomplete; re-run to resume from {checkpoint_dir}.")
+        return False
+
+    parts = checkpoint.part_paths()
+    if since:
+        updated, added = merge_into_store(output_path, parts, id_of=study_id)
+        print(f"Merged delta into {output_path}: {updated} updated, {added} new.")
+    else:
+        studies = chain.from_iterable(iter_raw_studies(p) for p in parts)
+        count = write_store(output_path, studies, id_of=study_id)
+        print(f"Saved {count} studies to {output_path}")
+
+    if state_path:
+        write_json({"last_success": checkpoint.started}, state_path)
+    checkpoint.clear()
+    print("Ingestion pipeline finished successfully.")
+    return True
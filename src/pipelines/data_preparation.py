@@ -1,20 +1,31 @@
 # src/pipelines/data_preparation.py
 
-import pandas as pd
 import sys
 import os
 
+import pandas as pd
+
+from src.utils.artifacts import save_artifact
 from src.utils.config_loader import load_config
-from src.features.build_features import (
-    clean_phase_column,
-    clean_enrollment_column,
-    encode_target_status,
-    build_sponsor_features,
-    build_conditions_feature,
-)
+from src.utils.tables import processed_schema, read_table, write_sparse, write_table
+from src.features.build_features import encode_target_status
+from src.features.featurizer import DENSE_FEATURES, ClinicalTrialFeaturizer
 
+# interim columns the features are built from (nct_id is not needed)
+INPUT_COLUMNS = ["phase", "status", "enrollment", "conditions", "sponsor"]
 
-def run_preparation_pipeline(input_path, output_path):
+
+def run_preparation_pipeline(
+    input_path, output_path, sparse_path=None, max_features=100, top_sponsors=20
+):
+    """
+    Cleans and featurizes the interim dataset with a ClinicalTrialFeaturizer
+    fit on the labelled rows, saved to artifacts.featurizer for the API.
+    With sparse_path, the sponsor one-hots and TF-IDF terms are kept as one
+    sparse matrix saved there (see tables.write_sparse), and output_path
+    holds only the dense columns (phase flags, enrollment_log, target),
+    row-aligned with it.
+    """
     config = load_config("paths.yaml")
 
     print(f"Loading data from {input_path}...")
@@ -22,32 +33,39 @@ def run_preparation_pipeline(input_path, output_path):
         print(f"Error: Input file not found at {input_path}")
         sys.exit(1)
 
-    df = pd.read_csv(input_path)
+    df = read_table(input_path, columns=INPUT_COLUMNS)
     initial_shape = df.shape
 
     print("Starting data preparation...")
 
-    # Apply cleaning & target encoding
-    df = clean_phase_column(df)
-    df = clean_enrollment_column(df)
+    # Keep the labelled rows; the featurizer learns from exactly these
     df = encode_target_status(df)
 
-    # Apply feature engineering
-    df = build_sponsor_features(
-        df, top_n=20, save_path=config["artifacts"]["top_sponsors"]
-    )
-    df = build_conditions_feature(
-        df, max_features=100, save_path=config["artifacts"]["tfidf_vectorizer"]
+    featurizer = ClinicalTrialFeaturizer(
+        max_features=max_features,
+        top_sponsors=top_sponsors,
+        sparse_output=bool(sparse_path),
     )
+    print(f"   -> Fitting featurizer (top {max_features} TF-IDF features)...")
+    X = featurizer.fit(df).transform(df)
+    save_artifact(featurizer, config["artifacts"]["featurizer"])
+    print(f"   -> Saved featurizer to {config['artifacts']['featurizer']}")
+
+    names = featurizer.get_feature_names_out().tolist()
+    if sparse_path:
+        n_dense = len(DENSE_FEATURES)
+        write_sparse(X[:, n_dense:], names[n_dense:], sparse_path)
+        print(f"Saved sparse features to {sparse_path}.")
+        X, names = X[:, :n_dense].toarray(), names[:n_dense]
 
-    # Apply final cleaning
-    drop_cols = ["nct_id", "phase", "enrollment"]
-    df = df.drop(columns=[c for c in drop_cols if c in df.columns], errors="ignore")
+    processed = pd.DataFrame(X, columns=names)
+    processed["target_outcome"] = df["target_outcome"].to_numpy()
+    schema = processed_schema(processed.columns)
+    processed = processed.astype(schema)
 
     print("Data preparation complete.")
-    print(f"Initial data shape: {initial_shape}, " "Final data shape: {df.shape}")
+    print(f"Initial data shape: {initial_shape}, Final data shape: {processed.shape}")
 
     # Save
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
+    write_table(processed, output_path, schema=schema)
     print(f"Saved processed data to {output_path}.")
@@ -1,32 +1,102 @@
 # src/pipelines/data_transformation.py
 
-import json
+import csv
 import os
+
 import pandas as pd
 
+from src.utils.columnar import iter_flat_frames
 from src.utils.flattening import flatten_study
+from src.utils.raw_io import iter_raw_studies
+from src.utils.tables import (
+    INTERIM_SCHEMA,
+    table_format,
+    write_table,
+    write_table_chunks,
+)
 
 
-def run_transformation_pipeline(input_path, output_path):
+def run_transformation_pipeline(
+    input_path, output_path, streaming=False, chunk_size=10000, workers=1
+):
+    """
+    Flattens the raw store into the interim dataset (CSV, Parquet or
+    Arrow, by output_path's extension). The default path builds one
+    DataFrame with the reference flatten_study; streaming=True parses the
+    store incrementally, flattens chunk_size studies at a time with the
+    columnar flattener (NDJSON stores across `workers` processes) and
+    writes each chunk as it is ready, so peak memory does not grow with the
+    input. Both produce the same file (byte-identical, for CSV).
+    """
     print(f"Loading raw data from {input_path}...")
 
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Raw data file not found: {input_path}")
 
-    with open(input_path, "r") as f:
-        data = json.load(f)
-
-    # Handle both list and dict formats
-    if isinstance(data, list):
-        studies = data
-    elif isinstance(data, dict) and "studies" in data:
-        studies = data["studies"]
-    else:
-        raise ValueError("Unexpected JSON format — " "could not find studies list")
-
-    print(f"Flattening {len(studies)} studies...")
-    flat_records = [flatten_study(study) for study in studies]
-    df = pd.DataFrame(flat_records)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    df.to_csv(output_path, index=False)
+    # JSON list / {"studies": [...]} or NDJSON (optionally compressed)
+    if streaming:
+        frames = iter_flat_frames(input_path, chunk_size, workers)
+        if table_format(output_path) == "csv":
+            rows = write_flat_csv_in_chunks(frames, output_path)
+        else:
+            rows = write_table_chunks(frames, output_path, schema=INTERIM_SCHEMA)
+        print(f"Flattened {rows} studies in chunks of {chunk_size}.")
+    else:
+        studies = iter_raw_studies(input_path)
+        flat_records = [flatten_study(study) for study in studies]
+        print(f"Flattened {len(flat_records)} studies.")
+        df = pd.DataFrame(flat_records)
+        write_table(df, output_path, schema=INTERIM_SCHEMA)
     print(f"Transformed data saved to {output_path}")
+
+
+def write_flat_csv_in_chunks(frames, output_path):
+    """
+    Writes flattened chunks (DataFrames) with the same bytes as one
+    concatenated DataFrame(records).to_csv(). The only column whose dtype
+    pandas infers across rows is enrollment: int64 while every count is an
+    integer, float64 ("100.0") once any is missing or fractional. Chunks
+    follow the dtype seen so far; if a later chunk turns the column float,
+    the rows already written are rewritten in one streaming pass at the end.
+    """
+    rows = 0
+    integral = True
+    rewrite = False
+    columns = None
+
+    with open(output_path, "w", newline="") as out:
+        for chunk in frames:
+            chunk_integral = chunk["enrollment"].dtype.kind in "iu"
+            if columns is None:
+                columns = list(chunk.columns)
+                integral = chunk_integral
+            elif integral and not chunk_integral:
+                integral = False
+                rewrite = True
+            if not integral:
+                chunk["enrollment"] = chunk["enrollment"].astype("float64")
+            chunk.to_csv(out, index=False, header=rows == 0)
+            rows += len(chunk)
+
+        if columns is None:
+            # no studies: same (empty) file as an empty DataFrame
+            out.write(pd.DataFrame([]).to_csv(index=False))
+
+    if rewrite:
+        _rewrite_column_as_float(output_path, columns.index("enrollment"))
+    return rows
+
+
+def _rewrite_column_as_float(path, col):
+    """Streams the CSV through csv (as pandas writes it), floating one column."""
+    tmp_path = f"{path}.tmp"
+    with open(path, newline="") as src, open(tmp_path, "w", newline="") as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst, lineterminator="\n", quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(next(reader))
+        for row in reader:
+            if row[col]:
+                row[col] = repr(float(row[col]))
+            writer.writerow(row)
+    os.replace(tmp_path, path)
@@ -0,0 +1,277 @@
+# src/pipelines/incremental_training.py
+"""
+Out-of-core training: the processed dataset is read in chunks and never
+held in memory whole. Rows are split into train/test by a hash of their
+position, the enrollment_log scaler accumulates its statistics chunk by
+chunk, a log-loss SGDClassifier is fit with partial_fit over a few
+epochs, and the test metrics are accumulated from fixed-size histograms.
+The result has the same Pipeline shape as run_training_pipeline's, so the
+API (and its fused LinearScorer) serve it unchanged.
+"""
+
+import os
+import sys
+import time
+
+import mlflow
+import mlflow.sklearn
+import numpy as np
+from mlflow.models import infer_signature
+from scipy import sparse
+from sklearn.linear_model import SGDClassifier
+
+from src.pipelines.model_training import (
+    build_model_pipeline,
+    get_feature_importance,
+    load_featurizer,
+    log_feature_importance,
+    save_serving_bundle,
+)
+from src.utils.artifacts import save_artifact
+from src.utils.tables import iter_table_chunks, read_sparse
+
+TARGET = "target_outcome"
+CLASSES = np.array([0, 1])
+
+
+def hashed_test_mask(start, n, test_fraction, seed=42):
+    """
+    True for the rows (global positions start..start+n) in the test split.
+    Each position is hashed (splitmix64) to a uniform draw, so the split
+    does not depend on the chunk size and needs no shuffle of the dataset.
+    """
+    z = np.arange(start, start + n, dtype=np.uint64) + np.uint64(seed)
+    z = z * np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)) / float(1 << 53) < test_fraction
+
+
+class StreamingMetrics:
+    """
+    evaluation_metrics() accumulated over batches: confusion counts at the
+    predicted label, and per-class histograms of the decision function for
+    ROC-AUC, exact up to ties within one of n_bins bins. The bins are
+    uniform in arcsinh(logit): fine near 0, and wide enough for the large
+    logits at which probabilities have long saturated to 0 or 1.
+    """
+
+    def __init__(self, n_bins=2**16, max_asinh=12.0):
+        self.n_bins = n_bins
+        self.max_asinh = max_asinh
+        self.positives = np.zeros(n_bins, dtype=np.int64)
+        self.negatives = np.zeros(n_bins, dtype=np.int64)
+        self.tp = self.fp = self.fn = 0
+
+    def update(self, y_true, y_pred, y_score):
+        y_true = np.asarray(y_true) == 1
+        y_pred = np.asarray(y_pred) == 1
+        self.tp += int(np.sum(y_true & y_pred))
+        self.fp += int(np.sum(~y_true & y_pred))
+        self.fn += int(np.sum(y_true & ~y_pred))
+        scaled = (np.arcsinh(y_score) / self.max_asinh + 1) / 2 * self.n_bins
+        bins = np.clip(scaled, 0, self.n_bins - 1).astype(np.intp)
+        self.positives += np.bincount(bins[y_true], minlength=self.n_bins)
+        self.negatives += np.bincount(bins[~y_true], minlength=self.n_bins)
+
+    def result(self):
+        n_pos, n_neg = self.positives.sum(), self.negatives.sum()
+        # each positive outranks the negatives in lower bins; ties count half
+        below = np.cumsum(self.negatives) - self.negatives
+        wins = np.dot(self.positives, below + 0.5 * self.negatives)
+        predicted, actual = self.tp + self.fp, self.tp + self.fn
+        precision = self.tp / predicted if predicted else 0.0
+        recall = self.tp / actual if actual else 0.0
+        f1 = 2 * self.tp / (predicted + actual) if self.tp else 0.0
+        return {
+            "roc_auc": float(wins / (n_pos * n_neg)) if n_pos and n_neg else np.nan,
+            "precision_class_1": precision,
+            "recall_class_1": recall,
+            "f1_class_1": f1,
+        }
+
+
+def iter_splits(input_path, chunk_size, test_fraction, sparse_block=None):
+    """
+    Yields (dense_names, X_train, y_train, X_test, y_test) per chunk of the
+    processed dataset. X is a float DataFrame, or CSR with the matching
+    rows of sparse_block appended when it is given.
+    """
+    start = 0
+    for chunk in iter_table_chunks(input_path, chunk_size):
+        y = chunk.pop(TARGET).to_numpy()
+        X = chunk.astype(float)
+        names, n = list(X.columns), len(X)
+        if sparse_block is not None:
+            if start + n > sparse_block.shape[0]:
+                raise ValueError("the sparse block has fewer rows")
+            X = sparse.hstack(
+                [sparse.csr_matrix(X.to_numpy()), sparse_block[start : start + n]],
+                format="csr",
+            )
+        test = hashed_test_mask(start, n, test_fraction)
+        start += n
+        yield names, X[~test], y[~test], X[test], y[test]
+    if sparse_block is not None and start != sparse_block.shape[0]:
+        raise ValueError("the sparse block has more rows")
+
+
+def _take(X, rows):
+    return X.iloc[rows] if hasattr(X, "iloc") else X[rows]
+
+
+def run_incremental_training_pipeline(
+    input_path: str,
+    model_path: str,
+    sparse_path: str = None,
+    feature_names_path: str = None,
+    featurizer_path: str = None,
+    bundle_path: str = None,
+    chunk_size: int = 100000,
+    epochs: int = 5,
+    alpha: float = 0.0001,
+    test_fraction: float = 0.2,
+):
+    """
+    run_training_pipeline for datasets larger than memory: one pass for the
+    scaler statistics and class counts, `epochs` passes of partial_fit (rows
+    shuffled within each chunk) and one pass over the test rows. Peak memory
+    is a few chunks' worth, plus the sparse block when sparse_path is given
+    (it is loaded once, compressed as CSR, and sliced per chunk). The
+    outputs are saved like run_training_pipeline's.
+    """
+    print("Starting Incremental Model Training (with MLflow)...")
+    print(f"Streaming data from {input_path} in chunks of {chunk_size} rows...")
+
+    mlflow.set_experiment("clinical_trials_outcome")
+
+    if not os.path.exists(input_path):
+        print(f"CRITICAL: Input data file {input_path} does not exists.")
+        sys.exit(1)
+
+    sparse_block, sparse_names = None, []
+    if sparse_path:
+        sparse_block, sparse_names = read_sparse(sparse_path)
+
+    def splits():
+        try:
+            yield from iter_splits(input_path, chunk_size, test_fraction, sparse_block)
+        except ValueError as e:
+            print(f"CRITICAL: {sparse_path} does not match {input_path} ({e}).")
+            print("Re-run preparation.")
+            sys.exit(1)
+
+    with mlflow.start_run():
+        start = time.perf_counter()
+        # pass 1: scaler statistics and class counts over the training rows
+        pipeline = None
+        counts = np.zeros(len(CLASSES), dtype=np.int64)
+        for names, X_train, y_train, _, _ in splits():
+            if not len(y_train):
+                # a chunk (e.g. a small tail) can hash entirely to the test split
+                continue
+            if pipeline is None:
+                feature_names = names + sparse_names
+                pipeline = build_model_pipeline(
+                    feature_names,
+                    sparse_input=bool(sparse_path),
+                    classifier=SGDClassifier(
+                        loss="log_loss", alpha=alpha, average=True, random_state=42
+                    ),
+                )
+                # the first non-empty chunk fits the scaler, the others update it
+                preprocessor = pipeline.named_steps["preprocessor"].fit(X_train)
+                scaler = preprocessor.named_transformers_["num"]
+                columns = preprocessor.transformers_[0][2]
+                input_example = X_train[:5]
+            elif len(columns):
+                scaler.partial_fit(
+                    X_train[:, columns] if sparse_path else X_train[columns]
+                )
+            counts += np.bincount(y_train, minlength=len(CLASSES))
+
+        if pipeline is None or not counts.all():
+            print(f"CRITICAL: {input_path} needs training rows of both classes.")
+            sys.exit(1)
+        print(f"Training rows: {counts.sum()} ({dict(zip(CLASSES, counts))})")
+        print(f"Features detected: {len(feature_names)}")
+
+        # passes 2..: partial_fit, classes weighted like class_weight="balanced"
+        classifier = pipeline.named_steps["classifier"]
+        classifier.set_params(
+            class_weight={
+                c: counts.sum() / (len(CLASSES) * n) for c, n in zip(CLASSES, counts)
+            }
+        )
+        rng = np.random.default_rng(42)
+        print("Training the model...")
+        for epoch in range(epochs):
+            for _, X_train, y_train, _, _ in splits():
+                if not len(y_train):
+                    continue
+                rows = rng.permutation(len(y_train))
+                classifier.partial_fit(
+                    preprocessor.transform(_take(X_train, rows)),
+                    y_train[rows],
+                    classes=CLASSES,
+                )
+            print(f"  epoch {epoch + 1}/{epochs} done")
+        train_seconds = time.perf_counter() - start
+        print(f"Model training complete in {train_seconds:.1f}s.\n")
+
+        # last pass: test metrics
+        metrics = StreamingMetrics()
+        for _, _, _, X_test, y_test in splits():
+            if len(y_test):
+                metrics.update(
+                    y_test,
+                    pipeline.predict(X_test),
+                    pipeline.decision_function(X_test),
+                )
+        metrics = {**metrics.result(), "train_seconds": train_seconds}
+
+        print("--- Evaluation on Test Set ---")
+        for name, value in metrics.items():
+            print(f"{name:<20} {value:.4f}")
+        input_names = feature_names if sparse_path else None
+        get_feature_importance(pipeline, top_n=10, input_names=input_names)
+
+        mlflow.log_params(
+            {
+                "model_type": "SGDClassifier",
+                "loss": "log_loss",
+                "alpha": alpha,
+                "class_weight": "balanced",
+                "epochs": epochs,
+                "chunk_size": chunk_size,
+                "test_size": test_fraction,
+                "sparse_features": bool(sparse_path),
+                "n_features": len(feature_names),
+            }
+        )
+        mlflow.log_metrics(metrics)
+        print(f"Logged Metrics: ROC-AUC={metrics['roc_auc']:.4f}\n")
+
+        mlflow.sklearn.log_model(
+            sk_model=pipeline,
+            name="model",
+            input_example=input_example,
+            signature=infer_signature(input_example, pipeline.predict(input_example)),
+        )
+        log_feature_importance(pipeline, input_names)
+
+    # save model
+    save_artifact(pipeline, model_path)
+    print(f"Model saved to: {model_path}")
+    if feature_names_path:
+        save_artifact(feature_names, feature_names_path)
+        print(f"Feature names saved to: {feature_names_path}")
+    if bundle_path:
+        save_serving_bundle(
+            pipeline,
+            load_featurizer(featurizer_path),
+            bundle_path,
+            feature_names=feature_names,
+        )
+    return metrics
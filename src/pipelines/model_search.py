@@ -0,0 +1,262 @@
+# src/pipelines/model_search.py
+"""
+Hyperparameter search: featurization settings (top_sponsors, max_features)
+x LogisticRegression settings (C, penalty, solver), fanned out over a
+process pool. Each featurization is fit once on the training rows and
+cached on disk; every candidate sharing it loads the cached matrices
+(memory-mapped, once per worker). Candidates are logged as nested MLflow
+runs under one parent run, and the best pipeline (by test ROC-AUC) is
+saved together with the featurizer it was trained on. These outputs have
+their own paths (paths.yaml search), apart from the prepare/train ones:
+the featurizer is fit on the search's training split only.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mlflow
+import mlflow.sklearn
+import pandas as pd
+from mlflow.models import infer_signature
+from scipy import sparse
+from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
+
+from src.features.build_features import encode_target_status
+from src.features.featurizer import ClinicalTrialFeaturizer
+from src.pipelines.data_preparation import INPUT_COLUMNS
+from src.pipelines.model_training import (
+    build_model_pipeline,
+    evaluation_metrics,
+    save_serving_bundle,
+)
+from src.utils.artifacts import load_artifact, save_artifact
+from src.utils.checkpoint import write_json
+from src.utils.tables import read_table
+
+FEATURE_PARAMS = ["top_sponsors", "max_features"]
+MODEL_PARAMS = ["C", "penalty", "solver"]
+# used for any parameter the grid leaves out
+DEFAULTS = {
+    "top_sponsors": 20,
+    "max_features": 100,
+    "C": 1.0,
+    "penalty": "l2",
+    "solver": "lbfgs",
+}
+# solvers that can fit an L1 penalty
+L1_SOLVERS = {"liblinear", "saga"}
+
+# per worker process: cache path -> loaded features (see _fit_candidate)
+_loaded_features = {}
+
+
+def candidate_grid(grid):
+    """
+    Every combination of the grid's value lists, as dicts. Penalty/solver
+    pairs the solver cannot fit (l1 with lbfgs, ...) are skipped.
+    """
+    keys = FEATURE_PARAMS + MODEL_PARAMS
+    values = [grid.get(key) or [DEFAULTS[key]] for key in keys]
+    candidates = []
+    for combo in itertools.product(*values):
+        candidate = dict(zip(keys, combo))
+        if candidate["penalty"] == "l1" and candidate["solver"] not in L1_SOLVERS:
+            continue
+        candidates.append(candidate)
+    return candidates
+
+
+def classifier_params(candidate):
+    """LogisticRegression keyword arguments for a candidate."""
+    # sklearn expresses the penalty as l1_ratio (0 = l2, 1 = l1)
+    return {
+        "C": float(candidate["C"]),
+        "solver": candidate["solver"],
+        "l1_ratio": 1.0 if candidate["penalty"] == "l1" else 0.0,
+    }
+
+
+def _feature_key(candidate):
+    return tuple(candidate[p] for p in FEATURE_PARAMS)
+
+
+def _init_worker():
+    """One BLAS/OpenMP thread per process, so parallel fits don't oversubscribe."""
+    threadpool_limits(1)
+
+
+def _featurize(train, test, key, sparse_output, cache_dir):
+    """
+    Fits one featurization on the training rows and caches the featurizer
+    with both transformed splits in cache_dir. Returns the cache path.
+    """
+    top_sponsors, max_features = key
+    featurizer = ClinicalTrialFeaturizer(
+        max_features=max_features,
+        top_sponsors=top_sponsors,
+        sparse_output=sparse_output,
+    ).fit(train)
+    path = os.path.join(cache_dir, f"features_{top_sponsors}_{max_features}.joblib")
+    save_artifact(
+        {
+            "featurizer": featurizer,
+            "X_train": featurizer.transform(train),
+            "X_test": featurizer.transform(test),
+            "y_train": train["target_outcome"].to_numpy(),
+            "y_test": test["target_outcome"].to_numpy(),
+        },
+        path,
+    )
+    return path
+
+
+def _model_input(X, names):
+    """Dense features go in as a DataFrame: the scaler selects by name."""
+    return X if sparse.issparse(X) else pd.DataFrame(X, columns=names, copy=False)
+
+
+def _fit_candidate(candidate, path):
+    """Fits and scores one candidate on its cached features."""
+    data = _loaded_features.get(path)
+    if data is None:
+        data, _ = load_artifact(path)
+        _loaded_features[path] = data
+    names = data["featurizer"].get_feature_names_out().tolist()
+    X_train = _model_input(data["X_train"], names)
+    X_test = _model_input(data["X_test"], names)
+
+    pipeline = build_model_pipeline(
+        names,
+        sparse_input=sparse.issparse(X_train),
+        classifier_params=classifier_params(candidate),
+    )
+    start = time.perf_counter()
+    pipeline.fit(X_train, data["y_train"])
+    fit_seconds = time.perf_counter() - start
+
+    metrics = evaluation_metrics(
+        data["y_test"], pipeline.predict(X_test), pipeline.predict_proba(X_test)[:, 1]
+    )
+    metrics["fit_seconds"] = fit_seconds
+    return metrics, pipeline
+
+
+def _run_name(candidate):
+    return " ".join(f"{k}={candidate[k]}" for k in FEATURE_PARAMS + MODEL_PARAMS)
+
+
+def run_search_pipeline(
+    input_path,
+    model_path,
+    featurizer_path,
+    feature_names_path=None,
+    bundle_path=None,
+    results_path=None,
+    grid=None,
+    workers=None,
+    sparse_output=False,
+    test_size=0.2,
+):
+    """
+    Searches the grid on the interim dataset (featurization is part of the
+    search, so it starts before preparation) and saves the best pipeline to
+    model_path, its featurizer to featurizer_path, its input column order
+    to feature_names_path and both as a serving bundle to bundle_path.
+    Returns the best candidate and metrics (also written to results_path).
+    """
+    print("Starting hyperparameter search (with MLflow)...")
+    if not os.path.exists(input_path):
+        print(f"CRITICAL: Input data file {input_path} does not exists.")
+        sys.exit(1)
+
+    mlflow.set_experiment("clinical_trials_outcome")
+    df = encode_target_status(read_table(input_path, columns=INPUT_COLUMNS))
+    # one split for every candidate, so their scores are comparable
+    train, test = train_test_split(
+        df, test_size=test_size, random_state=42, stratify=df["target_outcome"]
+    )
+
+    candidates = candidate_grid(grid or {})
+    feature_keys = sorted({_feature_key(c) for c in candidates})
+    workers = workers or os.cpu_count() or 1
+    print(
+        f"{len(candidates)} candidates over {len(feature_keys)} featurizations, "
+        f"{workers} worker(s)."
+    )
+
+    start = time.perf_counter()
+    best = None
+    with tempfile.TemporaryDirectory() as cache_dir:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        with pool, mlflow.start_run(run_name="search"):
+            mlflow.log_params(
+                {
+                    "candidates": len(candidates),
+                    "workers": workers,
+                    "test_size": test_size,
+                }
+            )
+
+            # fitted preprocessing: each featurization once, shared by its candidates
+            futures = {
+                key: pool.submit(_featurize, train, test, key, sparse_output, cache_dir)
+                for key in feature_keys
+            }
+            paths = {key: future.result() for key, future in futures.items()}
+            print(f"Featurized in {time.perf_counter() - start:.1f}s.")
+
+            futures = [
+                pool.submit(_fit_candidate, candidate, paths[_feature_key(candidate)])
+                for candidate in candidates
+            ]
+            # results are logged as they arrive, in grid order
+            for candidate, future in zip(candidates, futures):
+                metrics, pipeline = future.result()
+                with mlflow.start_run(run_name=_run_name(candidate), nested=True):
+                    mlflow.log_params(candidate)
+                    mlflow.log_metrics(metrics)
+                print(f"  {_run_name(candidate):<60} ROC-AUC={metrics['roc_auc']:.4f}")
+                if best is None or metrics["roc_auc"] > best[1]["roc_auc"]:
+                    best = (candidate, metrics, pipeline)
+
+            candidate, metrics, pipeline = best
+            data, _ = load_artifact(paths[_feature_key(candidate)], mmap_mode=None)
+            seconds = time.perf_counter() - start
+            mlflow.log_params({f"best_{k}": v for k, v in candidate.items()})
+            mlflow.log_metrics({**metrics, "search_seconds": seconds})
+
+            names = data["featurizer"].get_feature_names_out().tolist()
+            input_example = _model_input(data["X_train"][:5], names)
+            mlflow.sklearn.log_model(
+                sk_model=pipeline,
+                name="model",
+                input_example=input_example,
+                signature=infer_signature(
+                    input_example, pipeline.predict(input_example)
+                ),
+            )
+
+    print(f"\nSearch finished in {seconds:.1f}s.")
+    print(f"Best: {_run_name(candidate)} (ROC-AUC={metrics['roc_auc']:.4f})")
+
+    save_artifact(pipeline, model_path)
+    save_artifact(data["featurizer"], featurizer_path)
+    print(f"Model saved to: {model_path}")
+    print(f"Featurizer saved to: {featurizer_path}")
+    if feature_names_path:
+        save_artifact(names, feature_names_path)
+        print(f"Feature names saved to: {feature_names_path}")
+    if bundle_path:
+        save_serving_bundle(
+            pipeline, data["featurizer"], bundle_path, feature_names=names
+        )
+    result = {"candidate": candidate, "metrics": metrics, "seconds": seconds}
+    if results_path:
+        write_json(result, results_path)
+        print(f"Best parameters saved to: {results_path}")
+    return result
@@ -1,8 +1,8 @@
 # src/pipelines/model_training.py
 
 import pandas as pd
-import joblib
 import os
+import shutil
 import sys
 import mlflow
 import mlflow.sklearn
@@ -13,9 +13,28 @@ from sklearn.metrics import classification_report, roc_auc_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from scipy import sparse
 
+from src.inference.bundle import export_serving_bundle
+from src.utils.artifacts import load_artifact, save_artifact
+from src.utils.tables import read_sparse, read_table
 
-def get_feature_importance(pipeline, top_n=20):
+
+def output_feature_names(preprocessor, input_names=None):
+    """
+    Names of the preprocessor's output columns. A model fit on a (sparse)
+    matrix only knows column indices, so their names come from input_names.
+    """
+    if input_names is None:
+        return preprocessor.get_feature_names_out()
+    names = []
+    for _, transformer, columns in preprocessor.transformers_:
+        if transformer != "drop":
+            names += [input_names[i] for i in columns]
+    return names
+
+
+def get_feature_importance(pipeline, top_n=20, input_names=None):
     """
     Extracts and prints the top positive and
     negative coefficients from the model.
@@ -28,7 +47,7 @@ def get_feature_importance(pipeline, top_n=20):
 
     # get feature names from preprocessor
     try:
-        feature_names = preprocessor.get_feature_names_out()
+        feature_names = output_feature_names(preprocessor, input_names)
     except AttributeError:
         print("Warning: Unable to extract feature names from preprocessor.")
         return
@@ -66,9 +85,116 @@ def get_feature_importance(pipeline, top_n=20):
         print("   (No negative features found)")
 
 
-def run_training_pipeline(input_path: str, model_path: str):
+def log_feature_importance(pipeline, input_names=None):
+    """Logs every coefficient, sorted, as feature_importance.csv to the MLflow run."""
+    try:
+        model = pipeline.named_steps["classifier"]
+        names_out = output_feature_names(
+            pipeline.named_steps["preprocessor"], input_names
+        )
+        coeffs = model.coef_[0]
+
+        imp_df = pd.DataFrame({"Feature": names_out, "Coefficient": coeffs})
+        imp_df = imp_df.sort_values(by="Coefficient", ascending=False)
+
+        # Save to temp file then log it
+        imp_df.to_csv("feature_importance.csv", index=False)
+        mlflow.log_artifact("feature_importance.csv")
+        os.remove("feature_importance.csv")  # cleanup
+    except Exception as e:
+        print(f"Skipping feature importance logging: {e}")
+
+
+def save_serving_bundle(pipeline, featurizer, bundle_path, feature_names=None):
+    """
+    Exports the serving bundle for a trained pipeline and its featurizer.
+    If it cannot be exported, any previous bundle is removed, so the API
+    falls back to the joblib files rather than serve an older model.
+    """
+    try:
+        if featurizer is None:
+            raise ValueError("no featurizer artifact")
+        export_serving_bundle(
+            pipeline, featurizer, bundle_path, feature_names=feature_names
+        )
+    except ValueError as e:
+        print(f"Warning: serving bundle not exported ({e}).")
+        shutil.rmtree(bundle_path, ignore_errors=True)
+        return
+    print(f"Serving bundle exported to: {bundle_path}")
+
+
+def load_featurizer(featurizer_path):
+    """The featurizer artifact saved by preparation, or None if there is none."""
+    if not featurizer_path or not os.path.exists(featurizer_path):
+        return None
+    return load_artifact(featurizer_path, mmap_mode=None)[0]
+
+
+def evaluation_metrics(y_test, y_pred, y_proba):
+    """Test-set metrics logged to MLflow for every trained model."""
+    report = classification_report(y_test, y_pred, output_dict=True)
+    return {
+        "roc_auc": roc_auc_score(y_test, y_proba),
+        "precision_class_1": report["1"]["precision"],
+        "recall_class_1": report["1"]["recall"],
+        "f1_class_1": report["1"]["f1-score"],
+    }
+
+
+def build_model_pipeline(
+    feature_names, sparse_input=False, classifier_params=None, classifier=None
+):
     """
-    Trains a Logistic Regression model and saves it
+    Scaler on enrollment_log + balanced LogisticRegression. For a sparse
+    input matrix, columns are selected by position and the scaler does not
+    center (that would densify the matrix). classifier_params override the
+    LogisticRegression defaults (e.g. C, solver; see model_search);
+    classifier replaces it altogether (see incremental_training).
+    """
+    # only need to scale 'enrollment_log'...everything else is already 0-1
+    numeric_features = ["enrollment_log"]
+    # ensure column exists
+    numeric_features = [col for col in numeric_features if col in feature_names]
+    scaler = StandardScaler()
+    if sparse_input:
+        numeric_features = [list(feature_names).index(c) for c in numeric_features]
+        scaler = StandardScaler(with_mean=False)
+
+    preprocessor = ColumnTransformer(
+        transformers=[("num", scaler, numeric_features)],
+        remainder="passthrough",  # don't touch other columns
+    )
+
+    if classifier is None:
+        classifier = LogisticRegression(
+            **{
+                "class_weight": "balanced",
+                "max_iter": 1000,
+                "random_state": 42,
+                **(classifier_params or {}),
+            }
+        )
+
+    # build model pipeline
+    return Pipeline(steps=[("preprocessor", preprocessor), ("classifier", classifier)])
+
+
+def run_training_pipeline(
+    input_path: str,
+    model_path: str,
+    sparse_path: str = None,
+    feature_names_path: str = None,
+    featurizer_path: str = None,
+    bundle_path: str = None,
+):
+    """
+    Trains a Logistic Regression model and saves it. With sparse_path (the
+    sparse sponsor/TF-IDF block written by preparation), the dense columns
+    are stacked alongside it and the model is fit on one CSR matrix. The
+    model's input column order is saved to feature_names_path for serving,
+    and with bundle_path the model and the featurizer at featurizer_path
+    are exported as a serving bundle (see src/inference/bundle.py).
     """
     print("Starting Model Training (with MLflow)...")
     print(f"Loading data from {input_path}...")
@@ -79,7 +205,7 @@ def run_training_pipeline(input_path: str, model_path: str):
         print(f"CRITICAL: Input data file {input_path} does not exists.")
         sys.exit(1)
 
-    df = pd.read_csv(input_path)
+    df = read_table(input_path)
     print("Data loaded successfully.")
 
     target_col = "target_outcome"
@@ -90,12 +216,24 @@ def run_training_pipeline(input_path: str, model_path: str):
     X = df.drop(columns=[target_col])
     y = df[target_col]
 
-    print(f"Features detected: {X.shape[1]}")
-    print(f"Target distribution:\n{y.value_counts(normalize=True)}")
-
     # silence MLflow warning
     # logistic regression uses floats anyway
     X = X.astype(float)
+    feature_names = list(X.columns)
+
+    if sparse_path:
+        features, sparse_names = read_sparse(sparse_path)
+        if features.shape[0] != len(X):
+            print(
+                f"CRITICAL: {sparse_path} has {features.shape[0]} rows, "
+                f"{input_path} has {len(X)}; re-run preparation."
+            )
+            sys.exit(1)
+        X = sparse.hstack([sparse.csr_matrix(X.to_numpy()), features], format="csr")
+        feature_names += sparse_names
+
+    print(f"Features detected: {X.shape[1]}")
+    print(f"Target distribution:\n{y.value_counts(normalize=True)}")
 
     # train/test split
     X_train, X_test, y_train, y_test = train_test_split(
@@ -109,30 +247,13 @@ def run_training_pipeline(input_path: str, model_path: str):
             "solver": "liblinear",
             "max_iter": 1000,
             "test_size": 0.2,
+            "sparse_features": bool(sparse_path),
+            "n_features": X.shape[1],
         }
         mlflow.log_params(params)
 
-        # only need to scale 'enrollment_log'...everything else is already 0-1
-        numeric_features = ["enrollment_log"]
-        # ensure column exists
-        numeric_features = [col for col in numeric_features if col in X.columns]
-
-        preprocessor = ColumnTransformer(
-            transformers=[("num", StandardScaler(), numeric_features)],
-            remainder="passthrough",  # don't touch other columns
-        )
-
-        # build model pipeline
-        model_pipeline = Pipeline(
-            steps=[
-                ("preprocessor", preprocessor),
-                (
-                    "classifier",
-                    LogisticRegression(
-                        class_weight="balanced", max_iter=1000, random_state=42
-                    ),
-                ),
-            ]
+        model_pipeline = build_model_pipeline(
+            feature_names, sparse_input=bool(sparse_path)
         )
 
         print("Training the model...")
@@ -148,21 +269,14 @@ def run_training_pipeline(input_path: str, model_path: str):
         # terminal report
         print(classification_report(y_test, y_pred))
         # analyze feature importance
-        get_feature_importance(model_pipeline, top_n=10)
+        input_names = feature_names if sparse_path else None
+        get_feature_importance(model_pipeline, top_n=10, input_names=input_names)
 
-        roc = roc_auc_score(y_test, y_proba)
-        report = classification_report(y_test, y_pred, output_dict=True)
-
-        metrics = {
-            "roc_auc": roc,
-            "precision_class_1": report["1"]["precision"],
-            "recall_class_1": report["1"]["recall"],
-            "f1_class_1": report["1"]["f1-score"],
-        }
+        metrics = evaluation_metrics(y_test, y_pred, y_proba)
         mlflow.log_metrics(metrics)
-        print(f"Logged Metrics: ROC-AUC={roc:.4f}\n")
+        print(f"Logged Metrics: ROC-AUC={metrics['roc_auc']:.4f}\n")
 
-        input_example = X_train.iloc[:5]
+        input_example = X_train[:5]
         signature = infer_signature(
             input_example, model_pipeline.predict(input_example)
         )
@@ -175,24 +289,18 @@ def run_training_pipeline(input_path: str, model_path: str):
             signature=signature,
         )
 
-        try:
-            model = model_pipeline.named_steps["classifier"]
-            feature_names = model_pipeline.named_steps[
-                "preprocessor"
-            ].get_feature_names_out()
-            coeffs = model.coef_[0]
-
-            imp_df = pd.DataFrame({"Feature": feature_names, "Coefficient": coeffs})
-            imp_df = imp_df.sort_values(by="Coefficient", ascending=False)
-
-            # Save to temp file then log it
-            imp_df.to_csv("feature_importance.csv", index=False)
-            mlflow.log_artifact("feature_importance.csv")
-            os.remove("feature_importance.csv")  # cleanup
-        except Exception as e:
-            print(f"Skipping feature importance logging: {e}")
+        log_feature_importance(model_pipeline, input_names)
 
     # save model
-    os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(model_pipeline, model_path)
+    save_artifact(model_pipeline, model_path)
     print(f"Model saved to: {model_path}")
+    if feature_names_path:
+        save_artifact(feature_names, feature_names_path)
+        print(f"Feature names saved to: {feature_names_path}")
+    if bundle_path:
+        save_serving_bundle(
+            model_pipeline,
+            load_featurizer(featurizer_path),
+            bundle_path,
+            feature_names=feature_names,
+        )
@@ -0,0 +1,377 @@
+# src/pipelines/pipeline_runner.py
+"""
+DAG runner for the data/model pipeline (make all). Each stage declares
+the dataset paths it reads and writes, the config keys and the code it
+depends on; dependencies follow from the paths. A stage is skipped when
+the fingerprint of those inputs matches its last successful run and its
+outputs are unchanged since. Stages whose dependencies are done run
+concurrently (audits alongside the next stage) in a process pool.
+
+File hashes are cached in the state file by (size, mtime), so a no-op run
+only stats files. Because the fingerprint covers input contents, a stage
+that rewrites identical output does not trigger its downstream stages.
+"""
+
+import hashlib
+import json
+import os
+import runpy
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from src.utils.checkpoint import read_json, write_json
+from src.utils.config_loader import PROJECT_ROOT
+
+
+class Stage:
+    """
+    One pipeline step. target is a module run as __main__ (the same entry
+    script as its make target) or a picklable callable. inputs/outputs are
+    keys into paths.yaml (e.g. "data.interim"), config holds dotted keys
+    into the loaded configs (e.g. "params.features") and code lists source
+    files or directories whose .py files are hashed. A manual stage runs
+    only when it is one of the targets (not on a plain make all). With
+    max_age (seconds), a stage is also out of date once its last run is
+    that old; 0 runs it every time (e.g. ingest, whose upstream is the API).
+    """
+
+    def __init__(
+        self,
+        name,
+        target,
+        inputs=(),
+        outputs=(),
+        config=(),
+        code=(),
+        manual=False,
+        max_age=None,
+    ):
+        self.name = name
+        self.target = target
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.config = list(config)
+        self.code = list(code)
+        self.manual = manual
+        self.max_age = max_age
+
+
+def default_stages(ingest_max_age=0):
+    """
+    ingest -> transform -> prepare -> train -> test, with the three audits,
+    and the (manual) hyperparameter search off transform. Ingest re-fetches
+    once its last run is ingest_max_age seconds old (0: on every run);
+    unchanged raw data still leaves the later stages skipped.
+    """
+    return [
+        Stage(
+            "ingest",
+            "scripts.ingest_trials",
+            outputs=["data.raw"],
+            config=["params.ingestion", "paths.data.ingest_checkpoint"],
+            code=["scripts/ingest_trials.py", "src/pipelines/data_ingestion.py"]
+            + ["src/utils"],
+            max_age=ingest_max_age,
+        ),
+        Stage(
+            "inspect_raw",
+            "scripts.inspections.run_inspect_raw",
+            inputs=["data.raw"],
+            code=["scripts/inspections/run_inspect_raw.py", "src/inspections"],
+        ),
+        Stage(
+            "transform",
+            "scripts.run_transformation",
+            inputs=["data.raw"],
+            outputs=["data.interim"],
+            config=["params.transformation"],
+            code=["scripts/run_transformation.py"]
+            + ["src/pipelines/data_transformation.py", "src/utils"],
+        ),
+        Stage(
+            "inspect_interim",
+            "scripts.inspections.run_inspect_interim",
+            inputs=["data.interim"],
+            code=["scripts/inspections/run_inspect_interim.py", "src/inspections"],
+        ),
+        Stage(
+            "prepare",
+            "scripts.run_preparation",
+            inputs=["data.interim"],
+            outputs=["data.processed", "data.processed_sparse", "artifacts.featurizer"],
+            config=["params.features"],
+            code=["scripts/run_preparation.py", "src/pipelines/data_preparation.py"]
+            + ["src/features", "src/utils"],
+        ),
+        Stage(
+            "audit_processed",
+            "scripts.inspections.run_audit_processed",
+            inputs=["data.processed"],
+            code=["scripts/inspections/run_audit_processed.py", "src/inspections"],
+        ),
+        Stage(
+            "train",
+            "scripts.run_training",
+            inputs=["data.processed", "data.processed_sparse", "artifacts.featurizer"],
+            outputs=["models.logistic_baseline", "artifacts.feature_names"],
+            config=["params.features.sparse", "params.training", "paths.serving"],
+            code=["scripts/run_training.py", "src/pipelines/model_training.py"]
+            + ["src/pipelines/incremental_training.py", "src/inference/bundle.py"]
+            + ["src/utils"],
+        ),
+        Stage(
+            "search",
+            "scripts.run_search",
+            inputs=["data.interim"],
+            outputs=[
+                "search.model",
+                "search.featurizer",
+                "search.feature_names",
+                "search.results",
+            ],
+            config=["params.search", "params.features.sparse", "paths.search"],
+            code=["scripts/run_search.py", "src/pipelines/model_search.py"]
+            + ["src/pipelines/model_training.py", "src/features", "src/utils"]
+            + ["src/inference/bundle.py"],
+            manual=True,
+        ),
+        Stage(
+            "test",
+            "pytest",
+            inputs=[
+                "models.logistic_baseline",
+                "artifacts.featurizer",
+                "artifacts.feature_names",
+            ],
+            code=["src", "scripts", "tests", "config"],
+        ),
+    ]
+
+
+def lookup(config, key):
+    """config["a"]["b"]["c"] for key "a.b.c" (None when absent)."""
+    value = config
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class FileHasher:
+    """
+    sha256 of file contents, memoized by (size, mtime_ns) in a dict that
+    lives in the state file, so unchanged files are only stat'ed.
+    """
+
+    def __init__(self, memo=None):
+        self.memo = memo or {}
+
+    def digest(self, path):
+        """Hex digest of path, or None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = [stat.st_size, stat.st_mtime_ns]
+        cached = self.memo.get(path)
+        if cached is not None and cached[:2] == key:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        self.memo[path] = key + [digest.hexdigest()]
+        return digest.hexdigest()
+
+    def tree(self, root):
+        """(path, digest) for a file, or for every .py/.yaml file under a directory."""
+        if not os.path.isdir(root):
+            return [(root, self.digest(root))]
+        files = []
+        for directory, dirs, names in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if not d.startswith((".", "__")))
+            files += [
+                os.path.join(directory, n)
+                for n in sorted(names)
+                if n.endswith((".py", ".yaml"))
+            ]
+        return [(path, self.digest(path)) for path in files]
+
+
+def _resolve(stage, config, root):
+    """(input paths, output paths) of a stage, absolute."""
+    paths = config.get("paths", {})
+    return (
+        [os.path.join(root, lookup(paths, k)) for k in stage.inputs],
+        [os.path.join(root, lookup(paths, k)) for k in stage.outputs],
+    )
+
+
+def stage_fingerprint(stage, config, hasher, root):
+    """sha256 over the stage's input contents, config values and code."""
+    inputs, _ = _resolve(stage, config, root)
+    digest = hashlib.sha256(stage.name.encode())
+    for key, path in zip(stage.inputs, inputs):
+        digest.update(f"input {key} {hasher.digest(path)}\n".encode())
+    for key in stage.config:
+        value = json.dumps(lookup(config, key), sort_keys=True, default=str)
+        digest.update(f"config {key} {value}\n".encode())
+    for entry in stage.code:
+        for path, file_digest in hasher.tree(os.path.join(root, entry)):
+            digest.update(
+                f"code {os.path.relpath(path, root)} {file_digest}\n".encode()
+            )
+    return digest.hexdigest()
+
+
+def _dependencies(stages, config):
+    """name -> names of the stages writing one of its inputs."""
+    paths = config.get("paths", {})
+    producers = {}
+    for stage in stages:
+        for key in stage.outputs:
+            producers[lookup(paths, key)] = stage.name
+    return {
+        stage.name: {
+            producers[lookup(paths, key)]
+            for key in stage.inputs
+            if lookup(paths, key) in producers
+        }
+        for stage in stages
+    }
+
+
+def _execute(target, root):
+    """Pool worker: runs one stage's target; returns its wall-clock seconds."""
+    os.chdir(root)
+    start = time.perf_counter()
+    try:
+        if callable(target):
+            target()
+        else:
+            # a clean argv, as if run with `python -m target`
+            sys.argv = [target]
+            runpy.run_module(target, run_name="__main__", alter_sys=True)
+    except SystemExit as e:
+        # entry scripts (and pytest) report failure through sys.exit
+        if e.code not in (None, 0):
+            raise RuntimeError(f"{target} exited with status {e.code}") from None
+    return time.perf_counter() - start
+
+
+def run_pipeline(
+    stages, config, state_path, workers=2, force=(), targets=None, root=None
+):
+    """
+    Runs the stages that are out of date, in dependency order and up to
+    `workers` at a time. force names stages to run regardless ("all" for
+    every stage); targets limits the run to those stages and everything
+    upstream of them (manual stages run only this way). A failed stage
+    blocks its downstream stages.
+    Returns {stage: {"status", "seconds"}} (status: ran, skipped, failed,
+    blocked) and records fingerprints and timings in state_path.
+    """
+    root = str(root or PROJECT_ROOT)
+    state = read_json(state_path, default={})
+    hasher = FileHasher(state.get("files"))
+    records = state.get("stages", {})
+    deps = _dependencies(stages, config)
+
+    if targets:
+        wanted, queue = set(), list(targets)
+        while queue:
+            name = queue.pop()
+            if name not in wanted:
+                wanted.add(name)
+                queue += deps[name]
+        stages = [s for s in stages if s.name in wanted]
+    else:
+        stages = [s for s in stages if not s.manual]
+
+    results = {}
+    pending = list(stages)
+    running = {}
+    pool = None
+    start = time.perf_counter()
+    try:
+        while pending or running:
+            ready = False
+            for stage in list(pending):
+                if any(
+                    results.get(d, {}).get("status") in ("failed", "blocked")
+                    for d in deps[stage.name]
+                ):
+                    pending.remove(stage)
+                    results[stage.name] = {"status": "blocked", "seconds": 0.0}
+                    ready = True
+                    continue
+                if any(d not in results for d in deps[stage.name]):
+                    continue
+                pending.remove(stage)
+                ready = True
+
+                fingerprint = stage_fingerprint(stage, config, hasher, root)
+                _, outputs = _resolve(stage, config, root)
+                record = records.get(stage.name, {})
+                expired = stage.max_age is not None and (
+                    time.time() - record.get("finished_at", 0) >= stage.max_age
+                )
+                up_to_date = (
+                    not expired
+                    and record.get("fingerprint") == fingerprint
+                    and record.get("outputs") == [hasher.digest(p) for p in outputs]
+                    and stage.name not in force
+                    and "all" not in force
+                )
+                if up_to_date:
+                    results[stage.name] = {"status": "skipped", "seconds": 0.0}
+                    continue
+
+                print(f"[pipeline] {stage.name}: running")
+                if pool is None:
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                future = pool.submit(_execute, stage.target, root)
+                running[future] = (stage, fingerprint, outputs)
+
+            if not running:
+                if not ready:
+                    raise ValueError(
+                        f"Dependency cycle among {[s.name for s in pending]}"
+                    )
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, fingerprint, outputs = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    print(f"[pipeline] {stage.name}: FAILED ({e})")
+                    results[stage.name] = {"status": "failed", "seconds": 0.0}
+                    records.pop(stage.name, None)
+                    continue
+                print(f"[pipeline] {stage.name}: done in {seconds:.1f}s")
+                results[stage.name] = {"status": "ran", "seconds": seconds}
+                records[stage.name] = {
+                    "fingerprint": fingerprint,
+                    "outputs": [hasher.digest(p) for p in outputs],
+                    "seconds": seconds,
+                    "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "finished_at": time.time(),
+                }
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        write_json(
+            {
+                "stages": records,
+                "files": hasher.memo,
+                "last_run": {
+                    "seconds": time.perf_counter() - start,
+                    "stages": results,
+                },
+            },
+            state_path,
+        )
+    return results
@@ -0,0 +1,144 @@
+# src/utils/checkpoint.py
+"""
+Checkpoint state for resumable ingestion: per condition, the next page
+token and how many pages/studies/bytes are already durable in its part
+file.
+The checkpoint is rewritten atomically after every page.
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def _write_json_atomic(obj, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(obj, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_json(path, default=None):
+    """Parsed JSON file, or default when it does not exist."""
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(obj, path):
+    """Writes JSON atomically (temp file + rename), creating parent dirs."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _write_json_atomic(obj, path)
+
+
+class IngestCheckpoint:
+    """
+    The state of one ingest run in `directory`: checkpoint.json plus one
+    NDJSON part file per condition. A run is identified by its conditions,
+    delta `since` date and fetch settings (fields, page_size, max_pages);
+    a leftover checkpoint for different ones is discarded rather than
+    resumed, so parts are never mixed across projections or paging.
+    """
+
+    def __init__(self, directory, state):
+        self.directory = directory
+        self.state = state
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory, conditions, since=None, started=None, settings=None):
+        """
+        Resumes a matching unfinished run in directory, or starts a new one.
+        settings: the other parameters a resume must share (JSON-safe).
+        """
+        settings = json.loads(json.dumps(settings or {}))  # as it reads back
+        state = read_json(os.path.join(directory, CHECKPOINT_FILE))
+        if state is not None:
+            if (
+                state["conditions"].keys() == set(conditions)
+                and state["since"] == since
+                and state.get("settings") == settings
+            ):
+                print(f"Resuming interrupted ingest from {directory}")
+                return cls(directory, state)
+            print("Discarding checkpoint from a run with different settings.")
+            shutil.rmtree(directory)
+
+        os.makedirs(directory, exist_ok=True)
+        state = {
+            "started": started,
+            "since": since,
+            "settings": settings,
+            "conditions": {
+                condition: {
+                    "part": f"{i:03d}_{_slug(condition)}.ndjson",
+                    "page_token": None,
+                    "pages": 0,
+                    "studies": 0,
+                    "bytes": 0,
+                    "done": False,
+                }
+                for i, condition in enumerate(conditions)
+            },
+        }
+        checkpoint = cls(directory, state)
+        checkpoint.save()
+        return checkpoint
+
+    @property
+    def started(self):
+        return self.state["started"]
+
+    @property
+    def since(self):
+        return self.state["since"]
+
+    def progress(self, condition):
+        return self.state["conditions"][condition]
+
+    def part_path(self, condition):
+        return os.path.join(self.directory, self.progress(condition)["part"])
+
+    def part_paths(self):
+        return [self.part_path(c) for c in self.state["conditions"]]
+
+    def pending(self):
+        """Conditions whose page chain is not finished yet."""
+        return [c for c, p in self.state["conditions"].items() if not p["done"]]
+
+    def record_page(self, condition, n_studies, next_page_token, offset):
+        """
+        Call after the page is durable in the part file; offset is the part
+        file's size at that point (RawStudyWriter.offset).
+        """
+        with self._lock:
+            progress = self.progress(condition)
+            progress["pages"] += 1
+            progress["studies"] += n_studies
+            progress["bytes"] = offset
+            progress["page_token"] = next_page_token
+            progress["done"] = next_page_token is None
+            self.save()
+
+    def mark_done(self, condition):
+        with self._lock:
+            self.progress(condition)["done"] = True
+            self.save()
+
+    def save(self):
+        _write_json_atomic(self.state, os.path.join(self.directory, CHECKPOINT_FILE))
+
+    def clear(self):
+        """Removes the checkpoint and part files after a successful merge."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")[:40] or "condition"
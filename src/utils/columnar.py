@@ -0,0 +1,165 @@
+# src/utils/columnar.py
+"""
+Columnar study flattener. The output columns are declared once in
+STUDY_SPEC (column, dotted document path, list joiner, dtype); compile_spec
+turns a spec into a single generated function that walks each study once,
+sharing lookups of common path prefixes, and appends straight into one list
+per column - no per-row dicts. flatten_study in src/utils/flattening.py
+stays the reference implementation; the two must produce the same frame.
+"""
+
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from src.utils.raw_io import (
+    is_ndjson,
+    iter_raw_lines,
+    iter_raw_studies,
+    parse_raw_line,
+)
+
+# joiner: for list-valued paths, how items are joined (a missing list gives
+# ""). dtype: the column's dtype when there are no rows to infer it from;
+# otherwise pandas infers it from the values, exactly as for flatten_study.
+FlatField = namedtuple("FlatField", ["column", "path", "joiner", "dtype"])
+
+STUDY_SPEC = [
+    FlatField("nct_id", "protocolSection.identificationModule.nctId", None, "object"),
+    FlatField("phase", "protocolSection.designModule.phases", ", ", "object"),
+    FlatField("status", "protocolSection.statusModule.overallStatus", None, "object"),
+    FlatField(
+        "enrollment",
+        "protocolSection.designModule.enrollmentInfo.count",
+        None,
+        "float64",
+    ),
+    FlatField(
+        "conditions", "protocolSection.conditionsModule.conditions", ", ", "object"
+    ),
+    FlatField(
+        "sponsor",
+        "protocolSection.sponsorCollaboratorsModule.leadSponsor.name",
+        None,
+        "object",
+    ),
+]
+
+_compiled = {}
+
+
+def compile_spec(spec):
+    """
+    Generates (and caches) the extractor for a spec: extract(studies, columns)
+    appends each study's fields to columns[i] for field i. Missing keys along
+    a path read as empty, like flatten_study's chained .get(key, {}).
+    """
+    key = tuple(spec)
+    if key in _compiled:
+        return _compiled[key]
+
+    # trie of path keys, so a shared prefix is looked up once per study
+    trie = {}
+    for i, field in enumerate(spec):
+        *parents, leaf = field.path.split(".")
+        node = trie
+        for part in parents:
+            node = node.setdefault(("node", part), {})
+        node.setdefault(("leaf", leaf), []).append(i)
+
+    lines = ["def extract(studies, columns):"]
+    lines += [f"    a{i} = columns[{i}].append" for i in range(len(spec))]
+    lines.append("    for n0 in studies:")
+    counter = [0]
+
+    def emit(node, var, indent):
+        pad = " " * indent
+        for (kind, part), child in node.items():
+            if kind == "node":
+                counter[0] += 1
+                name = f"n{counter[0]}"
+                lines.append(f"{pad}{name} = {var}.get({part!r}, _EMPTY)")
+                emit(child, name, indent)
+                continue
+            for i in child:
+                joiner = spec[i].joiner
+                if joiner is None:
+                    lines.append(f"{pad}a{i}({var}.get({part!r}))")
+                else:
+                    lines.append(f"{pad}v = {var}.get({part!r}, _NO_ITEMS)")
+                    lines.append(
+                        f"{pad}a{i}({joiner!r}.join(v) "
+                        f"if isinstance(v, list) else v)"
+                    )
+
+    emit(trie, "n0", 8)
+    namespace = {"_EMPTY": {}, "_NO_ITEMS": []}  # read-only defaults
+    exec(
+        compile("\n".join(lines), f"<flattener {len(spec)} fields>", "exec"), namespace
+    )
+    _compiled[key] = namespace["extract"]
+    return _compiled[key]
+
+
+def flatten_columns(studies, spec=STUDY_SPEC):
+    """{column: list of values} for an iterable of raw studies."""
+    columns = [[] for _ in spec]
+    compile_spec(spec)(studies, columns)
+    return {field.column: values for field, values in zip(spec, columns)}
+
+
+def to_frame(columns, spec=STUDY_SPEC):
+    """DataFrame from flatten_columns output, typed by the spec when empty."""
+    if not next(iter(columns.values()), None):
+        return pd.DataFrame(
+            {f.column: pd.Series(dtype=f.dtype) for f in spec}, columns=list(columns)
+        )
+    return pd.DataFrame(columns)
+
+
+def flatten_frame(studies, spec=STUDY_SPEC):
+    """
+    The same frame as pd.DataFrame([flatten_study(s) for s in studies]),
+    except that no studies still gives the spec's (empty) columns.
+    """
+    return to_frame(flatten_columns(studies, spec), spec)
+
+
+def _flatten_lines(lines, path, spec=STUDY_SPEC):
+    """Pool task: parses a batch of NDJSON lines and flattens it."""
+    studies = (parse_raw_line(line, path) for line in lines)
+    return flatten_columns((s for s in studies if s is not None), spec)
+
+
+def iter_flat_frames(path, chunk_size, workers=1, spec=STUDY_SPEC):
+    """
+    Yields the raw store at path as flattened DataFrames of at most
+    chunk_size rows, in store order. With workers > 1 and an NDJSON store,
+    batches of raw lines are parsed and flattened in a process pool (JSON
+    decoding is most of the cost, and lines are cheap to ship to a worker);
+    other stores are read and flattened in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or not is_ndjson(path):
+        studies = iter_raw_studies(path)
+        while True:
+            columns = flatten_columns(islice(studies, chunk_size), spec)
+            if not next(iter(columns.values())):
+                return
+            yield to_frame(columns, spec)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        lines = iter_raw_lines(path)
+        for batch in iter(lambda: list(islice(lines, chunk_size)), []):
+            pending.append(pool.submit(_flatten_lines, batch, path, spec))
+            if len(pending) >= 2 * workers:
+                yield to_frame(pending.popleft().result(), spec)
+        while pending:
+            columns = pending.popleft().result()
+            if next(iter(columns.values())):  # a lone partial last line
+                yield to_frame(columns, spec)
@@ -38,3 +38,36 @@ def flatten_study(study):
         ),
         "sponsor": sponsor,
     }
+
+
+# the document paths flatten_study reads; ingestion requests (and stores)
+# only these when projection is on, so keep the two in sync
+STUDY_FIELDS = [
+    "protocolSection.identificationModule.nctId",
+    "protocolSection.designModule.phases",
+    "protocolSection.statusModule.overallStatus",
+    "protocolSection.designModule.enrollmentInfo.count",
+    "protocolSection.conditionsModule.conditions",
+    "protocolSection.sponsorCollaboratorsModule.leadSponsor.name",
+]
+
+
+def project_study(study, fields=STUDY_FIELDS):
+    """
+    Copy of a raw study holding only the given dotted paths (missing ones
+    are left out), in the same nested shape, so flatten_study reads it
+    exactly like the full document.
+    """
+    projected = {}
+    for path in fields:
+        *parents, leaf = path.split(".")
+        source, target = study, projected
+        for key in parents:
+            source = source.get(key) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and leaf in source:
+                target[leaf] = source[leaf]
+    return projected
@@ -6,15 +6,57 @@ from ClinicalTrials.gov.
 
 import os
 import json
+import math
 import requests
+from urllib3.util.request import ACCEPT_ENCODING
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
 
+from src.utils.flattening import project_study
+from src.utils.raw_io import RawStudyWriter
+
+# every encoding urllib3 can decode here (gzip, deflate, plus br/zstd when
+# their packages are installed)
+REQUEST_HEADERS = {"Accept": "application/json", "Accept-Encoding": ACCEPT_ENCODING}
+
+
+def make_session(max_connections=10):
+    """
+    A requests.Session whose keep-alive pool holds max_connections
+    connections, so concurrent workers reuse sockets instead of
+    reconnecting on every page.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=max_connections, pool_maxsize=max_connections
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-def fetch_trials(api_url, condition, page_size, max_pages):
-    """Fetch paginated clinical trial data."""
-    all_trials = []
-    page_token = None
 
-    for page in range(1, max_pages + 1):
+def iter_page_chain(
+    api_url,
+    condition,
+    page_size,
+    max_pages,
+    session=None,
+    filter_advanced=None,
+    page_token=None,
+    start_page=1,
+    fields=None,
+):
+    """
+    Walks the nextPageToken chain for one condition (pages are sequential
+    by nature), yielding (studies, next_page_token) per page; the token is
+    None after the last page. Request errors are raised. filter_advanced is
+    passed through as the API's filter.advanced query; page_token and
+    start_page resume a chain part way through. With a fields list (e.g.
+    flattening.STUDY_FIELDS) only those paths are requested and kept.
+    """
+    http = session or requests
+
+    for page in range(start_page, max_pages + 1):
         params = {
             "query.cond": condition,
             "format": "json",
@@ -22,31 +64,350 @@ def fetch_trials(api_url, condition, page_size, max_pages):
             "countTotal": "true" if page == 1 else "false",
         }
 
+        if filter_advanced:
+            params["filter.advanced"] = filter_advanced
+        if fields:
+            params["fields"] = ",".join(fields)
         if page_token:
             params["pageToken"] = page_token
 
         print(f"Fetching page {page} for condition '{condition}'...")
-        try:
-            response = requests.get(api_url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching data: {e}")
-            break
+        response = http.get(api_url, params=params, headers=REQUEST_HEADERS, timeout=10)
+        response.raise_for_status()
+        data = response.json()
 
         studies = data.get("studies", [])
+        if fields:
+            # the server already projected; this also guarantees it on disk
+            studies = [project_study(s, fields) for s in studies]
         print(f"   -> Retrieved {len(studies)} studies.")
-        all_trials.extend(studies)
-
         page_token = data.get("nextPageToken")
+        yield studies, page_token
+
         if not page_token:
             print("No more pages to fetch.")
             break
 
-    print(f"Total studies fetched: {len(all_trials)}")
+
+def iter_pages(
+    api_url,
+    condition,
+    page_size,
+    max_pages,
+    session=None,
+    filter_advanced=None,
+    fields=None,
+):
+    """iter_page_chain from the first page, yielding only the studies."""
+    for studies, _ in iter_page_chain(
+        api_url,
+        condition,
+        page_size,
+        max_pages,
+        session,
+        filter_advanced,
+        fields=fields,
+    ):
+        yield studies
+
+
+def collect_pages(pages, sink=None):
+    """
+    Drains a page iterator. Without a sink the studies are returned as one
+    list; with a sink (e.g. a RawStudyWriter) each page is handed to
+    sink.write_page as it arrives and nothing is kept.
+    """
+    if sink is None:
+        return [study for page in pages for study in page]
+    for page in pages:
+        sink.write_page(page)
+    return []
+
+
+def fetch_trials(
+    api_url, condition, page_size, max_pages, session=None, sink=None, fields=None
+):
+    """
+    Fetch paginated clinical trial data. With a sink, pages are streamed
+    to it instead of being returned; with fields, documents are projected.
+    """
+    all_trials = []
+    pages = iter_pages(api_url, condition, page_size, max_pages, session, fields=fields)
+    try:
+        for studies in pages:
+            all_trials.extend(collect_pages([studies], sink))
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching data: {e}")
+
+    print(f"Total studies fetched: {sink.count if sink else len(all_trials)}")
     return all_trials
 
 
+def study_id(study):
+    """The nctId of a raw study record (None if absent)."""
+    return study.get("protocolSection", {}).get("identificationModule", {}).get("nctId")
+
+
+def dedupe_studies(studies):
+    """Drops repeated nctIds, keeping the first occurrence and input order."""
+    seen = set()
+    unique = []
+    for study in studies:
+        nct_id = study_id(study)
+        if nct_id is not None:
+            if nct_id in seen:
+                continue
+            seen.add(nct_id)
+        unique.append(study)
+    return unique
+
+
+def fetch_conditions(
+    api_url,
+    conditions,
+    page_size,
+    max_pages,
+    max_concurrency=4,
+    sink=None,
+    fields=None,
+):
+    """
+    Fetches several conditions concurrently over one pooled session, at
+    most max_concurrency at a time. A failing condition does not stop the
+    others. Returns (studies, failures): the studies of all successful
+    conditions in the given condition order, de-duplicated on nctId, and
+    {condition: error message} for the ones that failed. With a sink,
+    pages are streamed to it in arrival order (pages of a condition that
+    fails midway are kept) and studies is empty.
+    """
+    workers = max(1, min(max_concurrency, len(conditions)))
+    session = make_session(workers)
+
+    def fetch(condition):
+        # a condition counts only if its whole page chain was fetched
+        try:
+            pages = iter_pages(
+                api_url, condition, page_size, max_pages, session, fields=fields
+            )
+            return collect_pages(pages, sink), None
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching condition '{condition}': {e}")
+            return None, str(e)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fetch, conditions))
+    finally:
+        session.close()
+
+    studies, failures = [], {}
+    for condition, (fetched, error) in zip(conditions, results):
+        if error is not None:
+            failures[condition] = error
+        else:
+            studies.extend(fetched)
+
+    unique = dedupe_studies(studies)
+    print(
+        f"Total studies fetched: {sink.count if sink else len(unique)} from "
+        f"{len(conditions) - len(failures)}/{len(conditions)} conditions "
+        f"({len(studies) - len(unique)} duplicates dropped)."
+    )
+    return unique, failures
+
+
+def count_studies(api_url, condition, session=None, filter_advanced=None):
+    """totalCount for a query, from a one-study page."""
+    params = {
+        "query.cond": condition,
+        "format": "json",
+        "pageSize": 1,
+        "countTotal": "true",
+    }
+    if filter_advanced:
+        params["filter.advanced"] = filter_advanced
+    response = (session or requests).get(
+        api_url, params=params, headers=REQUEST_HEADERS, timeout=10
+    )
+    response.raise_for_status()
+    return response.json().get("totalCount", 0)
+
+
+def window_filter(field, window):
+    """
+    filter.advanced for a date window: an inclusive (first, last) date
+    range, or None for the studies that have no date in that field.
+    """
+    if window is None:
+        return f"AREA[{field}]MISSING"
+    first, last = window
+    return f"AREA[{field}]RANGE[{first.isoformat()},{last.isoformat()}]"
+
+
+def date_windows(start, end, n):
+    """Splits [start, end] into at most n disjoint, contiguous date windows."""
+    days = (end - start).days + 1
+    n = max(1, min(n, days))
+    bounds = [start + timedelta(days=days * i // n) for i in range(n + 1)]
+    return [(lo, hi - timedelta(days=1)) for lo, hi in zip(bounds, bounds[1:])]
+
+
+def split_window(window):
+    """Halves a date window; None if it is a single day (or the MISSING one)."""
+    if window is None or window[0] == window[1]:
+        return None
+    first, last = window
+    mid = first + (last - first) // 2
+    return [(first, mid), (mid + timedelta(days=1), last)]
+
+
+def fetch_partitioned(
+    api_url,
+    condition,
+    page_size,
+    field="StartDate",
+    start="1900-01-01",
+    end=None,
+    initial_windows=8,
+    max_window_studies=1000,
+    max_concurrency=4,
+    sink=None,
+    fields=None,
+):
+    """
+    Fetches everything for one condition by splitting the query into
+    disjoint date windows on `field` (plus one for studies missing that
+    date) and walking each window's page chain in parallel. A window whose
+    totalCount exceeds max_window_studies is halved until it fits (or is a
+    single day). Returns (studies, failures) like fetch_conditions, with
+    studies in window order and de-duplicated on nctId (or streamed to
+    sink in arrival order).
+    """
+    start = date.fromisoformat(str(start))
+    end = date.fromisoformat(str(end)) if end else date.today()
+    windows = date_windows(start, end, initial_windows) + [None]
+    session = make_session(max_concurrency)
+
+    def fetch_window(window):
+        query = window_filter(field, window)
+        total = count_studies(api_url, condition, session, query)
+        if total > max_window_studies:
+            halves = split_window(window)
+            if halves:
+                return halves, None
+        if total == 0:
+            return None, []
+        max_pages = math.ceil(total / page_size) + 1
+        pages = iter_pages(
+            api_url, condition, page_size, max_pages, session, query, fields
+        )
+        return None, collect_pages(pages, sink)
+
+    fetched, failures = {}, {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+            pending = {pool.submit(fetch_window, w): w for w in windows}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window = pending.pop(future)
+                    try:
+                        halves, studies = future.result()
+                    except requests.exceptions.RequestException as e:
+                        label = window_filter(field, window)
+                        print(f"Error fetching window {label}: {e}")
+                        failures[label] = str(e)
+                        continue
+                    for half in halves or []:
+                        pending[pool.submit(fetch_window, half)] = half
+                    if studies is not None:
+                        fetched[window] = studies
+    finally:
+        session.close()
+
+    # dated windows in date order, then the undated studies
+    ordered = sorted((w for w in fetched if w is not None)) + (
+        [None] if None in fetched else []
+    )
+    studies = [study for w in ordered for study in fetched[w]]
+    unique = dedupe_studies(studies)
+    print(
+        f"Total studies fetched for '{condition}': "
+        f"{sink.count if sink else len(unique)} from "
+        f"{len(fetched)} {field} windows ({len(failures)} failed)."
+    )
+    return unique, failures
+
+
+def updated_since_filter(since):
+    """filter.advanced for studies whose last update was posted on/after since."""
+    return f"AREA[LastUpdatePostDate]RANGE[{since},MAX]"
+
+
+def fetch_resumable(
+    api_url,
+    checkpoint,
+    page_size,
+    max_pages,
+    max_concurrency=4,
+    filter_advanced=None,
+    fields=None,
+):
+    """
+    Fetches the unfinished conditions of a checkpointed run concurrently.
+    Each page chain continues from its saved token; every page is appended
+    durably to the condition's part file before the checkpoint advances, so
+    a crash at any point re-fetches at most one page. The part file is cut
+    back to its checkpointed size first, dropping a page that was torn or
+    written after the last checkpoint. Returns
+    {condition: error message} for conditions that failed (they stay
+    resumable).
+    """
+    pending = checkpoint.pending()
+    if not pending:
+        return {}
+    workers = max(1, min(max_concurrency, len(pending)))
+    session = make_session(workers)
+
+    def fetch(condition):
+        progress = checkpoint.progress(condition)
+        chain = iter_page_chain(
+            api_url,
+            condition,
+            page_size,
+            max_pages,
+            session,
+            filter_advanced,
+            page_token=progress["page_token"],
+            start_page=progress["pages"] + 1,
+            fields=fields,
+        )
+        try:
+            with RawStudyWriter(
+                checkpoint.part_path(condition),
+                append=True,
+                truncate_to=progress["bytes"],
+            ) as part:
+                for studies, next_page_token in chain:
+                    part.write_page(studies)
+                    checkpoint.record_page(
+                        condition, len(studies), next_page_token, part.offset
+                    )
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching condition '{condition}': {e}")
+            return str(e)
+        # max_pages reached, or the chain ended
+        checkpoint.mark_done(condition)
+        return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = list(pool.map(fetch, pending))
+    finally:
+        session.close()
+    return {c: e for c, e in zip(pending, errors) if e is not None}
+
+
 def save_trials(trials, output_path):
     """Save fetched trials to a JSON file."""
     if not trials:
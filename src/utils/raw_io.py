@@ -0,0 +1,356 @@
+# src/utils/raw_io.py
+"""
+Reading and writing the raw study store. Besides the original pretty-printed
+JSON list, raw studies can be stored as NDJSON (one study per line), plain or
+compressed (.ndjson.gz, .ndjson.zst), written page by page as they arrive.
+The format is chosen by the file extension.
+"""
+
+import gzip
+import io
+import json
+import os
+import threading
+from itertools import islice
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst stores
+    zstandard = None
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+WRITE_BATCH = 1000  # studies per durable write when rewriting a whole store
+
+
+def compression_of(path):
+    """'gzip', 'zstd' or None, from the file extension."""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def is_ndjson(path):
+    """True for .ndjson/.jsonl stores, compressed or not."""
+    base = path[: -len(".gz")] if path.endswith(".gz") else path
+    base = base[: -len(".zst")] if base.endswith(".zst") else base
+    return base.endswith(NDJSON_SUFFIXES)
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise ImportError(
+            "Reading/writing .zst files requires `pip install zstandard`."
+        )
+
+
+def open_binary(path, mode="rb"):
+    """Opens a (possibly compressed) file for binary reading ('rb')."""
+    compression = compression_of(path)
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if compression == "zstd":
+        _require_zstd()
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, mode))
+        return io.BufferedReader(reader)
+    return open(path, mode)
+
+
+def iter_raw_studies(path):
+    """
+    Yields raw study dicts from either store format: NDJSON (one study
+    per line, optionally compressed), or a JSON list / {"studies": [...]}.
+    """
+    if is_ndjson(path):
+        yield from _iter_ndjson(path)
+        return
+
+    yield from iter_json_studies(path)
+
+
+def iter_json_studies(path, read_size=1 << 16):
+    """
+    Incrementally parses a JSON study store - a top-level list, or a dict
+    with a "studies" list - yielding one study at a time. Memory holds the
+    current study plus one read buffer, whatever the file size.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f, read_size)
+        opener = stream.next_char()
+        if opener == "[":
+            yield from stream.array_items()
+            return
+        if opener == "{":
+            for key in stream.object_keys():
+                if key == "studies" and stream.peek_char() == "[":
+                    stream.next_char()
+                    yield from stream.array_items()
+                    return
+                stream.value()  # some other key: parse and drop it
+    raise ValueError("Unexpected JSON format — could not find studies list")
+
+
+class _JsonStream:
+    """Minimal pull parser over a text file, built on JSONDecoder.raw_decode."""
+
+    _decoder = json.JSONDecoder()
+    _space = " \t\r\n"
+
+    def __init__(self, f, read_size):
+        self.f = f
+        self.read_size = read_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, at_least):
+        """Reads more input (dropping consumed text); False at end of file."""
+        if self.eof:
+            return False
+        self.buf = self.buf[self.pos :]
+        self.pos = 0
+        chunk = self.f.read(max(self.read_size, at_least))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek_char(self):
+        """Next non-whitespace character, not consumed ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self._space:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(0):
+                return ""
+
+    def next_char(self):
+        char = self.peek_char()
+        self.pos += len(char)
+        return char
+
+    def value(self):
+        """Decodes the next JSON value, reading more input as needed."""
+        self.peek_char()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self.buf, self.pos)
+                # a number cut by the buffer edge would decode short
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # grow geometrically, so a huge value is re-scanned O(log n) times
+            self._fill(len(self.buf) - self.pos)
+
+    def _expect(self, char):
+        found = self.next_char()
+        if found != char:
+            raise ValueError(f"Malformed JSON: expected {char!r}, found {found!r}")
+
+    def array_items(self):
+        """Yields the items of an array whose '[' was just consumed."""
+        if self.peek_char() == "]":
+            self.next_char()
+            return
+        while True:
+            yield self.value()
+            if self.next_char() == "]":
+                return
+            self.pos -= 1
+            self._expect(",")
+
+    def object_keys(self):
+        """
+        Yields the keys of an object whose '{' was just consumed; the
+        caller must consume each key's value before asking for the next.
+        """
+        if self.peek_char() == "}":
+            self.next_char()
+            return
+        while True:
+            key = self.value()
+            self._expect(":")
+            yield key
+            if self.next_char() == "}":
+                return
+            self.pos -= 1
+            self._expect(",")
+
+
+def _iter_ndjson(path):
+    """
+    NDJSON reader that tolerates a store cut short by a crash: everything
+    up to the last complete line is returned, with a warning.
+    """
+    for line in iter_raw_lines(path):
+        study = parse_raw_line(line, path)
+        if study is not None:
+            yield study
+
+
+def iter_raw_lines(path):
+    """The non-blank lines (bytes) of an NDJSON store, up to where it ends."""
+    truncated = (EOFError,) + ((zstandard.ZstdError,) if zstandard else ())
+    with open_binary(path) as f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield line
+        except truncated as e:
+            print(f"Warning: {path} ends mid-stream ({e}); read what was complete.")
+
+
+def parse_raw_line(line, path):
+    """One NDJSON study; None (with a warning) for a partial last line."""
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        if line.endswith(b"\n"):
+            raise
+        print(f"Warning: {path} ends in a partial line; skipped it.")
+        return None
+
+
+class RawStudyWriter:
+    """
+    Appends pages of studies to an NDJSON store as they arrive, so memory
+    holds one page at most. Each page is flushed through the compressor
+    and fsync'ed before write_page returns, so a crash loses at most the
+    page in flight. Studies whose nctId was already written are skipped.
+    Safe to share between fetch threads. append=True continues an existing
+    store (e.g. a checkpoint part file) instead of truncating it; with
+    truncate_to, the file is first cut back to that byte offset (the last
+    durable page recorded by a previous run), dropping any torn write.
+    offset is the file size after the last durable page.
+    """
+
+    def __init__(self, path, id_of=None, append=False, truncate_to=None):
+        self.path = path
+        self.append = append
+        self.truncate_to = truncate_to
+        self.compression = compression_of(path)
+        self.id_of = id_of
+        self.count = 0
+        self.duplicates = 0
+        self.offset = 0
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._file = None
+        self._stream = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab" if self.append else "wb")
+        if self.append and self.truncate_to is not None:
+            # a crash mid-write can leave a partial line at the end
+            self._file.truncate(self.truncate_to)
+        self._file.seek(0, os.SEEK_END)
+        self.offset = self._file.tell()
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._file, mode="wb")
+        elif self.compression == "zstd":
+            _require_zstd()
+            self._stream = zstandard.ZstdCompressor().stream_writer(
+                self._file, closefd=False
+            )
+        else:
+            self._stream = self._file
+        return self
+
+    def write_page(self, studies):
+        """Writes one page durably; returns the number of new studies."""
+        with self._lock:
+            lines = []
+            for study in studies:
+                nct_id = self.id_of(study) if self.id_of else None
+                if nct_id is not None:
+                    if nct_id in self._seen:
+                        self.duplicates += 1
+                        continue
+                    self._seen.add(nct_id)
+                lines.append(json.dumps(study, separators=(",", ":")))
+            if lines:
+                self._stream.write(("\n".join(lines) + "\n").encode("utf-8"))
+                self._sync()
+            self.count += len(lines)
+            return len(lines)
+
+    def _sync(self):
+        if self.compression == "gzip":
+            self._stream.flush()  # Z_SYNC_FLUSH: everything so far is readable
+        elif self.compression == "zstd":
+            self._stream.flush(zstandard.FLUSH_BLOCK)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.offset = self._file.tell()
+
+    def __exit__(self, *exc):
+        if self._stream is not self._file:
+            self._stream.close()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+def write_store(path, studies, id_of=None):
+    """
+    Replaces the raw store at path with `studies` (an iterable), in the
+    format its extension names. Written to a temporary file in the same
+    directory and renamed over the store, so readers never see half a store.
+    Returns the number of studies written.
+    """
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".tmp-{name}")
+    try:
+        if is_ndjson(path):
+            studies = iter(studies)
+            with RawStudyWriter(tmp_path, id_of=id_of) as writer:
+                for batch in iter(lambda: list(islice(studies, WRITE_BATCH)), []):
+                    writer.write_page(batch)
+            count = writer.count
+        else:
+            studies = list(studies)
+            os.makedirs(directory or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(studies, f, indent=2)
+            count = len(studies)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def merge_into_store(path, part_paths, id_of):
+    """
+    Merges freshly fetched studies (the NDJSON part files) into the store
+    at path by id: a stored study with the same id is replaced in place by
+    the fetched version, and new ids are appended in fetch order. Holds
+    only the fetched studies in memory. Returns (updated, added).
+    """
+    fetched = {}
+    for part in part_paths:
+        if os.path.exists(part):
+            for study in iter_raw_studies(part):
+                fetched[id_of(study)] = study  # a later copy is the newer one
+    seen = set()
+
+    def merged():
+        if os.path.exists(path):
+            for study in iter_raw_studies(path):
+                nct_id = id_of(study)
+                seen.add(nct_id)
+                yield fetched.get(nct_id, study)
+        for nct_id, study in fetched.items():
+            if nct_id not in seen:
+                yield study
+
+    write_store(path, merged(), id_of=id_of)
+    updated = len(seen & fetched.keys())
+    return updated, len(fetched) - updated
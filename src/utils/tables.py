@@ -0,0 +1,210 @@
+# src/utils/tables.py
+"""
+Reading and writing the tabular datasets (interim and processed). The
+format is chosen by the file extension in config/paths.yaml: .parquet
+(columnar, compressed, with an explicit schema), .feather / .arrow (Arrow
+IPC) or .csv. Reads can be pruned to the columns a consumer needs.
+Sparse feature blocks (sponsor one-hots, TF-IDF terms) are stored beside
+them as a CSR matrix plus column names in one compressed .npz.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for .parquet/.feather/.arrow
+    pa = None
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+ARROW_SUFFIXES = (".feather", ".arrow")
+COMPRESSION = "zstd"
+
+# interim columns (flatten_study / columnar.STUDY_SPEC). enrollment is
+# always float64 here, whether or not any count is missing.
+INTERIM_SCHEMA = {
+    "nct_id": "string",
+    "phase": "string",
+    "status": "string",
+    "enrollment": "float64",
+    "conditions": "string",
+    "sponsor": "string",
+}
+
+# processed columns by name prefix (their exact set depends on the fitted
+# sponsor list and TF-IDF vocabulary)
+PROCESSED_TYPES = [
+    ("is_", "int8"),
+    ("sponsor_", "bool"),
+    ("cond_", "float64"),
+    ("enrollment_log", "float64"),
+    ("target_outcome", "int8"),
+]
+
+
+def table_format(path):
+    """'parquet', 'arrow' or 'csv', from the file extension."""
+    if path.endswith(PARQUET_SUFFIXES):
+        return "parquet"
+    if path.endswith(ARROW_SUFFIXES):
+        return "arrow"
+    return "csv"
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "Reading/writing .parquet/.feather files requires `pip install pyarrow`."
+        )
+
+
+def processed_schema(columns):
+    """{column: type} for a processed frame's columns (others are inferred)."""
+    schema = {}
+    for column in columns:
+        for prefix, dtype in PROCESSED_TYPES:
+            if column.startswith(prefix):
+                schema[column] = dtype
+                break
+    return schema
+
+
+def _arrow_table(df, schema):
+    """pyarrow Table of df, with the columns named in schema cast to it."""
+    fields = []
+    for column in df.columns:
+        if schema and column in schema:
+            fields.append(pa.field(column, pa.type_for_alias(schema[column])))
+        else:
+            fields.append(pa.Schema.from_pandas(df[[column]]).field(column))
+    return pa.Table.from_pandas(df, schema=pa.schema(fields), preserve_index=False)
+
+
+def write_table(df, path, schema=None, compression=COMPRESSION):
+    """
+    Writes df to path in the format its extension names. schema
+    ({column: arrow type name}) fixes the stored types of those columns in
+    the Arrow formats. Written to a temporary file and renamed into place.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        fmt = table_format(path)
+        if fmt == "csv":
+            df.to_csv(tmp_path, index=False)
+        else:
+            _require_pyarrow()
+            table = _arrow_table(df, schema)
+            if fmt == "parquet":
+                pq.write_table(table, tmp_path, compression=compression)
+            else:
+                feather.write_feather(table, tmp_path, compression=compression)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _open_writer(path, fmt, schema, compression):
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema, compression=compression)
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    return pa.ipc.new_file(path, schema, options=options)
+
+
+def write_table_chunks(frames, path, schema=None, compression=COMPRESSION):
+    """
+    Writes an iterable of same-shaped DataFrames to one Parquet or Arrow
+    file (a row group / record batch per frame), so memory holds one chunk.
+    Returns the row count.
+    """
+    _require_pyarrow()
+    fmt = table_format(path)
+    if fmt == "csv":
+        raise ValueError(f"Chunked writes need a .parquet or .feather path: {path}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    rows = 0
+    writer = None
+    try:
+        for frame in frames:
+            table = _arrow_table(frame, schema)
+            if writer is None:
+                writer = _open_writer(tmp_path, fmt, table.schema, compression)
+            writer.write_table(table)
+            rows += len(frame)
+        if writer is None:
+            # no rows: an empty file that still carries the schema
+            empty = pd.DataFrame({c: pd.Series(dtype=object) for c in schema or {}})
+            table = _arrow_table(empty, schema)
+            writer = _open_writer(tmp_path, fmt, table.schema, compression)
+            writer.write_table(table)
+        writer.close()
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows
+
+
+def read_table(path, columns=None):
+    """Reads a dataset (only `columns`, if given) into a DataFrame."""
+    fmt = table_format(path)
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns)
+    _require_pyarrow()
+    if fmt == "parquet":
+        return pq.read_table(path, columns=columns).to_pandas()
+    return feather.read_table(path, columns=columns).to_pandas()
+
+
+def iter_table_chunks(path, chunk_size, columns=None):
+    """Yields a dataset as DataFrames of at most chunk_size rows."""
+    fmt = table_format(path)
+    if fmt == "csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+        return
+    _require_pyarrow()
+    if fmt == "parquet":
+        batches = pq.ParquetFile(path).iter_batches(chunk_size, columns=columns)
+    else:
+        batches = feather.read_table(path, columns=columns).to_batches(chunk_size)
+    for batch in batches:
+        yield batch.to_pandas()
+
+
+def write_sparse(matrix, columns, path):
+    """Saves a sparse matrix and its column names to one .npz (atomically)."""
+    matrix = sparse.csr_matrix(matrix)
+    if matrix.shape[1] != len(columns):
+        raise ValueError(f"{matrix.shape[1]} matrix columns, {len(columns)} names")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                data=matrix.data,
+                indices=matrix.indices,
+                indptr=matrix.indptr,
+                shape=np.array(matrix.shape),
+                columns=np.array(columns, dtype=str),
+            )
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_sparse(path):
+    """(CSR matrix, column names) saved by write_sparse."""
+    with np.load(path) as npz:
+        matrix = sparse.csr_matrix(
+            (npz["data"], npz["indices"], npz["indptr"]), shape=tuple(npz["shape"])
+        )
+        return matrix, npz["columns"].tolist()
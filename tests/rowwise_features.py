@@ -0,0 +1,31 @@
+# tests/rowwise_features.py
+"""
+The original row-wise (.apply) feature functions, kept as the reference
+the vectorized versions in src/features/build_features.py must match.
+Used by tests/test_features.py and the build_features benchmark.
+"""
+
+import pandas as pd
+
+
+def clean_phase_column(df):
+    df["phase"] = df["phase"].fillna("NOT_SPECIFIED")
+    major_phases = ["PHASE1", "PHASE2", "PHASE3", "PHASE4"]
+    for phase in major_phases:
+        df[f"is_{phase.lower()}"] = df["phase"].apply(
+            lambda x: 1 if phase in str(x).upper().replace(" ", "") else 0
+        )
+    df["is_phase_not_specified"] = df["phase"].apply(
+        lambda x: 1 if x == "NOT_SPECIFIED" else 0
+    )
+    return df.drop(columns=["phase"])
+
+
+def build_sponsor_features(df, top_n=20):
+    top_sponsors = df["sponsor"].value_counts().head(top_n).index.tolist()
+    df["sponsor_group"] = df["sponsor"].apply(
+        lambda x: x if x in top_sponsors else "OTHER_SPONSOR"
+    )
+    df_dummies = pd.get_dummies(df["sponsor_group"], prefix="sponsor", drop_first=False)
+    df = pd.concat([df, df_dummies], axis=1)
+    return df.drop(columns=["sponsor", "sponsor_group"])
@@ -0,0 +1,182 @@
+# tests/stub_ctgov.py
+"""
+Local stand-in for the ClinicalTrials.gov /api/v2/studies endpoint, used by
+the ingestion tests and benchmarks. Mimics the pagination contract: pageSize,
+an opaque pageToken / nextPageToken chain, and totalCount when countTotal=true,
+plus `fields` projection and gzip responses for clients that accept them.
+"""
+
+import gzip
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# filter.advanced areas the stub understands -> statusModule date struct
+DATE_AREAS = {
+    "StartDate": "startDateStruct",
+    "LastUpdatePostDate": "lastUpdatePostDateStruct",
+}
+AREA_FILTER = re.compile(r"AREA\[(\w+)\](?:RANGE\[([^,\]]*),([^\]]*)\]|(MISSING))")
+
+
+def make_study(nct_id, condition="Cancer", status="COMPLETED", phase="PHASE2",
+               sponsor="Pfizer", enrollment=100, start_date=None, last_update=None):
+    """A minimal raw study record shaped like the v2 API's."""
+    status_module = {"overallStatus": status}
+    if start_date:
+        status_module["startDateStruct"] = {"date": start_date}
+    if last_update:
+        status_module["lastUpdatePostDateStruct"] = {"date": last_update}
+    return {
+        "protocolSection": {
+            "identificationModule": {"nctId": nct_id},
+            "statusModule": status_module,
+            "designModule": {"phases": [phase],
+                             "enrollmentInfo": {"count": enrollment}},
+            "conditionsModule": {"conditions": [condition]},
+            "sponsorCollaboratorsModule": {"leadSponsor": {"name": sponsor}},
+        }
+    }
+
+
+def _full_date(date):
+    """'2020-05' -> '2020-05-01', so partial dates compare as ISO strings."""
+    return (date + "-01-01")[:10] if len(date) < 10 else date
+
+
+def _in_area(study, area, lo, hi, missing):
+    date = (study["protocolSection"]["statusModule"]
+            .get(DATE_AREAS[area], {}).get("date"))
+    if missing:
+        return date is None
+    if date is None:
+        return False
+    date = _full_date(date)
+    return ((lo in ("", "MIN") or date >= _full_date(lo))
+            and (hi in ("", "MAX") or date <= _full_date(hi)))
+
+
+def _project(study, paths):
+    """The API's field selection: keep only the given dotted paths."""
+    out = {}
+    for path in paths:
+        keys = path.split(".")
+        node = study
+        for key in keys:
+            if not isinstance(node, dict) or key not in node:
+                break
+            node = node[key]
+        else:
+            target = out
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = node
+    return out
+
+
+class StubCTGov:
+    """
+    Serves {condition: [study, ...]} on a free local port. Every request is
+    recorded in .requests (its query params) and its client port in
+    .connections. latency (seconds) is slept per request; fail(params, n)
+    may return an HTTP status to answer the n-th request (from 1) with.
+    """
+
+    def __init__(self, studies_by_condition, latency=0.0, fail=None):
+        self.studies_by_condition = studies_by_condition
+        self.latency = latency
+        self.fail = fail
+        self.requests = []
+        self.connections = set()
+        self.bytes_sent = 0  # response bodies, as sent (compressed or not)
+        self.bytes_json = 0  # the same bodies before compression
+        self._selected = {}  # (condition, filter) -> studies, so pages are cheap
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/api/v2/studies"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def select(self, params):
+        """The full result set for a query (before pagination)."""
+        key = (params.get("query.cond"), params.get("filter.advanced"))
+        if key not in self._selected:
+            self._selected[key] = self._filter(params)
+        return self._selected[key]
+
+    def _filter(self, params):
+        studies = self.studies_by_condition.get(params.get("query.cond"), [])
+        for area, lo, hi, missing in AREA_FILTER.findall(params.get("filter.advanced", "")):
+            studies = [s for s in studies if _in_area(s, area, lo, hi, missing)]
+        return studies
+
+    def respond(self, params):
+        """(status, body) for one request."""
+        with self._lock:
+            self.requests.append(params)
+            n = len(self.requests)
+        if self.latency:
+            time.sleep(self.latency)
+        status = self.fail(params, n) if self.fail else None
+        if status:
+            return status, {"error": "injected failure"}
+
+        studies = self.select(params)
+        size = int(params.get("pageSize", 10))
+        offset = int(params.get("pageToken", "p0")[1:])
+        page = studies[offset:offset + size]
+        if params.get("fields"):
+            page = [_project(s, params["fields"].split(",")) for s in page]
+        body = {"studies": page}
+        if offset + size < len(studies):
+            body["nextPageToken"] = f"p{offset + size}"
+        if params.get("countTotal") == "true":
+            body["totalCount"] = len(studies)
+        return 200, body
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            disable_nagle_algorithm = True  # headers and body go out separately
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                with stub._lock:
+                    stub.connections.add(self.client_address[1])
+                status, body = stub.respond(params)
+                payload = json.dumps(body).encode()
+                with stub._lock:
+                    stub.bytes_json += len(payload)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if "gzip" in self.headers.get("Accept-Encoding", ""):
+                    payload = gzip.compress(payload)
+                    self.send_header("Content-Encoding", "gzip")
+                with stub._lock:
+                    stub.bytes_sent += len(payload)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -68,3 +68,433 @@ def test_prediction_validation_error(client):
     response = client.post("/predict", json=bad_payload)
     
     assert response.status_code == 422 # validation error
+
+
+def test_batch_prediction_matches_single(client):
+    """Verify /predict/batch returns one result per nct_id matching /predict"""
+    trials = [
+        {"nct_id": "NCT00000001", "phase": "Phase 3", "condition": "Breast Cancer",
+         "sponsor": "Pfizer", "enrollment": 1000},
+        {"nct_id": "NCT00000002", "phase": "Phase 1", "condition": "Leukemia",
+         "sponsor": "TinyBio", "enrollment": 12},
+        {"nct_id": "NCT00000003", "phase": "Not Specified", "condition": "",
+         "sponsor": "Me", "enrollment": 0},
+    ]
+    response = client.post("/predict/batch", json={"trials": trials})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["model_used"] == "logistic_baseline"
+    assert [r["nct_id"] for r in data["results"]] == [t["nct_id"] for t in trials]
+
+    # batch scoring should agree with the per-row endpoint
+    for trial, result in zip(trials, data["results"]):
+        single = client.post("/predict", json=trial).json()
+        assert result["prediction"] == single["prediction"]
+        assert result["probability"] == single["probability"]
+
+
+def test_batch_prediction_size_limit(client):
+    """Verifies the API rejects empty and oversized batches"""
+    from src.api.schemas import MAX_BATCH_SIZE
+
+    trial = {"nct_id": "NCT1", "phase": "Phase 2", "condition": "Flu",
+             "sponsor": "Me", "enrollment": 10}
+
+    assert client.post("/predict/batch", json={"trials": []}).status_code == 422
+    too_many = {"trials": [trial] * (MAX_BATCH_SIZE + 1)}
+    assert client.post("/predict/batch", json=too_many).status_code == 422
+
+
+def test_feature_layout_matches_featurizer(client):
+    """Serving features are the fitted featurizer's, row for row and batch for single"""
+    import numpy as np
+    import pandas as pd
+    from src.api import app as api
+    from src.api.schemas import TrialPredictionsRequest
+
+    requests = [
+        TrialPredictionsRequest(nct_id="NCT1", phase="Phase 3", condition="Breast Cancer",
+                                sponsor="Pfizer", enrollment=1000),
+        TrialPredictionsRequest(nct_id="NCT2", phase="PHASE1, PHASE2",
+                                condition="Non-small cell lung cancer",
+                                sponsor="TinyBio", enrollment=-5),
+        TrialPredictionsRequest(nct_id="NCT3", phase="Not Specified", condition="",
+                                sponsor="", enrollment=0),
+        TrialPredictionsRequest(nct_id="NCT4", phase="Phase 2", condition="Melanoma",
+                                sponsor="Pfizer", enrollment=float("nan")),
+    ]
+    layout = api.serving.feature_layout
+    X = layout.transform_requests(requests)
+    frame = pd.DataFrame({"phase": [r.phase for r in requests],
+                          "conditions": [r.condition for r in requests],
+                          "sponsor": [r.sponsor for r in requests],
+                          "enrollment": [r.enrollment for r in requests]})
+    expected = pd.DataFrame(layout.featurizer.transform(frame),
+                            columns=layout.featurizer.get_feature_names_out())
+    assert np.array_equal(X, expected.reindex(columns=layout.feature_names, fill_value=0))
+
+    # a request scored alone gets exactly its row of the batch
+    for row, request in zip(X, requests):
+        assert np.array_equal(layout.transform_requests([request])[0], row)
+
+    # phases are matched as in preparation: "Phase 3" is PHASE3
+    columns = list(layout.feature_names)
+    assert X[0, columns.index("is_phase3")] == 1
+    assert X[1, columns.index("is_phase1")] == X[1, columns.index("is_phase2")] == 1
+    assert X[2, columns.index("is_phase_not_specified")] == 1
+
+
+def test_fused_engine_matches_pipeline(client):
+    """Verify the served fused engine agrees with predict_proba to 1e-9"""
+    import numpy as np
+    from src.api import app as api
+    from src.api.schemas import TrialPredictionsRequest
+
+    assert api.serving.scorer is not None
+    requests = [
+        TrialPredictionsRequest(nct_id=f"NCT{i}", phase=phase, condition=cond,
+                                sponsor=sponsor, enrollment=enrollment)
+        for i, (phase, cond, sponsor, enrollment) in enumerate([
+            ("Phase 3", "Breast Cancer", "Pfizer", 1000),
+            ("Phase 1/Phase 2", "Leukemia", "TinyBio", 12),
+            ("Not Specified", "", "", 0),
+        ])
+    ]
+    X = api.serving.feature_layout.transform_requests(requests)
+    expected = api.serving.models["logistic_baseline"].predict_proba(api.serving.feature_layout.to_frame(X))
+
+    assert np.allclose(api.serving.scorer.predict_proba(X), expected, rtol=0, atol=1e-9)
+
+
+def test_prediction_cache_reports_hits(client):
+    """Repeated trials (any nct_id, any casing) are served from the cache"""
+    payload = {"nct_id": "NCT1", "phase": "Phase 2", "condition": "Lung Cancer",
+               "sponsor": "Pfizer", "enrollment": 250}
+    first = client.post("/predict", json=payload).json()
+    before = client.get("/health").json()["prediction_cache"]
+
+    same_trial = dict(payload, nct_id="NCT2", condition="  lung   CANCER ")
+    second = client.post("/predict", json=same_trial).json()
+    after = client.get("/health").json()["prediction_cache"]
+
+    assert second == first
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+
+
+def test_health_reports_condition_cache(client):
+    """The condition-vector cache is active and reports its counters"""
+    payload = {"nct_id": "NCT1", "phase": "Phase 1", "condition": "Melanoma",
+               "sponsor": "Me", "enrollment": 40}
+    client.post("/predict/batch", json={"trials": [payload, payload]})
+
+    stats = client.get("/health").json()["condition_cache"]
+    assert stats is not None
+    assert stats["bytes_used"] <= stats["max_bytes"]
+    assert stats["hits"] + stats["misses"] >= 1
+
+
+def _copy_serving_files(tmp_path, monkeypatch):
+    """Points the API config at a private copy of models/ for reload tests"""
+    import shutil
+    from src.api import app as api
+
+    models = {}
+    for name, path in api.config["models"].items():
+        models[name] = str(tmp_path / os.path.basename(path))
+        shutil.copy(path, models[name])
+    artifacts = {}
+    for name, path in api.config["artifacts"].items():
+        artifacts[name] = str(tmp_path / os.path.basename(path))
+        if os.path.exists(path):  # e.g. no featurizer for older models
+            shutil.copy(path, artifacts[name])
+    monkeypatch.setitem(api.config, "models", models)
+    monkeypatch.setitem(api.config, "artifacts", artifacts)
+    # no bundle in the copy: reloads read the joblib files above
+    monkeypatch.setitem(api.config, "serving", {"bundle": str(tmp_path / "bundle")})
+    monkeypatch.setenv("API_ADMIN_TOKEN", "test-token")
+    return models, artifacts
+
+
+ADMIN = {"X-Admin-Token": "test-token"}
+
+
+def test_admin_reload_swaps_version(client, tmp_path, monkeypatch):
+    """Reload picks up a retrained model; in-flight holders keep the old one"""
+    import joblib
+    from src.api import app as api
+    from src.utils.artifacts import save_artifact
+
+    models, _ = _copy_serving_files(tmp_path, monkeypatch)
+    payload = {"nct_id": "NCT1", "phase": "Phase 2", "condition": "Breast Cancer",
+               "sponsor": "Pfizer", "enrollment": 300}
+    before = client.post("/predict", json=payload).json()
+    old_state = api.serving
+    old_version = client.get("/health").json()["version"]
+
+    # unchanged files -> nothing to swap
+    assert client.post("/admin/reload", headers=ADMIN).json()["status"] == "unchanged"
+
+    # "retrain": shift the intercept so every probability moves
+    model = joblib.load(models["logistic_baseline"])
+    model.named_steps["classifier"].intercept_ = model.named_steps["classifier"].intercept_ + 2.0
+    save_artifact(model, models["logistic_baseline"])
+
+    response = client.post("/admin/reload", headers=ADMIN)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "reloaded"
+    assert body["previous_version"] == old_version
+    assert client.get("/health").json()["version"] == body["version"] != old_version
+
+    after = client.post("/predict", json=payload).json()
+    assert after["probability"] > before["probability"]
+    # a request that grabbed the old state still scores on the old version
+    from src.api.schemas import TrialPredictionsRequest
+    X = old_state.feature_layout.transform_requests([TrialPredictionsRequest(**payload)])
+    assert round(float(old_state.score(X)[0]), 4) == before["probability"]
+    assert client.get("/health").json()["prediction_cache"]["hits"] == 0
+
+
+def test_admin_reload_rejects_mismatched_artifacts(client, tmp_path, monkeypatch):
+    """A vectorizer from a different run fails validation; old version keeps serving"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from src.utils.artifacts import load_artifact, save_artifact
+
+    _, artifacts = _copy_serving_files(tmp_path, monkeypatch)
+    version = client.get("/health").json()["version"]
+    mismatched = TfidfVectorizer().fit(["influenza vaccine", "asthma inhaler"])
+    save_artifact(mismatched, artifacts["tfidf_vectorizer"])
+    if os.path.exists(artifacts["featurizer"]):  # served instead of the legacy files
+        featurizer, _ = load_artifact(artifacts["featurizer"], mmap_mode=None)
+        featurizer.tfidf_ = mismatched
+        save_artifact(featurizer._compile(), artifacts["featurizer"])
+
+    response = client.post("/admin/reload", headers=ADMIN)
+
+    assert response.status_code == 500
+    assert "out of sync" in response.json()["detail"]
+    assert client.get("/health").json()["version"] == version
+
+
+def test_startup_fails_on_mismatched_artifacts(tmp_path, monkeypatch):
+    """Startup runs the reload validation: out-of-sync artifacts stop the API booting"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from src.utils.artifacts import load_artifact, save_artifact
+
+    _, artifacts = _copy_serving_files(tmp_path, monkeypatch)
+    mismatched = TfidfVectorizer().fit(["influenza vaccine", "asthma inhaler"])
+    save_artifact(mismatched, artifacts["tfidf_vectorizer"])
+    if os.path.exists(artifacts["featurizer"]):
+        featurizer, _ = load_artifact(artifacts["featurizer"], mmap_mode=None)
+        featurizer.tfidf_ = mismatched
+        save_artifact(featurizer._compile(), artifacts["featurizer"])
+
+    with pytest.raises(RuntimeError, match="out of sync"):
+        with TestClient(app):
+            pass
+
+
+def test_admin_reload_requires_token(client, monkeypatch):
+    """Reload is off without API_ADMIN_TOKEN and needs the matching header"""
+    monkeypatch.delenv("API_ADMIN_TOKEN", raising=False)
+    assert client.post("/admin/reload").status_code == 403
+    assert client.post("/admin/reload", headers={"X-Admin-Token": ""}).status_code == 403
+
+    monkeypatch.setenv("API_ADMIN_TOKEN", "s3cret")
+    assert client.post("/admin/reload").status_code == 403
+    assert client.post("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    ok = client.post("/admin/reload", headers={"X-Admin-Token": "s3cret"})
+    assert ok.status_code == 200
+
+
+def test_metrics_endpoint(client, monkeypatch):
+    """/metrics exposes stage latencies, outcomes, error counts, RSS and load times"""
+    from src.api import app as api
+    from src.inference.serving import ServingState
+
+    payload = {"nct_id": "NCT1", "phase": "Phase 4", "condition": "Glioblastoma",
+               "sponsor": "Somebody New", "enrollment": 77}
+    client.post("/predict/batch", json={"trials": [payload]})
+    client.post("/predict", json=dict(payload, enrollment="many"))  # 422
+    monkeypatch.setattr(api, "serving", ServingState())
+    client.post("/predict", json=payload)  # 503
+    monkeypatch.undo()
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    text = response.text
+    for stage in ["parse_validate", "cache_lookup", "tfidf", "transform", "score"]:
+        assert f'api_stage_latency_seconds_count{{endpoint="/predict/batch",stage="{stage}"}}' in text
+    assert 'api_predictions_total{model="logistic_baseline",outcome=' in text
+    assert 'api_errors_total{endpoint="/predict",status="422"}' in text
+    assert 'api_errors_total{endpoint="/predict",status="503"}' in text
+    assert 'api_request_latency_seconds_bucket{endpoint="/predict/batch",le="+Inf"}' in text
+    assert "process_resident_memory_bytes " in text
+    assert 'model_load_seconds{kind="model",name="logistic_baseline"}' in text
+
+
+def test_nan_enrollment_scores_like_training_median(client):
+    """NaN enrollment is imputed with the featurizer's training median, never null"""
+    import math
+    from src.api import app as api
+    from src.api.schemas import TrialPredictionsRequest
+
+    layout = api.serving.feature_layout
+    base = {"nct_id": "NCT1", "phase": "Phase 2", "condition": "Melanoma",
+            "sponsor": "Pfizer", "enrollment": layout.featurizer.enrollment_median_}
+    nan_trial = TrialPredictionsRequest(**dict(base, enrollment=float("nan")))
+    assert layout.cache_key(nan_trial) == layout.cache_key(TrialPredictionsRequest(**base))
+
+    api.serving.prediction_cache.clear()
+    response = client.post(
+        "/predict/batch",
+        content='{"trials": [{"nct_id": "NCT1", "phase": "Phase 2", '
+                '"condition": "Melanoma", "sponsor": "Pfizer", "enrollment": NaN}]}',
+        headers={"Content-Type": "application/json"},
+    )
+    assert response.status_code == 200
+    prob = response.json()["results"][0]["probability"]
+    assert prob is not None and math.isfinite(prob)
+    assert prob == client.post("/predict", json=base).json()["probability"]
+
+
+def test_version_names_the_loaded_files(client, tmp_path, monkeypatch):
+    """A file replaced mid-load forces another attempt; version matches what was loaded"""
+    import joblib
+    from src.api import app as api
+    from src.inference import serving as serving_module
+    from src.utils.artifacts import save_artifact
+
+    models, artifacts = _copy_serving_files(tmp_path, monkeypatch)
+    real_load = serving_module.load_artifacts
+    calls = []
+
+    def racing_load(*args, **kwargs):
+        result = real_load(*args, **kwargs)
+        if not calls:
+            # a retrain lands right after the first load finished
+            model = joblib.load(models["logistic_baseline"])
+            model.named_steps["classifier"].intercept_ = model.named_steps["classifier"].intercept_ - 1.0
+            save_artifact(model, models["logistic_baseline"])
+        calls.append(1)
+        return result
+
+    monkeypatch.setattr(serving_module, "load_artifacts", racing_load)
+    state = serving_module.load_serving_state(api.config, api.api_params)
+
+    assert len(calls) == 2
+    files = [p for p in list(models.values()) + list(artifacts.values()) if os.path.exists(p)]
+    assert state.version == serving_module.fingerprint_files(files)
+    assert state.models["logistic_baseline"].named_steps["classifier"].intercept_ == \
+        joblib.load(models["logistic_baseline"]).named_steps["classifier"].intercept_
+
+
+def test_metrics_disabled_skips_stage_and_outcome_recording(client, monkeypatch):
+    """With metrics off, scoring records no stage timings or outcome counts"""
+    from src.api import app as api
+    from src.api.metrics import PREDICTIONS, STAGE_LATENCY
+
+    monkeypatch.setattr(api, "metrics_enabled", False)
+    api.serving.prediction_cache.clear()
+    before_stage = STAGE_LATENCY.count("/predict", "score")
+    before_outcomes = sum(PREDICTIONS.value("logistic_baseline", o) for o in ["Success", "Failure"])
+
+    payload = {"nct_id": "NCT1", "phase": "Phase 1", "condition": "Lymphoma",
+               "sponsor": "Me", "enrollment": 60}
+    assert client.post("/predict", json=payload).status_code == 200
+
+    assert STAGE_LATENCY.count("/predict", "score") == before_stage
+    assert sum(PREDICTIONS.value("logistic_baseline", o)
+               for o in ["Success", "Failure"]) == before_outcomes
+
+
+@pytest.fixture
+def live_server():
+    """Runs the app under a real uvicorn server on a free local port"""
+    import socket
+    import threading
+    import time
+    import uvicorn
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.time() + 30
+    while not server.started:
+        assert time.time() < deadline, "uvicorn did not start"
+        time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join(timeout=10)
+
+
+def test_stream_prediction_ndjson(live_server, monkeypatch):
+    """/predict/stream scores NDJSON incrementally and reports bad lines in place"""
+    import json
+    import httpx
+    from src.api import app as api
+
+    # tiny internal chunks so several flushes happen
+    monkeypatch.setitem(api.api_params, "stream", {"chunk_size": 2, "max_line_bytes": 4096})
+    good = {"nct_id": "NCT1", "phase": "Phase 3", "condition": "Breast Cancer",
+            "sponsor": "Pfizer", "enrollment": 1000}
+    lines = [
+        json.dumps(good),
+        '{"nct_id": "NCT2", "phase": "Phase 1"',          # truncated json
+        json.dumps(dict(good, nct_id="NCT3", enrollment="lots")),
+        "",                                                # blank line is skipped
+        json.dumps(dict(good, nct_id="NCT4", condition="Leukemia")),
+        "x" * 5000,                                        # over the line limit
+        json.dumps(dict(good, nct_id="NCT5")),
+    ]
+    body = ("\n".join(lines)).encode()
+
+    def chunks():
+        # split the upload at awkward places, mid-line included
+        for i in range(0, len(body), 37):
+            yield body[i:i + 37]
+
+    with httpx.Client(base_url=live_server, timeout=30) as http:
+        response = http.post("/predict/stream", content=chunks(),
+                             headers={"Content-Type": "application/x-ndjson"})
+        single = http.post("/predict", json=good).json()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["line"] for r in results] == [1, 2, 3, 5, 6, 7]
+    assert [r.get("nct_id") for r in results] == ["NCT1", None, None, "NCT4", None, "NCT5"]
+    assert "error" in results[1] and "enrollment" in results[2]["error"]
+    assert "exceeds" in results[4]["error"]
+
+    assert results[0]["probability"] == single["probability"]
+    assert results[5]["prediction"] == single["prediction"]
+
+
+def test_ndjson_line_limit_applies_to_complete_lines():
+    """A too-long line is rejected even when it arrives whole in one chunk"""
+    import asyncio
+    from src.api.streaming import LineTooLong, iter_ndjson_lines
+
+    async def collect(chunks, limit):
+        async def source():
+            for c in chunks:
+                yield c
+        return [item async for item in iter_ndjson_lines(source(), limit)]
+
+    out = asyncio.run(collect([b"ok\n" + b"y" * 50 + b"\nfine\n", b"tail"], 10))
+    assert [n for n, _ in out] == [1, 2, 3, 4]
+    assert out[0][1] == b"ok" and out[2][1] == b"fine" and out[3][1] == b"tail"
+    assert isinstance(out[1][1], LineTooLong)
+
+    # a long line spread over many chunks is reported once and skipped
+    out = asyncio.run(collect([b"z" * 6] * 5 + [b"z\nnext"], 10))
+    assert [n for n, _ in out] == [1, 2]
+    assert isinstance(out[0][1], LineTooLong) and out[1][1] == b"next"
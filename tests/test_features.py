@@ -87,3 +87,99 @@ def test_build_sponsor_features():
     # last row (TinyBio) should be 1 in OTHER_SPONSOR
     assert df_processed.iloc[5]['sponsor_OTHER_SPONSOR'] == 1
     assert df_processed.iloc[5]['sponsor_Pfizer'] == 0
+
+
+def test_sparse_feature_builders_match_dense():
+    """Sparse sponsor/TF-IDF blocks equal the dense columns, in the same order"""
+    from src.features.build_features import (
+        build_conditions_feature,
+        build_conditions_matrix,
+        build_sponsor_matrix,
+    )
+    df = pd.DataFrame({
+        'sponsor': ['Pfizer', 'Roche', None, 'TinyBio', 'Pfizer', 'Roche', 'Amgen'],
+        'conditions': ['Breast Cancer', 'Lung Cancer', None, 'Heart Failure',
+                       'Breast Cancer, Lung Cancer', '', 'Type 2 Diabetes'],
+    })
+
+    dense = build_sponsor_features(df.copy(), top_n=2)
+    rest, matrix, names = build_sponsor_matrix(df.copy(), top_n=2)
+    assert names == list(dense.columns[dense.columns.str.startswith('sponsor_')])
+    assert np.array_equal(matrix.toarray(), dense[names].to_numpy(dtype=float))
+    assert 'sponsor' not in rest.columns
+
+    dense = build_conditions_feature(df.copy(), max_features=10)
+    rest, matrix, names = build_conditions_matrix(df.copy(), max_features=10)
+    assert names == list(dense.columns[dense.columns.str.startswith('cond_')])
+    assert np.allclose(matrix.toarray(), dense[names].to_numpy())
+    assert 'conditions' not in rest.columns
+
+
+def _messy_frame(rng, n):
+    """Phase/sponsor values as they come out of real registry dumps, shuffled"""
+    phases = ['PHASE1', 'PHASE2', 'PHASE1, PHASE2', 'Phase 3', 'phase 4', 'PHASE2|PHASE3',
+              'EARLY_PHASE1', 'NA', '', ' ', 'Not Specified', 'NOT_SPECIFIED',
+              'not_specified', 'Phase  1', 'ｐｈａｓｅ１', None, np.nan]
+    sponsors = [f'Sponsor {i}' for i in range(40)] + ['pfizer', 'Pfizer', 'Pfizer ', '', None]
+    return pd.DataFrame({
+        'phase': rng.choice(np.array(phases, dtype=object), n),
+        'sponsor': rng.choice(np.array(sponsors, dtype=object), n),
+        'other': rng.integers(0, 10, n),
+    }, index=rng.permutation(n) * 3)  # non-default index, as after dropna
+
+
+def test_vectorized_features_match_rowwise_reference():
+    """Randomized frames: vectorized phase/sponsor features equal the .apply originals"""
+    import rowwise_features as reference
+
+    for seed in range(25):
+        rng = np.random.default_rng(seed)
+        df = _messy_frame(rng, int(rng.integers(1, 400)))
+        pd.testing.assert_frame_equal(clean_phase_column(df.copy()),
+                                      reference.clean_phase_column(df.copy()))
+        top_n = int(rng.integers(0, 50))
+        pd.testing.assert_frame_equal(build_sponsor_features(df.copy(), top_n=top_n),
+                                      reference.build_sponsor_features(df.copy(), top_n=top_n))
+
+
+def test_featurizer_matches_feature_functions_and_scores_rows_alone(tmp_path):
+    """ClinicalTrialFeaturizer reproduces the pandas feature steps; one row = its batch row"""
+    from src.features.build_features import build_conditions_feature
+    from src.features.featurizer import ClinicalTrialFeaturizer
+    from src.utils.artifacts import load_artifact, save_artifact
+
+    df = pd.DataFrame({
+        'phase': ['PHASE1', 'PHASE2, PHASE3', None, 'PHASE4', 'PHASE2', 'NA', 'PHASE3'],
+        'conditions': ['Breast Cancer', 'Lung Cancer', None, 'Heart Failure',
+                       'Breast Cancer, Lung Cancer', '', 'Type 2 Diabetes'],
+        'sponsor': ['Pfizer', 'Roche', None, 'TinyBio', 'Pfizer', 'Roche', 'Amgen'],
+        'enrollment': [100, None, 30, 5000, 0, 12, None],
+    })
+    featurizer = ClinicalTrialFeaturizer(max_features=10, top_sponsors=2).fit(df)
+    save_artifact(featurizer, str(tmp_path / 'featurizer.joblib'))
+    featurizer, _ = load_artifact(str(tmp_path / 'featurizer.joblib'))
+    X = featurizer.transform(df)
+
+    expected = clean_enrollment_column(clean_phase_column(df.copy()))
+    expected = build_sponsor_features(expected, top_n=2)
+    expected = build_conditions_feature(expected, max_features=10)
+    names = featurizer.get_feature_names_out()
+    assert sorted(names) == sorted(expected.columns)
+    assert np.allclose(X, expected[names].to_numpy(dtype=float))
+    assert featurizer.enrollment_median_ == 30
+
+    sparse_X = featurizer.transform_columns(df['phase'], df['conditions'], df['sponsor'],
+                                            df['enrollment'], sparse_output=True)
+    assert np.array_equal(sparse_X.toarray(), X)
+    for i in range(len(df)):
+        assert np.array_equal(featurizer.transform(df.iloc[[i]]), X[[i]])
+    # larger batches take the factorized path
+    assert np.array_equal(featurizer.transform(pd.concat([df] * 5)), np.vstack([X] * 5))
+
+    # request spellings match the registry's: 'Phase 2' is PHASE2, 'Not Specified' is missing
+    row = featurizer.transform(pd.DataFrame({'phase': ['Phase 2'], 'conditions': ['x'],
+                                             'sponsor': ['Nobody'], 'enrollment': [None]}))
+    assert np.array_equal(row[0, :6], [0, 1, 0, 0, 0, np.log1p(30)])
+    row = featurizer.transform(pd.DataFrame({'phase': ['Not Specified'], 'conditions': ['x'],
+                                             'sponsor': ['Pfizer'], 'enrollment': [-3]}))
+    assert np.array_equal(row[0, :6], [0, 0, 0, 0, 1, 0])
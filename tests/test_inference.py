@@ -0,0 +1,254 @@
+# tests/test_inference.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.inference.linear_scorer import LinearScorer
+
+
+def _fit_pipeline(numeric_transformer=None, n=300, seed=0):
+    """Fits a small pipeline shaped like the one in model_training"""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'is_phase1': rng.integers(0, 2, n),
+        'is_phase3': rng.integers(0, 2, n),
+        'enrollment_log': rng.normal(4, 2, n),
+        'sponsor_Pfizer': rng.integers(0, 2, n),
+        'cond_cancer': rng.random(n),
+    }).astype(float)
+    y = (X['enrollment_log'] + rng.normal(0, 1, n) > 4).astype(int)
+
+    preprocessor = ColumnTransformer(
+        transformers=[('num', numeric_transformer or StandardScaler(), ['enrollment_log'])],
+        remainder='passthrough',
+    )
+    pipeline = Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('classifier', LogisticRegression(class_weight='balanced', max_iter=1000)),
+    ])
+    pipeline.fit(X, y)
+    return pipeline, X
+
+
+def test_fused_scorer_matches_predict_proba():
+    """Fused dot-product probabilities match sklearn to 1e-9"""
+    pipeline, X = _fit_pipeline()
+    scorer = LinearScorer.from_pipeline(pipeline)
+    expected = pipeline.predict_proba(X)
+
+    # dense batch, sparse batch and a single 1-D row
+    assert np.allclose(scorer.predict_proba(X.to_numpy()), expected, rtol=0, atol=1e-9)
+    assert np.allclose(
+        scorer.predict_proba(sparse.csr_matrix(X.to_numpy())), expected, rtol=0, atol=1e-9
+    )
+    assert np.allclose(
+        scorer.predict_proba(X.to_numpy()[0]), expected[:1], rtol=0, atol=1e-9
+    )
+
+
+def test_fused_scorer_reorders_to_layout():
+    """Weights follow the requested column order, not the training order"""
+    pipeline, X = _fit_pipeline()
+    order = list(reversed(X.columns))
+    scorer = LinearScorer.from_pipeline(pipeline, feature_names=order)
+
+    assert scorer.feature_names == order
+    assert np.allclose(
+        scorer.predict_proba(X[order].to_numpy())[:, 1],
+        pipeline.predict_proba(X)[:, 1],
+        rtol=0,
+        atol=1e-9,
+    )
+
+
+def test_fused_scorer_rejects_non_affine_steps():
+    """Pipelines the engine cannot fold must be refused, not mis-scored"""
+    pipeline, _ = _fit_pipeline(numeric_transformer=MinMaxScaler())
+
+    with pytest.raises(ValueError):
+        LinearScorer.from_pipeline(pipeline)
+
+
+def test_prediction_cache_lru_eviction():
+    """Least recently used entries are evicted once max_size is exceeded"""
+    from src.inference.cache import PredictionCache
+
+    cache = PredictionCache(max_size=2, ttl_seconds=None)
+    cache.put('a', 0.1)
+    cache.put('b', 0.2)
+    assert cache.get('a') == 0.1  # 'a' is now most recently used
+    cache.put('c', 0.3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 0.1
+    assert cache.get('c') == 0.3
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 3 and stats['misses'] == 1
+
+
+def test_prediction_cache_ttl_expiry():
+    """Entries older than the TTL are treated as misses and dropped"""
+    from src.inference.cache import PredictionCache
+
+    now = [0.0]
+    cache = PredictionCache(max_size=10, ttl_seconds=5, clock=lambda: now[0])
+    cache.put('a', 0.5)
+    now[0] = 4.9
+    assert cache.get('a') == 0.5
+    now[0] = 5.0
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+    assert len(cache) == 0
+
+
+def _fit_tfidf():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    corpus = ['Breast Cancer', 'Non-small cell lung cancer', 'Lung Cancer, Melanoma',
+              'Type 2 Diabetes', 'Heart Failure', 'Breast Cancer, Ovarian Cancer']
+    tfidf = TfidfVectorizer(stop_words='english', lowercase=True, max_features=100,
+                            ngram_range=(1, 2))
+    return tfidf.fit(corpus)
+
+
+def test_condition_cache_matches_tfidf():
+    """Cached vectors are identical to tfidf.transform, hits or misses"""
+    from src.inference.cache import ConditionVectorCache
+
+    tfidf = _fit_tfidf()
+    cache = ConditionVectorCache(tfidf)
+    conditions = ['Breast Cancer', '  breast   CANCER', 'Heart Failure', '', 'unknown',
+                  'Breast Cancer']
+
+    first = cache.transform(conditions)
+    second = cache.transform(conditions)
+
+    expected = tfidf.transform(conditions).toarray()
+    assert np.allclose(first.toarray(), expected)
+    assert np.allclose(second.toarray(), expected)
+    stats = cache.stats()
+    assert stats['entries'] == 4  # normalized duplicates share one entry
+    assert stats['hits'] == len(conditions)  # second pass only
+    assert stats['misses'] == len(conditions)
+
+
+def test_condition_cache_memory_budget():
+    """The cache evicts least recently used vectors to stay within max_bytes"""
+    from src.inference.cache import ConditionVectorCache
+
+    tfidf = _fit_tfidf()
+    budget = 3 * (ConditionVectorCache.ENTRY_OVERHEAD_BYTES + 100)
+    cache = ConditionVectorCache(tfidf, max_bytes=budget)
+    cache.warm(['Breast Cancer', 'Lung Cancer', 'Heart Failure', 'Type 2 Diabetes',
+                'Melanoma', 'Ovarian Cancer'])
+
+    stats = cache.stats()
+    assert stats['bytes_used'] <= budget
+    assert stats['evictions'] > 0
+    # the hottest (first) conditions survive warm-up
+    cache.transform(['Breast Cancer'])
+    assert cache.stats()['hits'] == 1
+
+
+def test_model_dir_watcher_fires_once_per_change(tmp_path):
+    """The watcher calls back once a file change has settled"""
+    import threading
+    import time
+    from src.inference.serving import ModelDirWatcher
+
+    path = tmp_path / 'model.pkl'
+    path.write_bytes(b'v1')
+    fired = threading.Event()
+    calls = []
+
+    def on_change():
+        calls.append(path.read_bytes())
+        fired.set()
+
+    watcher = ModelDirWatcher([str(path)], on_change, poll_seconds=0.02)
+    watcher.start()
+    try:
+        time.sleep(0.05)
+        path.write_bytes(b'version-2')
+        assert fired.wait(2.0)
+        time.sleep(0.1)
+    finally:
+        watcher.stop()
+        watcher.join(1.0)
+
+    assert calls == [b'version-2']
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Histogram buckets are cumulative and end with +Inf == count"""
+    from src.api.metrics import Histogram
+
+    hist = Histogram('latency_seconds', 'test', labels=('stage',), buckets=(0.1, 1.0))
+    for value in [0.05, 0.5, 0.5, 3.0]:
+        hist.observe(value, 'score')
+
+    lines = hist.render()
+    assert 'latency_seconds_bucket{stage="score",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="score",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="score",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{stage="score"} 4' in lines
+    assert hist.count('score') == 4
+
+
+def test_condition_cache_keeps_exact_keys_for_case_sensitive_vectorizer():
+    """Without lowercase=True the cache must not fold case or whitespace"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from src.inference.cache import ConditionVectorCache
+
+    tfidf = TfidfVectorizer(lowercase=False).fit(['Breast Cancer', 'breast cancer', 'Melanoma'])
+    cache = ConditionVectorCache(tfidf)
+    conditions = ['Breast Cancer', 'breast cancer', 'Breast  Cancer']
+
+    assert not cache.folds_keys
+    assert np.allclose(cache.transform(conditions).toarray(),
+                       tfidf.transform(conditions).toarray())
+    assert cache.stats()['entries'] == 3
+    assert ConditionVectorCache(_fit_tfidf()).folds_keys
+
+
+def test_condition_cache_vectorizes_concurrent_misses_outside_the_lock():
+    """Misses from different threads are vectorized in parallel, then cached"""
+    import threading
+    import time
+    from src.inference.cache import ConditionVectorCache
+
+    tfidf = _fit_tfidf()
+    transform = tfidf.transform
+    active, peak = [0], [0]
+    counter = threading.Lock()
+
+    def slow_transform(conditions):
+        with counter:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.2)
+        with counter:
+            active[0] -= 1
+        return transform(conditions)
+
+    tfidf.transform = slow_transform
+    cache = ConditionVectorCache(tfidf)
+    threads = [threading.Thread(target=cache.transform, args=([c],))
+               for c in ['Breast Cancer', 'Heart Failure', 'Type 2 Diabetes']]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 3
+    assert cache.stats()['entries'] == 3
+    hit = cache.transform(['Heart Failure'])
+    assert cache.stats()['hits'] == 1
+    assert np.allclose(hit.toarray(), transform(['Heart Failure']).toarray())
@@ -0,0 +1,624 @@
+# tests/test_pipelines.py
+
+import json
+
+import pandas as pd
+
+from src.utils.config_loader import load_config
+from src.pipelines.batch_scoring import run_scoring_pipeline
+
+
+def _interim_rows():
+    return pd.DataFrame({
+        'nct_id': [f'NCT{i:08d}' for i in range(7)],
+        'phase': ['PHASE3', 'PHASE1, PHASE2', None, 'PHASE2', 'PHASE4', 'EARLY_PHASE1', 'PHASE3'],
+        'status': ['COMPLETED'] * 7,
+        'enrollment': [1000, 20, None, 150, 0, 45, 300],
+        'conditions': ['Breast Cancer', 'Leukemia', None, 'Melanoma, Lymphoma',
+                       'Heart Failure', 'Glioblastoma', 'Prostate Cancer'],
+        'sponsor': ['Pfizer', 'TinyBio', None, 'Novartis', 'Univ 2', 'Roche', 'Amgen'],
+    })
+
+
+def _copy_text(src, dst, name, pause=0.0):
+    """Toy pipeline stage: logs (name, start, end) to runs.log, copies src to dst"""
+    import time
+    start = time.time()
+    time.sleep(pause)
+    with open(src) as f:
+        text = f.read()
+    if dst:
+        with open(dst, 'w') as f:
+            f.write(text)
+    with open('runs.log', 'a') as f:
+        f.write(f'{name} {start} {time.time()}\n')
+
+
+def _fail():
+    raise ValueError('boom')
+
+
+def test_offline_scoring_is_ordered_and_worker_independent(tmp_path):
+    """Parallel scoring writes the same rows, in input order, as one process"""
+    paths = load_config('paths.yaml')
+    params = load_config('params.yaml')['api']
+    input_path = str(tmp_path / 'interim.csv')
+    _interim_rows().to_csv(input_path, index=False)
+
+    single = str(tmp_path / 'single.csv')
+    multi = str(tmp_path / 'multi.csv')
+    run_scoring_pipeline(input_path, single, paths, params, chunk_size=2, workers=1)
+    stats = run_scoring_pipeline(input_path, multi, paths, params, chunk_size=2, workers=2)
+
+    assert stats['rows'] == 7
+    with open(single, 'rb') as a, open(multi, 'rb') as b:
+        assert a.read() == b.read()
+    scored = pd.read_csv(single)
+    assert list(scored.columns) == ['nct_id', 'prediction', 'probability']
+    assert scored['nct_id'].tolist() == _interim_rows()['nct_id'].tolist()
+    assert scored['probability'].between(0, 1).all()
+    assert not (tmp_path / 'single.csv.tmp').exists()
+
+
+def test_offline_scoring_matches_api_and_reads_raw_json(tmp_path):
+    """Scores equal /predict's, and a raw JSON dump scores like its interim CSV"""
+    from fastapi.testclient import TestClient
+    from src.api.app import app
+
+    paths = load_config('paths.yaml')
+    params = load_config('params.yaml')['api']
+    rows = _interim_rows()
+    csv_path = str(tmp_path / 'interim.csv')
+    rows.to_csv(csv_path, index=False)
+
+    studies = []
+    for r in rows.itertuples():
+        protocol = {
+            'identificationModule': {'nctId': r.nct_id},
+            'statusModule': {'overallStatus': r.status},
+            'designModule': {'phases': r.phase.split(', ') if isinstance(r.phase, str) else [],
+                             'enrollmentInfo': {'count': None if pd.isna(r.enrollment) else int(r.enrollment)}},
+            'conditionsModule': {'conditions': r.conditions.split(', ') if isinstance(r.conditions, str) else []},
+            'sponsorCollaboratorsModule': {'leadSponsor': {'name': r.sponsor}},
+        }
+        studies.append({'protocolSection': protocol})
+    json_path = str(tmp_path / 'raw.json')
+    with open(json_path, 'w') as f:
+        json.dump({'studies': studies}, f)
+
+    from_csv = str(tmp_path / 'from_csv.csv')
+    from_json = str(tmp_path / 'from_json.csv')
+    run_scoring_pipeline(csv_path, from_csv, paths, params, chunk_size=3, workers=1)
+    run_scoring_pipeline(json_path, from_json, paths, params, chunk_size=3, workers=1)
+    scored = pd.read_csv(from_csv)
+    assert scored.equals(pd.read_csv(from_json))
+
+    with TestClient(app) as client:
+        payload = {'nct_id': 'NCT00000000', 'phase': 'PHASE3', 'condition': 'Breast Cancer',
+                   'sponsor': 'Pfizer', 'enrollment': 1000}
+        api = client.post('/predict', json=payload).json()
+    assert scored.loc[0, 'probability'] == api['probability']
+    assert scored.loc[0, 'prediction'] == api['prediction']
+
+
+def test_streaming_ingestion_feeds_transformation(tmp_path):
+    """Ingest to .ndjson.gz page by page; transform reads it like the JSON store"""
+    from stub_ctgov import StubCTGov, make_study
+    from src.pipelines.data_ingestion import run_ingestion_pipeline
+    from src.pipelines.data_transformation import run_transformation_pipeline
+
+    studies = [make_study(f'NCT{i:08d}', enrollment=i) for i in range(45)]
+    # the fifth page fails: the four pages before it are already on disk
+    fail = lambda params, n: 503 if params.get('pageToken') == 'p40' else None
+
+    with StubCTGov({'cancer': studies}, fail=fail) as stub:
+        for raw in ['raw.json', 'raw.ndjson.gz']:
+            run_ingestion_pipeline(stub.url, str(tmp_path / raw), 'cancer',
+                                   page_size=10, max_pages=10)
+
+    for raw in ['raw.json', 'raw.ndjson.gz']:
+        run_transformation_pipeline(str(tmp_path / raw), str(tmp_path / f'{raw}.csv'))
+    legacy = pd.read_csv(tmp_path / 'raw.json.csv')
+    streamed = pd.read_csv(tmp_path / 'raw.ndjson.gz.csv')
+    assert len(streamed) == 40
+    assert streamed.equals(legacy)
+
+
+def test_checkpointed_ingestion_resumes_then_merges_deltas(tmp_path):
+    """A failure mid-chain resumes from the saved token; a delta run merges updates by nctId"""
+    import os
+    from stub_ctgov import StubCTGov, make_study
+    from src.pipelines.data_ingestion import run_ingestion_pipeline
+    from src.utils.ingestion import study_id
+    from src.utils.raw_io import iter_raw_studies
+
+    corpus = {
+        'oncology': [make_study(f'NCT1{i:07d}', last_update='2020-01-01') for i in range(30)],
+        'cardiology': [make_study(f'NCT2{i:07d}', last_update='2020-01-01') for i in range(50)],
+    }
+    broken = {'on': True}
+    fail = lambda params, n: 500 if (broken['on'] and params['query.cond'] == 'cardiology'
+                                     and params.get('pageToken') == 'p20') else None
+    store = str(tmp_path / 'raw.ndjson.gz')
+    options = dict(api_url=None, output_path=store, condition=None, page_size=10, max_pages=100,
+                   conditions=list(corpus), checkpoint_dir=str(tmp_path / 'ckpt'),
+                   state_path=str(tmp_path / 'state.json'))
+
+    with StubCTGov(corpus, fail=fail) as stub:
+        options['api_url'] = stub.url
+
+        # run 1: oncology completes, cardiology dies on its third page
+        assert run_ingestion_pipeline(**options) is False
+        assert not os.path.exists(store)
+        checkpoint = json.loads((tmp_path / 'ckpt' / 'checkpoint.json').read_text())
+        assert checkpoint['conditions']['oncology']['done']
+        assert checkpoint['conditions']['cardiology']['page_token'] == 'p20'
+        assert checkpoint['conditions']['cardiology']['studies'] == 20
+        # killed mid-write: a torn line after the last checkpointed page
+        part = tmp_path / 'ckpt' / checkpoint['conditions']['cardiology']['part']
+        assert part.stat().st_size == checkpoint['conditions']['cardiology']['bytes']
+        with open(part, 'ab') as f:
+            f.write(b'{"protocolSection": {"identificationMod')
+
+        # run 2: picks up cardiology at the failed page; oncology is not refetched
+        broken['on'] = False
+        first_run = len(stub.requests)
+        assert run_ingestion_pipeline(**options) is True
+        resumed = stub.requests[first_run:]
+        assert {r['query.cond'] for r in resumed} == {'cardiology'}
+        assert resumed[0]['pageToken'] == 'p20'
+        ids = [study_id(s) for s in iter_raw_studies(store)]
+        assert len(ids) == len(set(ids)) == 80
+        assert not (tmp_path / 'ckpt').exists()
+        since = json.loads((tmp_path / 'state.json').read_text())['last_success']
+
+        # a leftover checkpoint from other paging settings is not resumed
+        broken['on'] = True
+        assert run_ingestion_pipeline(**options) is False
+        broken['on'] = False
+        before = len(stub.requests)
+        assert run_ingestion_pipeline(**{**options, 'page_size': 25}) is True
+        fresh = [r['query.cond'] for r in stub.requests[before:] if 'pageToken' not in r]
+        assert sorted(fresh) == ['cardiology', 'oncology']  # both restarted at page 1
+        assert len(list(iter_raw_studies(store))) == 80
+
+        # run 3 (delta): three studies change, two are new
+        for study in corpus['oncology'][:3]:
+            study['protocolSection']['statusModule'].update(
+                overallStatus='TERMINATED', lastUpdatePostDateStruct={'date': '2099-01-01'})
+        corpus['cardiology'] += [make_study(f'NCT3{i:07d}', last_update='2099-01-01') for i in range(2)]
+        before_delta = len(stub.requests)
+        assert run_ingestion_pipeline(**options, delta=True) is True
+        delta_requests = stub.requests[before_delta:]
+
+    assert all(r['filter.advanced'] == f'AREA[LastUpdatePostDate]RANGE[{since},MAX]'
+               for r in delta_requests)
+    assert len(delta_requests) == 2  # one short page per condition
+    merged = list(iter_raw_studies(store))
+    assert len(merged) == 82
+    assert [study_id(s) for s in merged][:3] == ['NCT10000000', 'NCT10000001', 'NCT10000002']
+    assert merged[0]['protocolSection']['statusModule']['overallStatus'] == 'TERMINATED'
+    assert merged[3]['protocolSection']['statusModule']['overallStatus'] == 'COMPLETED'
+
+
+def test_streaming_transformation_is_byte_identical(tmp_path):
+    """Chunked streaming parse writes exactly the bytes of the in-memory path"""
+    from stub_ctgov import make_study
+    from src.pipelines.data_transformation import run_transformation_pipeline
+
+    def studies(missing_at):
+        out = [make_study(f'NCT{i:08d}', sponsor=f'Sponsor, "{i}"', enrollment=i * 10)
+               for i in range(23)]
+        if missing_at is not None:
+            del out[missing_at]['protocolSection']['designModule']['enrollmentInfo']
+        out[3]['protocolSection']['designModule']['phases'] = []
+        return out
+
+    # integer enrollment throughout, a gap in the first chunk, and one in
+    # a late chunk (which turns the already-written rows float)
+    for missing_at in [None, 1, 21]:
+        data = studies(missing_at)
+        for layout, doc in [('list', data), ('dict', {'studies': data, 'nextPageToken': None})]:
+            raw = tmp_path / f'raw_{layout}.json'
+            raw.write_text(json.dumps(doc, indent=2))
+            run_transformation_pipeline(str(raw), str(tmp_path / 'legacy.csv'))
+            expected = (tmp_path / 'legacy.csv').read_bytes()
+            for chunk_size in [1, 5, 100]:
+                out = tmp_path / f'streamed_{chunk_size}.csv'
+                run_transformation_pipeline(str(raw), str(out), streaming=True,
+                                            chunk_size=chunk_size)
+                assert out.read_bytes() == expected, (missing_at, layout, chunk_size)
+
+    raw = tmp_path / 'empty.json'
+    raw.write_text('{"studies": []}')
+    run_transformation_pipeline(str(raw), str(tmp_path / 'legacy.csv'))
+    run_transformation_pipeline(str(raw), str(tmp_path / 'streamed.csv'), streaming=True)
+    assert (tmp_path / 'streamed.csv').read_bytes() == (tmp_path / 'legacy.csv').read_bytes()
+
+
+def test_parquet_datasets_through_transformation_and_preparation(tmp_path, monkeypatch):
+    """Streamed and in-memory Parquet interim files match; preparation writes typed Parquet"""
+    from stub_ctgov import make_study
+    from src.pipelines.data_preparation import run_preparation_pipeline
+    from src.pipelines.data_transformation import run_transformation_pipeline
+    from src.utils.tables import read_table
+
+    monkeypatch.chdir(tmp_path)  # preparation saves its artifacts under models/
+    statuses = ['COMPLETED', 'TERMINATED', 'RECRUITING']
+    studies = [make_study(f'NCT{i:08d}', status=statuses[i % 3],
+                          condition=['Breast Cancer', 'Heart Failure'][i % 2],
+                          enrollment=None if i % 5 == 0 else i * 10)
+               for i in range(60)]
+    (tmp_path / 'raw.json').write_text(json.dumps(studies))
+
+    run_transformation_pipeline('raw.json', 'interim/full.parquet')
+    run_transformation_pipeline('raw.json', 'interim/streamed.parquet',
+                                streaming=True, chunk_size=7)
+    full = read_table('interim/full.parquet')
+    assert full.equals(read_table('interim/streamed.parquet'))
+    assert full['enrollment'].dtype == 'float64' and len(full) == 60
+
+    run_preparation_pipeline('interim/streamed.parquet', 'processed/cleaned.parquet')
+    processed = read_table('processed/cleaned.parquet')
+    assert len(processed) == 40
+    assert processed['target_outcome'].dtype == 'int8'
+    assert processed['is_phase2'].dtype == 'int8'
+    assert 'nct_id' not in processed.columns
+
+
+def test_sparse_features_from_preparation_to_serving(tmp_path, monkeypatch):
+    """Sparse preparation + training; the serving layout rebuilds the training rows as CSR"""
+    import numpy as np
+    from scipy import sparse
+    from src.inference.serving import ServingState
+    from src.pipelines.data_preparation import run_preparation_pipeline
+    from src.pipelines.model_training import run_training_pipeline
+    from src.utils.artifacts import load_artifact
+    from src.utils.tables import read_sparse, read_table
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MLFLOW_TRACKING_URI', f'sqlite:///{tmp_path}/mlflow.db')
+    rng = np.random.default_rng(0)
+    words = ['breast', 'lung', 'heart', 'failure', 'cancer', 'diabetes', 'type', 'acute']
+    n = 200
+    interim = pd.DataFrame({
+        'nct_id': [f'NCT{i:08d}' for i in range(n)],
+        'phase': rng.choice(['PHASE1', 'PHASE2', 'PHASE3', None], n),
+        'status': rng.choice(['COMPLETED', 'TERMINATED'], n),
+        'enrollment': rng.integers(1, 2000, n).astype(float),
+        'conditions': [' '.join(rng.choice(words, 2)) for _ in range(n)],
+        'sponsor': rng.choice(['Pfizer', 'Roche', 'Tiny', 'Other'], n),
+    })
+    interim.to_csv('interim.csv', index=False)
+
+    run_preparation_pipeline('interim.csv', 'processed.parquet',
+                             sparse_path='sparse.npz', max_features=20, top_sponsors=2)
+    dense = read_table('processed.parquet')
+    block, names = read_sparse('sparse.npz')
+    assert sparse.issparse(block) and block.shape[0] == len(dense)
+    assert not [c for c in dense.columns if c.startswith(('sponsor_', 'cond_'))]
+    assert names[:3] == sorted(names[:3]) and names[0].startswith('sponsor_')
+
+    run_training_pipeline('processed.parquet', 'models/model.pkl',
+                          sparse_path='sparse.npz',
+                          feature_names_path='models/feature_names.joblib')
+    model, _ = load_artifact('models/model.pkl')
+    feature_names, _ = load_artifact('models/feature_names.joblib')
+    X = sparse.hstack([sparse.csr_matrix(dense.drop(columns=['target_outcome'])
+                                         .astype(float).to_numpy()), block], format='csr')
+
+    state = ServingState(
+        models={'logistic_baseline': model},
+        artifacts={'featurizer': load_artifact('models/featurizer.joblib')[0],
+                   'feature_names': feature_names},
+    ).compile({'condition_cache': {'enabled': False}})
+    assert state.feature_layout.sparse and state.scorer is not None
+    state.validate()
+
+    kept = interim[interim['status'].isin(['COMPLETED', 'TERMINATED'])]
+    layout_X = state.feature_layout.transform(
+        kept['phase'], kept['conditions'], kept['sponsor'], kept['enrollment'].to_numpy())
+    assert sparse.issparse(layout_X)
+    # the same featurizer, so serving rebuilds every training row (missing phases too)
+    assert np.allclose(layout_X.toarray(), X.toarray())
+    assert np.allclose(state.score(layout_X), model.predict_proba(layout_X)[:, 1], atol=1e-9)
+
+
+def test_parallel_search_logs_nested_runs_and_saves_best(tmp_path, monkeypatch):
+    """Grid search over 2 workers: one child run per candidate, best one saved and servable"""
+    import mlflow
+    import numpy as np
+    from src.inference.serving import ServingState
+    from src.pipelines.model_search import candidate_grid, run_search_pipeline
+    from src.utils.artifacts import load_artifact
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MLFLOW_TRACKING_URI', f'sqlite:///{tmp_path}/mlflow.db')
+    rng = np.random.default_rng(1)
+    words = ['breast', 'lung', 'heart', 'failure', 'cancer', 'diabetes', 'type', 'acute']
+    n = 160
+    pd.DataFrame({
+        'nct_id': [f'NCT{i:08d}' for i in range(n)],
+        'phase': rng.choice(['PHASE1', 'PHASE2', 'PHASE3', None], n),
+        'status': rng.choice(['COMPLETED', 'TERMINATED'], n),
+        'enrollment': rng.integers(1, 2000, n).astype(float),
+        'conditions': [' '.join(rng.choice(words, 2)) for _ in range(n)],
+        'sponsor': rng.choice(['Pfizer', 'Roche', 'Tiny', 'Other'], n),
+    }).to_csv('interim.csv', index=False)
+
+    grid = {'top_sponsors': [1, 3], 'max_features': [5], 'C': [0.1, 1.0],
+            'penalty': ['l2', 'l1'], 'solver': ['lbfgs', 'liblinear']}
+    # l1 only pairs with liblinear
+    assert len(candidate_grid(grid)) == 2 * 2 * 3
+    result = run_search_pipeline('interim.csv', 'models/model.pkl', 'models/featurizer.joblib',
+                                 feature_names_path='models/feature_names.joblib',
+                                 results_path='models/best.json', grid=grid, workers=2)
+    assert json.loads(open('models/best.json').read())['candidate'] == result['candidate']
+
+    runs = mlflow.search_runs(experiment_names=['clinical_trials_outcome'])
+    parent = runs[runs['tags.mlflow.runName'] == 'search']
+    children = runs[runs['tags.mlflow.parentRunId'] == parent['run_id'].iloc[0]]
+    assert len(parent) == 1 and len(children) == 12
+    assert result['metrics']['roc_auc'] == children['metrics.roc_auc'].max()
+    assert parent['metrics.roc_auc'].iloc[0] == result['metrics']['roc_auc']
+
+    featurizer, _ = load_artifact('models/featurizer.joblib')
+    assert featurizer.top_sponsors == result['candidate']['top_sponsors']
+    state = ServingState(
+        models={'logistic_baseline': load_artifact('models/model.pkl')[0]},
+        artifacts={'featurizer': featurizer,
+                   'feature_names': load_artifact('models/feature_names.joblib')[0]},
+    ).compile({'condition_cache': {'enabled': False}})
+    state.validate()
+
+    # the search writes its own files: prepare/train outputs are not touched
+    from src.pipelines.pipeline_runner import default_stages, lookup
+    paths = load_config('paths.yaml')
+    stages = {stage.name: stage for stage in default_stages()}
+    others = {lookup(paths, key) for name, stage in stages.items() if name != 'search'
+              for key in stage.outputs}
+    assert stages['search'].manual
+    assert not others & {lookup(paths, key) for key in stages['search'].outputs}
+
+
+def test_incremental_training_streams_chunks_into_a_servable_model(tmp_path, monkeypatch):
+    """Chunked partial_fit (dense and sparse): streamed metrics are exact, the API serves it"""
+    import numpy as np
+    from sklearn.metrics import precision_score, roc_auc_score
+    from src.inference.serving import ServingState
+    from src.pipelines.data_preparation import run_preparation_pipeline
+    from src.pipelines.incremental_training import (
+        hashed_test_mask, iter_splits, run_incremental_training_pipeline)
+    from src.utils.artifacts import load_artifact
+    from src.utils.tables import read_sparse
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MLFLOW_TRACKING_URI', f'sqlite:///{tmp_path}/mlflow.db')
+    # the split is a function of the row position only, not of the chunking
+    mask = hashed_test_mask(0, 5000, 0.2)
+    assert np.array_equal(np.concatenate([hashed_test_mask(s, 1000, 0.2)
+                                          for s in range(0, 5000, 1000)]), mask)
+    assert abs(mask.mean() - 0.2) < 0.02
+
+    rng = np.random.default_rng(2)
+    words = ['breast', 'lung', 'heart', 'failure', 'cancer', 'diabetes', 'type', 'acute']
+    n = 600
+    phase = rng.choice(['PHASE1', 'PHASE2', 'PHASE3', None], n)
+    completed = rng.random(n) < np.where(phase == 'PHASE3', 0.9, 0.5)
+    pd.DataFrame({
+        'nct_id': [f'NCT{i:08d}' for i in range(n)],
+        'phase': phase,
+        'status': np.where(completed, 'COMPLETED', 'TERMINATED'),
+        'enrollment': rng.integers(1, 2000, n).astype(float),
+        'conditions': [' '.join(rng.choice(words, 2)) for _ in range(n)],
+        'sponsor': rng.choice(['Pfizer', 'Roche', 'Tiny', 'Other'], n),
+    }).to_csv('interim.csv', index=False)
+
+    for sparse_path in [None, 'sparse.npz']:
+        run_preparation_pipeline('interim.csv', 'processed.parquet', sparse_path=sparse_path,
+                                 max_features=10, top_sponsors=2)
+        metrics = run_incremental_training_pipeline(
+            'processed.parquet', 'models/model.pkl', sparse_path=sparse_path,
+            feature_names_path='models/feature_names.joblib', chunk_size=70, epochs=3)
+        model, _ = load_artifact('models/model.pkl')
+
+        block = read_sparse(sparse_path)[0] if sparse_path else None
+        (_, _, _, X_test, y_test), = iter_splits('processed.parquet', n, 0.2, block)
+        proba = model.predict_proba(X_test)[:, 1]
+        # ranked by logit: probabilities from SGD can saturate to exactly 0/1
+        auc = roc_auc_score(y_test, model.decision_function(X_test))
+        assert abs(metrics['roc_auc'] - auc) < 1e-3
+        assert metrics['precision_class_1'] == precision_score(y_test, model.predict(X_test))
+        assert metrics['roc_auc'] > 0.6
+
+        state = ServingState(
+            models={'logistic_baseline': model},
+            artifacts={'featurizer': load_artifact('models/featurizer.joblib')[0],
+                       'feature_names': load_artifact('models/feature_names.joblib')[0]},
+        ).compile({'condition_cache': {'enabled': False}})
+        assert state.scorer is not None
+        state.validate()
+        assert np.allclose(state.score(X_test), proba, atol=1e-9)
+
+
+def test_incremental_training_skips_chunks_without_training_rows(tmp_path, monkeypatch):
+    """First and last chunk hash entirely to the test split: they are skipped, not fit"""
+    import numpy as np
+    from src.pipelines.incremental_training import (
+        hashed_test_mask, run_incremental_training_pipeline)
+    from src.utils.artifacts import load_artifact
+    from src.utils.tables import processed_schema, write_table
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MLFLOW_TRACKING_URI', f'sqlite:///{tmp_path}/mlflow.db')
+    n, chunk_size, test_fraction = 106, 3, 0.3
+    mask = hashed_test_mask(0, n, test_fraction)
+    assert mask[:chunk_size].all() and mask[n - n % chunk_size:].all()
+
+    rng = np.random.default_rng(4)
+    enrollment = rng.normal(4, 2, n)
+    df = pd.DataFrame({
+        'is_phase3': rng.integers(0, 2, n).astype('int8'),
+        'enrollment_log': enrollment,
+        'target_outcome': (enrollment + rng.normal(0, 1, n) > 4).astype('int8'),
+    })
+    write_table(df, 'processed.parquet', schema=processed_schema(df.columns))
+
+    metrics = run_incremental_training_pipeline(
+        'processed.parquet', 'models/model.pkl', chunk_size=chunk_size, epochs=2,
+        test_fraction=test_fraction)
+    model, _ = load_artifact('models/model.pkl')
+    scaler = model.named_steps['preprocessor'].named_transformers_['num']
+    assert scaler.n_samples_seen_ == (~mask).sum()
+    assert metrics['roc_auc'] > 0.6
+
+
+def test_serving_bundle_scores_like_the_pipeline_without_unpickling(tmp_path, monkeypatch):
+    """Training exports the bundle (dense and sparse); the API loads it with joblib off"""
+    import joblib
+    import numpy as np
+    from src.inference.linear_scorer import LinearScorer
+    from src.inference.serving import load_serving_state
+    from src.pipelines.data_preparation import run_preparation_pipeline
+    from src.pipelines.model_training import run_training_pipeline
+    from src.utils.artifacts import load_artifact
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MLFLOW_TRACKING_URI', f'sqlite:///{tmp_path}/mlflow.db')
+    rng = np.random.default_rng(3)
+    words = ['breast', 'lung', 'heart', 'failure', 'cancer', 'diabetes', 'type', 'acute']
+    n = 200
+    interim = pd.DataFrame({
+        'nct_id': [f'NCT{i:08d}' for i in range(n)],
+        'phase': rng.choice(['PHASE1', 'PHASE2', 'PHASE3', None], n),
+        'status': rng.choice(['COMPLETED', 'TERMINATED'], n),
+        'enrollment': rng.integers(1, 2000, n).astype(float),
+        'conditions': [' '.join(rng.choice(words, 2)) for _ in range(n)],
+        'sponsor': rng.choice(['Pfizer', 'Roche', 'Tiny', 'Other'], n),
+    })
+    interim.to_csv('interim.csv', index=False)
+    config = {
+        'data': {'interim': 'interim.csv'},
+        'models': {'logistic_baseline': 'models/model.pkl'},
+        'artifacts': {'featurizer': 'models/featurizer.joblib',
+                      'feature_names': 'models/feature_names.joblib'},
+        'serving': {'bundle': 'models/bundle'},
+    }
+    api_params = {'condition_cache': {'enabled': False}}
+    rows = (interim['phase'], interim['conditions'], interim['sponsor'],
+            interim['enrollment'].to_numpy())
+
+    def no_unpickling(*args, **kwargs):
+        raise AssertionError('joblib.load called')
+
+    for sparse_path in [None, 'sparse.npz']:
+        run_preparation_pipeline('interim.csv', 'processed.parquet', sparse_path=sparse_path,
+                                 max_features=10, top_sponsors=2)
+        run_training_pipeline('processed.parquet', 'models/model.pkl', sparse_path=sparse_path,
+                              feature_names_path='models/feature_names.joblib',
+                              featurizer_path='models/featurizer.joblib',
+                              bundle_path='models/bundle')
+        model, _ = load_artifact('models/model.pkl')
+        with open('models/bundle/manifest.json') as f:
+            manifest = json.load(f)
+        assert manifest['model']['sparse_input'] == bool(sparse_path)
+        assert all(spec['file'].endswith('.npy') for spec in manifest['arrays'].values())
+
+        with monkeypatch.context() as m:
+            m.setattr(joblib, 'load', no_unpickling)
+            state = load_serving_state(config, api_params)
+        assert isinstance(state.models['logistic_baseline'], LinearScorer)
+        assert 'serving_bundle' in state.load_stats['bundle']
+        state.validate()
+        X = state.feature_layout.transform(*rows)
+        expected = model.predict_proba(
+            X if sparse_path else pd.DataFrame(X, columns=model.feature_names_in_))
+        assert np.allclose(state.score(X), expected[:, 1], atol=1e-9)
+
+    # the sklearn engine (rollback switch) needs the pickled pipeline
+    state = load_serving_state(config, {**api_params, 'scoring_engine': 'sklearn'})
+    assert not isinstance(state.models['logistic_baseline'], LinearScorer)
+    assert state.scorer is None
+    state.validate()
+
+    # a bundle from another format version is not read: the joblib files serve
+    manifest['version'] += 1
+    with open('models/bundle/manifest.json', 'w') as f:
+        json.dump(manifest, f)
+    state = load_serving_state(config, api_params)
+    assert not isinstance(state.models['logistic_baseline'], LinearScorer)
+    state.validate()
+
+
+def test_pipeline_runner_skips_up_to_date_stages(tmp_path):
+    """Content-addressed stage cache: reruns only what changed; independent stages overlap"""
+    import time
+    from functools import partial
+    from src.pipelines.pipeline_runner import Stage, run_pipeline
+
+    def runs():
+        if not (tmp_path / 'runs.log').exists():
+            return {}
+        lines = [line.split() for line in (tmp_path / 'runs.log').read_text().splitlines()]
+        (tmp_path / 'runs.log').unlink()
+        return {name: (float(start), float(end)) for name, start, end in lines}
+
+    def run(**kwargs):
+        results = run_pipeline(stages, config, str(tmp_path / 'state.json'),
+                               root=tmp_path, **kwargs)
+        return {name: result['status'] for name, result in results.items()}
+
+    (tmp_path / 'seed.txt').write_text('v1')
+    config = {'paths': {'data': {'seed': 'seed.txt', 'a': 'a.txt', 'b': 'b.txt', 'c': 'c.txt'}},
+              'params': {'case': 'upper'}}
+    stages = [
+        Stage('make_a', partial(_copy_text, 'seed.txt', 'a.txt', 'make_a'),
+              inputs=['data.seed'], outputs=['data.a'], config=['params.case']),
+        Stage('make_b', partial(_copy_text, 'a.txt', 'b.txt', 'make_b', 0.5),
+              inputs=['data.a'], outputs=['data.b']),
+        Stage('audit_a', partial(_copy_text, 'a.txt', None, 'audit_a', 0.5),
+              inputs=['data.a']),
+        Stage('check', _fail, inputs=['data.b'], outputs=['data.c']),
+        Stage('after', partial(_copy_text, 'c.txt', None, 'after'), inputs=['data.c']),
+        Stage('extra', partial(_copy_text, 'a.txt', None, 'extra'), inputs=['data.a'],
+              manual=True),
+        Stage('fetch', partial(_copy_text, 'seed.txt', None, 'fetch'), max_age=0),
+    ]
+    targets = ['make_b', 'audit_a']
+
+    assert run(targets=targets) == {'make_a': 'ran', 'make_b': 'ran', 'audit_a': 'ran'}
+    log = runs()
+    # both only need make_a, so they ran side by side
+    assert log['make_b'][0] >= log['make_a'][1] and log['audit_a'][0] >= log['make_a'][1]
+    assert log['make_b'][0] < log['audit_a'][1] and log['audit_a'][0] < log['make_b'][1]
+
+    start = time.perf_counter()
+    assert set(run(targets=targets).values()) == {'skipped'}
+    assert time.perf_counter() - start < 1.0 and runs() == {}
+
+    # config changed, same output bytes: downstream stays cached
+    config['params']['case'] = 'lower'
+    assert run(targets=targets) == {'make_a': 'ran', 'make_b': 'skipped', 'audit_a': 'skipped'}
+    (tmp_path / 'seed.txt').write_text('v2')
+    assert set(run(targets=targets).values()) == {'ran'} and len(runs()) == 3
+    (tmp_path / 'b.txt').unlink()
+    assert run(targets=targets)['make_b'] == 'ran' and set(runs()) == {'make_b'}
+    assert run(targets=targets, force=['audit_a'])['audit_a'] == 'ran'
+    assert (tmp_path / 'b.txt').read_text() == 'v2'
+
+    statuses = run()
+    assert statuses['check'] == 'failed' and statuses['after'] == 'blocked'
+    # manual stages only run as targets
+    assert 'extra' not in statuses and run(targets=['extra'])['extra'] == 'ran'
+    assert run()['check'] == 'failed'  # never recorded as done
+    state = json.loads((tmp_path / 'state.json').read_text())
+    assert 'check' not in state['stages'] and state['stages']['make_b']['seconds'] >= 0.5
+
+    # max_age: 0 is always out of date; otherwise once the last run is that old
+    assert run(targets=['fetch'])['fetch'] == 'ran'
+    stages[-1].max_age = 3600
+    assert run(targets=['fetch'])['fetch'] == 'skipped'
+    state = json.loads((tmp_path / 'state.json').read_text())
+    state['stages']['fetch']['finished_at'] -= 7200
+    (tmp_path / 'state.json').write_text(json.dumps(state))
+    assert run(targets=['fetch'])['fetch'] == 'ran'
@@ -0,0 +1,279 @@
+# tests/test_utils.py
+
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from src.utils import artifacts as artifact_utils
+
+
+def test_load_artifacts_loads_each_file_once(tmp_path, monkeypatch):
+    """Every configured file is read exactly once; missing files are skipped"""
+    for name in ['model', 'tfidf', 'sponsors']:
+        artifact_utils.save_artifact({'name': name, 'w': np.arange(5.0)},
+                                     str(tmp_path / f'{name}.joblib'))
+
+    calls = []
+    real_load = joblib.load
+
+    def counting_load(path, *args, **kwargs):
+        calls.append(path)
+        return real_load(path, *args, **kwargs)
+
+    monkeypatch.setattr(artifact_utils.joblib, 'load', counting_load)
+    loaded, stats = artifact_utils.load_artifacts([
+        ('model', 'baseline', str(tmp_path / 'model.joblib')),
+        ('model', 'challenger', str(tmp_path / 'missing.joblib')),
+        ('artifact', 'tfidf', str(tmp_path / 'tfidf.joblib')),
+        ('artifact', 'sponsors', str(tmp_path / 'sponsors.joblib')),
+    ])
+
+    assert sorted(calls) == sorted(str(tmp_path / f'{n}.joblib')
+                                   for n in ['model', 'tfidf', 'sponsors'])
+    assert set(loaded['model']) == {'baseline'}
+    assert set(loaded['artifact']) == {'tfidf', 'sponsors'}
+    assert loaded['artifact']['tfidf']['name'] == 'tfidf'
+    info = stats['model']['baseline']
+    assert info['bytes'] == os.path.getsize(tmp_path / 'model.joblib')
+    assert info['seconds'] >= 0
+
+
+def test_load_artifact_memory_maps_arrays(tmp_path):
+    """Numpy arrays in uncompressed dumps come back memory-mapped"""
+    path = str(tmp_path / 'weights.joblib')
+    artifact_utils.save_artifact({'coef': np.ones(1000)}, path)
+
+    obj, _ = artifact_utils.load_artifact(path, mmap_mode='r')
+
+    assert isinstance(obj['coef'], np.memmap)
+    assert not os.path.exists(path + f'.tmp-{os.getpid()}')
+
+
+def _corpus(prefix, n, start=0):
+    from stub_ctgov import make_study
+    return [make_study(f'NCT{prefix}{i:05d}', condition=prefix) for i in range(start, start + n)]
+
+
+def test_fetch_conditions_concurrent_pooled_and_per_condition_failures():
+    """Conditions are fetched concurrently over pooled connections; one failing doesn't sink the rest"""
+    import time
+    from stub_ctgov import StubCTGov
+    from src.utils.ingestion import fetch_conditions, fetch_trials
+
+    shared = _corpus('onc', 2)  # trials listed under two conditions
+    corpus = {
+        'oncology': _corpus('onc', 25),
+        'cardiology': _corpus('car', 25) + shared,
+        'neurology': _corpus('neu', 25),
+        'dermatology': _corpus('der', 25),
+        'hepatology': _corpus('hep', 25),
+    }
+    # the second page of hepatology fails
+    fail = lambda params, n: 500 if (params['query.cond'] == 'hepatology'
+                                     and params.get('pageToken') == 'p10') else None
+
+    with StubCTGov(corpus, latency=0.05, fail=fail) as stub:
+        start = time.perf_counter()
+        studies, failures = fetch_conditions(stub.url, list(corpus), page_size=10,
+                                             max_pages=10, max_concurrency=4)
+        elapsed = time.perf_counter() - start
+
+        # 4 chains of 3 pages + 2 hepatology pages at 50 ms each: well over
+        # 0.6 s one page at a time, ~0.2 s with four conditions in flight
+        assert elapsed < 0.45
+        assert set(failures) == {'hepatology'}
+        ids = [s['protocolSection']['identificationModule']['nctId'] for s in studies]
+        assert len(ids) == len(set(ids)) == 100
+        assert ids[:25] == [f'NCTonc{i:05d}' for i in range(25)]
+        # page chains stay sequential per condition
+        tokens = [r.get('pageToken') for r in stub.requests if r['query.cond'] == 'neurology']
+        assert tokens == [None, 'p10', 'p20']
+        # keep-alive pool: no more sockets than workers
+        assert len(stub.connections) <= 4
+
+        # the single-condition path still returns what it got before an error
+        partial = fetch_trials(stub.url, 'hepatology', page_size=10, max_pages=10)
+        assert len(partial) == 10
+
+
+def test_fetch_partitioned_returns_same_set_as_serial_walk():
+    """Date-window partitioning with adaptive splitting finds exactly the serial result set"""
+    import random
+    from stub_ctgov import StubCTGov, make_study
+    from src.utils.ingestion import fetch_partitioned, fetch_trials, study_id
+
+    rng = random.Random(7)
+    studies = []
+    for i in range(400):
+        roll = rng.random()
+        if roll < 0.1:
+            start = None                                   # no start date
+        elif roll < 0.3:
+            start = f'{rng.randint(1995, 2024)}-{rng.randint(1, 12):02d}'  # month precision
+        else:
+            start = f'{rng.randint(1995, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+        studies.append(make_study(f'NCT{i:08d}', start_date=start))
+    # a burst on one day, too big for any window to hold
+    studies += [make_study(f'NCT9{i:07d}', start_date='2020-03-15') for i in range(60)]
+
+    with StubCTGov({'cancer': studies}) as stub:
+        serial = fetch_trials(stub.url, 'cancer', page_size=50, max_pages=100)
+        partitioned, failures = fetch_partitioned(
+            stub.url, 'cancer', page_size=20, start='1990-01-01', end='2025-12-31',
+            initial_windows=2, max_window_studies=40, max_concurrency=4)
+
+        windows = {r['filter.advanced'] for r in stub.requests if 'filter.advanced' in r}
+
+    assert failures == {}
+    ids = [study_id(s) for s in partitioned]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == {study_id(s) for s in serial}
+    # adaptive: windows were split well past the initial two (+ MISSING)
+    assert len(windows) > 10
+    assert 'AREA[StartDate]MISSING' in windows
+
+
+@pytest.mark.parametrize('suffix', ['.ndjson', '.ndjson.gz', '.ndjson.zst'])
+def test_raw_study_writer_round_trip_and_durable_pages(tmp_path, suffix):
+    """Pages are readable as soon as write_page returns; duplicates are dropped"""
+    from src.utils import raw_io
+    from src.utils.ingestion import study_id
+    from stub_ctgov import make_study
+
+    if suffix.endswith('.zst'):
+        pytest.importorskip('zstandard')
+    path = str(tmp_path / f'raw{suffix}')
+    page1 = [make_study(f'NCT{i:08d}') for i in range(3)]
+    page2 = [make_study(f'NCT{i:08d}') for i in range(2, 5)]
+
+    with raw_io.RawStudyWriter(path, id_of=study_id) as writer:
+        assert writer.write_page(page1) == 3
+        # a reader (or a crash) mid-run sees every completed page
+        assert [study_id(s) for s in raw_io.iter_raw_studies(path)] == [study_id(s) for s in page1]
+        assert writer.write_page(page2) == 2
+
+    studies = list(raw_io.iter_raw_studies(path))
+    assert [study_id(s) for s in studies] == [f'NCT{i:08d}' for i in range(5)]
+    assert studies[0] == page1[0]
+    assert writer.count == 5 and writer.duplicates == 1
+
+
+def test_iter_raw_studies_reads_legacy_json(tmp_path):
+    """The original JSON list and {'studies': [...]} layouts still load"""
+    import json
+    from src.utils.raw_io import iter_raw_studies
+
+    for name, data in [('list.json', [{'a': 1}, {'a': 2}]), ('dict.json', {'studies': [{'a': 1}, {'a': 2}]})]:
+        (tmp_path / name).write_text(json.dumps(data))
+        assert list(iter_raw_studies(str(tmp_path / name))) == [{'a': 1}, {'a': 2}]
+
+
+def _fixture_studies():
+    import gzip
+    import json
+    path = os.path.join(os.path.dirname(__file__), 'fixtures', 'ctgov_full_studies.json.gz')
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)['studies']
+
+
+def test_projected_fetch_requests_and_keeps_only_flattened_fields():
+    """fields= asks for STUDY_FIELDS only; projected documents flatten like full ones"""
+    from stub_ctgov import StubCTGov
+    from src.utils.flattening import STUDY_FIELDS, flatten_study, project_study
+    from src.utils.ingestion import fetch_trials
+
+    studies = _fixture_studies()
+    with StubCTGov({'cancer': studies}) as stub:
+        full = fetch_trials(stub.url, 'cancer', page_size=10, max_pages=10)
+        full_bytes = stub.bytes_sent
+        projected = fetch_trials(stub.url, 'cancer', page_size=10, max_pages=10,
+                                 fields=STUDY_FIELDS)
+        projected_bytes = stub.bytes_sent - full_bytes
+
+    assert stub.requests[-1]['fields'] == ','.join(STUDY_FIELDS)
+    assert projected_bytes * 10 < full_bytes
+    assert projected == [project_study(s) for s in studies]
+    assert [flatten_study(s) for s in projected] == [flatten_study(s) for s in full]
+
+
+def _random_studies(n, seed=0):
+    """Full fixture documents with fields randomly dropped, nulled or reshaped"""
+    import copy
+    import random
+
+    rng = random.Random(seed)
+    fixtures = _fixture_studies()
+    studies = []
+    for i in range(n):
+        study = copy.deepcopy(fixtures[i % len(fixtures)])
+        section = study['protocolSection']
+        choice = rng.randrange(8)
+        if choice == 0:
+            del section['designModule']
+        elif choice == 1:
+            section['designModule']['phases'] = []
+        elif choice == 2:
+            section['conditionsModule']['conditions'] = 'Free-text condition'
+        elif choice == 3:
+            section['sponsorCollaboratorsModule']['leadSponsor']['name'] = None
+        elif choice == 4:
+            del section['statusModule']['overallStatus']
+        elif choice == 5:
+            study = {}
+        studies.append(study)
+    return studies
+
+
+def test_columnar_flattener_matches_reference(tmp_path):
+    """The compiled columnar flattener builds the flatten_study frame, serially and in a pool"""
+    import pandas as pd
+    from src.utils.columnar import STUDY_SPEC, flatten_frame, iter_flat_frames
+    from src.utils.flattening import STUDY_FIELDS, flatten_study
+    from src.utils.raw_io import write_store
+
+    assert [f.path for f in STUDY_SPEC] == STUDY_FIELDS
+    studies = _random_studies(200)
+    reference = pd.DataFrame([flatten_study(s) for s in studies])
+    pd.testing.assert_frame_equal(flatten_frame(studies), reference)
+    assert list(flatten_frame([]).columns) == list(reference.columns)
+
+    for name, workers in [('raw.json', 1), ('raw.ndjson.gz', 1), ('raw.ndjson', 2)]:
+        path = str(tmp_path / name)
+        write_store(path, studies)
+        frames = list(iter_flat_frames(path, chunk_size=30, workers=workers))
+        assert [len(f) for f in frames] == [30] * 6 + [20]
+        combined = pd.concat(frames, ignore_index=True)
+        pd.testing.assert_frame_equal(combined, reference, check_dtype=False)
+
+
+@pytest.mark.parametrize('name', ['data.csv', 'data.parquet', 'data.feather'])
+def test_tables_round_trip_with_schema_and_pruning(tmp_path, name):
+    """Every storage format reads back the data, pruned and in chunks; Arrow keeps the schema"""
+    import pandas as pd
+    from src.utils.tables import INTERIM_SCHEMA, iter_table_chunks, read_table, write_table
+
+    df = pd.DataFrame({
+        'nct_id': [f'NCT{i:08d}' for i in range(25)],
+        'phase': ['PHASE2', None, 'PHASE1, PHASE2', 'PHASE3', 'PHASE4'] * 5,
+        'status': ['COMPLETED'] * 25,
+        'enrollment': list(range(25)),
+        'conditions': ['Breast Cancer, "HER2+"'] * 25,
+        'sponsor': ['Pfizer'] * 25,
+    })
+    path = str(tmp_path / name)
+    write_table(df, path, schema=INTERIM_SCHEMA)
+
+    back = read_table(path)
+    assert back['nct_id'].tolist() == df['nct_id'].tolist()
+    assert back['phase'].isna().sum() == 5
+    assert back['enrollment'].astype(float).tolist() == [float(i) for i in range(25)]
+    if not name.endswith('.csv'):
+        assert back['enrollment'].dtype == 'float64'  # the schema's type, not int64
+
+    pruned = read_table(path, columns=['nct_id', 'enrollment'])
+    assert list(pruned.columns) == ['nct_id', 'enrollment']
+    chunks = list(iter_table_chunks(path, 10, columns=['conditions']))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    assert pd.concat(chunks)['conditions'].eq('Breast Cancer, "HER2+"').all()